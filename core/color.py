@@ -1,11 +1,15 @@
 """Color and related classes."""
 
-from typing import List, Set, Any
-from copy import deepcopy
+from typing import List, Set, Any, Iterator, Optional, Tuple, Dict
+from copy import copy
+from functools import lru_cache
+import numpy as np  # type: ignore
 
 
 class Color:
-    """RGBA color"""
+    """RGBA color, immutable value packed into one 32-bit int 0xRRGGBBAA."""
+
+    __slots__ = ('_key',)
 
     @staticmethod
     def _check_color_value(value: int, color: str = '') -> None:
@@ -14,6 +18,21 @@ class Color:
         if value > 255:
             raise ValueError(f'Invalid color [{color}] value: {value} > 255')
 
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def from_key(key: int) -> 'Color':
+        """Interned color from packed 32-bit key 0xRRGGBBAA, key is not validated."""
+        color: Color = Color.__new__(Color)
+        color._key = key
+        return color
+
+    @staticmethod
+    def from_rgba_bytes(data: bytes) -> List['Color']:
+        """Interned colors from trusted RGBA bytes (e.g. Pillow buffer), 4 bytes per color."""
+        if len(data) % 4 != 0:
+            raise ValueError(f'Invalid number of RGBA bytes {len(data)}, not a multiple of 4')
+        return [Color.from_key(key) for key in np.frombuffer(data, dtype='>u4').tolist()]
+
     @staticmethod
     def invert(color: 'Color') -> 'Color':
         return Color(
@@ -28,97 +47,416 @@ class Color:
         Color._check_color_value(green, 'green')
         Color._check_color_value(blue, 'blue')
         Color._check_color_value(alpha, 'alpha')
-        self._red: int = red
-        self._green: int = green
-        self._blue: int = blue
-        self._alpha: int = alpha
+        self._key: int = (red << 24) | (green << 16) | (blue << 8) | alpha
 
     @property
     def red(self) -> int:
-        return self._red
-
-    @red.setter
-    def red(self, value: int) -> None:
-        Color._check_color_value(value)
-        self._red = value
+        return self._key >> 24
 
     @property
     def green(self) -> int:
-        return self._green
-
-    @green.setter
-    def green(self, value: int) -> None:
-        Color._check_color_value(value)
-        self._green = value
+        return (self._key >> 16) & 0xFF
 
     @property
     def blue(self) -> int:
-        return self._blue
-
-    @blue.setter
-    def blue(self, value: int) -> None:
-        Color._check_color_value(value)
-        self._blue = value
+        return (self._key >> 8) & 0xFF
 
     @property
     def alpha(self) -> int:
-        return self._alpha
+        return self._key & 0xFF
 
-    @alpha.setter
-    def alpha(self, value: int) -> None:
-        Color._check_color_value(value)
-        self._alpha = value
+    @property
+    def key(self) -> int:
+        """Packed 32-bit RGBA value 0xRRGGBBAA."""
+        return self._key
 
     @property
     def is_transparent(self) -> bool:
-        return self._alpha == 0
+        return self._key & 0xFF == 0
 
     def is_equal(self, other: 'Color') -> bool:
-        return self.red == other.red \
-            and self.green == other.green \
-            and self.blue == other.blue \
-            and self.alpha == other.alpha
+        return self._key == other._key
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Color):
+            return NotImplemented
+        return self._key == other._key
+
+    def __hash__(self) -> int:
+        return hash(self._key)
+
+    def __repr__(self) -> str:
+        return f'Color({self.red}, {self.green}, {self.blue}, {self.alpha})'
+
+
+class ColorPalette:
+    """Distinct colors in order of first occurrence, collected from one or more key arrays."""
+
+    def __init__(self) -> None:
+        # dict as ordered set of packed 0xRRGGBBAA keys
+        self._keys: Dict[int, None] = {}
+        self._palette_keys: Optional[np.ndarray] = None
+        self._sorter: Optional[np.ndarray] = None
+
+    def add(self, keys: np.ndarray) -> None:
+        """Add colors of packed keys (e.g. ColorMatrix.keys), single pass over the keys."""
+        self._keys.update(dict.fromkeys(keys.reshape(-1).tolist()))
+        self._palette_keys = None
+        self._sorter = None
+
+    @property
+    def color_count(self) -> int:
+        return len(self._keys)
+
+    @property
+    def colors(self) -> List[Color]:
+        return [Color.from_key(key) for key in self._keys]
+
+    def indices(self, keys: np.ndarray) -> np.ndarray:
+        """Palette index per key, vectorized lookup over the sorted palette keys."""
+        if len(self._keys) == 0:
+            raise ValueError('Empty palette')
+        if self._palette_keys is None or self._sorter is None:
+            self._palette_keys = np.array(list(self._keys), dtype=np.uint32)
+            self._sorter = np.argsort(self._palette_keys)
+        positions: np.ndarray = np.searchsorted(self._palette_keys, keys, sorter=self._sorter)
+        indices: np.ndarray = self._sorter[np.minimum(positions, len(self._keys) - 1)]
+        if not np.array_equal(self._palette_keys[indices], keys):
+            raise ValueError('Color missing in palette')
+        return indices.astype(ColorMatrix.index_dtype(len(self._keys)))
 
 
 class ColorMatrix:
+    """RGBA pixels of an image, stored as one contiguous (height, width, 4) uint8 array."""
 
-    def __init__(self, pixel_matrix: List[List[Color]]) -> None:
+    @staticmethod
+    def from_colors(pixel_matrix: List[List[Color]]) -> 'ColorMatrix':
         if len(pixel_matrix) == 0:
             raise ValueError('Empty pixel matrix')
         width: int = len(pixel_matrix[0])
         if any(width != len(row) for row in pixel_matrix[1:]):
             raise ValueError(f'Unequal number of pixels in rows detected: '
-                              'expected all rows to have {width} pixels')
+                             f'expected all rows to have {width} pixels')
+
+        pixels: np.ndarray = np.array(
+            [[(c.red, c.green, c.blue, c.alpha) for c in row] for row in pixel_matrix],
+            dtype=np.uint8
+        ).reshape(len(pixel_matrix), width, 4)
+        return ColorMatrix(pixels)
+
+    @staticmethod
+    def from_palette(palette: np.ndarray, indices: np.ndarray) -> 'ColorMatrix':
+        """
+        Matrix from (n, 4) RGBA palette and (height, width) palette indexes (e.g. indexed PNG).
+        Unused and duplicate palette entries are dropped, RGBA pixels are only expanded on
+        request.
+        """
+        if palette.ndim != 2 or palette.shape[1] != 4:
+            raise ValueError(f'Invalid shape of palette {palette.shape}, expected (n, 4)')
+        if indices.ndim != 2 or indices.shape[0] == 0 or indices.shape[1] == 0:
+            raise ValueError(f'Invalid shape of palette indexes {indices.shape}')
+        if indices.max() >= palette.shape[0]:
+            raise ValueError(f'Palette index {indices.max()} out of range {palette.shape[0]}')
+
+        # used palette entries in order of first occurrence
+        used, first_index = np.unique(indices, return_index=True)
+        used = used[np.argsort(first_index)]
+
+        # merge entries of identical color, remap old index -> new index
+        palette_keys: np.ndarray = np.ascontiguousarray(palette, dtype=np.uint8).view('>u4')[:, 0]
+        key_to_index: Dict[int, int] = {}
+        remap: np.ndarray = np.zeros(palette.shape[0], dtype=np.uint32)
+        for old_index, key in zip(used.tolist(), palette_keys[used].tolist()):
+            remap[old_index] = key_to_index.setdefault(key, len(key_to_index))
+
+        color_matrix: ColorMatrix = ColorMatrix.__new__(ColorMatrix)
+        color_matrix._pixels = None
+        color_matrix._colors = [Color.from_key(key) for key in key_to_index]
+        color_matrix._indices = remap.astype(
+            ColorMatrix.index_dtype(len(key_to_index)))[indices]
+        color_matrix._indices.flags.writeable = False
+        return color_matrix
+
+    def __init__(self, pixels: np.ndarray) -> None:
+        if pixels.ndim != 3 or pixels.shape[2] != 4:
+            raise ValueError(f'Invalid shape of pixel array {pixels.shape}, '
+                             'expected (height, width, 4)')
+        if pixels.shape[0] == 0 or pixels.shape[1] == 0:
+            raise ValueError('Empty pixel matrix')
 
-        self._colors: List[Color] = []
-        # don't use set() as this comes with issues
-        for pixel_row in pixel_matrix:
-            for color in pixel_row:
-                if not any(c.is_equal(color) for c in self._colors):
-                    self._colors.append(color)
-        list(set(deepcopy(col) for pixel_row in pixel_matrix for col in pixel_row))
-        self._matrix: List[List[Color]] = deepcopy(pixel_matrix)
+        # the matrix is immutable: share read-only buffers, copy anything writable
+        self._pixels: Optional[np.ndarray]
+        if pixels.dtype == np.uint8 and pixels.flags.c_contiguous and not pixels.flags.writeable:
+            self._pixels = pixels
+        else:
+            self._pixels = np.array(pixels, dtype=np.uint8, order='C')
+            self._pixels.flags.writeable = False
+
+        # palette and indexes are computed on first use, see _palette()
+        self._colors: Optional[List[Color]] = None
+        self._indices: Optional[np.ndarray] = None
+
+    @staticmethod
+    def index_dtype(color_count: int) -> np.dtype:
+        """Smallest unsigned integer type for palette indexes of color_count colors."""
+        if color_count <= 0x100:
+            return np.dtype(np.uint8)
+        if color_count <= 0x10000:
+            return np.dtype(np.uint16)
+        return np.dtype(np.uint32)
+
+    @staticmethod
+    def index_runs(indices: np.ndarray) -> List[Tuple[int, int]]:
+        """(palette_index, run_length) of the horizontal runs in one row of palette indexes."""
+        starts: np.ndarray = np.concatenate(
+            ([0], np.flatnonzero(indices[1:] != indices[:-1]) + 1)
+        )
+        lengths: np.ndarray = np.diff(np.append(starts, indices.size))
+        return list(zip(indices[starts].tolist(), lengths.tolist()))
+
+    @property
+    def keys(self) -> np.ndarray:
+        """(height, width) view of one 32-bit key per pixel (big endian => 0xRRGGBBAA)."""
+        return self.pixels.view('>u4')[:, :, 0]
+
+    def _palette(self) -> Tuple[List[Color], np.ndarray]:
+        if self._colors is None or self._indices is None:
+            keys: np.ndarray = self.keys.astype(np.uint32)
+            palette: ColorPalette = ColorPalette()
+            palette.add(keys)
+            indices: np.ndarray = palette.indices(keys)
+            indices.flags.writeable = False
+
+            self._colors = palette.colors
+            self._indices = indices
+        return self._colors, self._indices
+
+    def has_more_colors_than(self, count: int) -> bool:
+        """Check color count against a limit, stops scanning once the limit is exceeded."""
+        if self._colors is not None:
+            return len(self._colors) > count
+
+        keys: np.ndarray = self.keys.reshape(-1)
+        seen: Set[int] = set()
+        chunk_size: int = 4096
+        for start in range(0, keys.size, chunk_size):
+            seen.update(np.unique(keys[start:start + chunk_size]).tolist())
+            if len(seen) > count:
+                return True
+        return False
+
+    def _palette_colors(self) -> List[Color]:
+        return self._palette()[0]
 
     @property
     def color_count(self) -> int:
-        return len(self._colors)
+        return len(self._palette_colors())
 
     @property
     def distinct_colors(self) -> List[Color]:
-        return deepcopy(self._colors)
+        return list(self._palette_colors())
+
+    def color_counts(self) -> List[int]:
+        """Number of pixels per distinct color."""
+        return np.bincount(
+            self.palette_indices.reshape(-1), minlength=self.color_count
+        ).tolist()
+
+    @property
+    def palette_indices(self) -> np.ndarray:
+        """Read-only (height, width) array of indexes into distinct_colors."""
+        return self._palette()[1]
+
+    @property
+    def pixels(self) -> np.ndarray:
+        """Read-only (height, width, 4) array of RGBA values."""
+        if self._pixels is None:
+            # palette based matrix, expand on request
+            colors, indices = self._palette()
+            rgba: np.ndarray = np.array(
+                [(c.red, c.green, c.blue, c.alpha) for c in colors], dtype=np.uint8
+            )
+            self._pixels = rgba[indices]
+            self._pixels.flags.writeable = False
+        return self._pixels
 
     @property
     def matrix(self) -> List[List[Color]]:
-        return deepcopy(self._matrix)
+        return list(self.rows())
+
+    def rows(self) -> Iterator[List[Color]]:
+        """Iterate pixel rows, colors are shared palette instances."""
+        colors, indices = self._palette()
+        for row in indices.tolist():
+            yield [colors[idx] for idx in row]
+
+    def row_runs(self) -> Iterator[List[Tuple[int, int]]]:
+        """Iterate rows as runs of (palette_index, run_length)."""
+        for row in self.palette_indices:
+            yield ColorMatrix.index_runs(row)
+
+    def copy(self) -> 'ColorMatrix':
+        """Independent copy with its own buffers."""
+        color_matrix: ColorMatrix = copy(self)
+        if self._pixels is not None:
+            color_matrix._pixels = self._pixels.copy()
+            color_matrix._pixels.flags.writeable = False
+        if self._indices is not None:
+            color_matrix._indices = self._indices.copy()
+            color_matrix._indices.flags.writeable = False
+        if self._colors is not None:
+            color_matrix._colors = list(self._colors)
+        return color_matrix
+
+    def crop(self, top: int, left: int, bottom: int, right: int) -> 'ColorMatrix':
+        """Rectangle [top, bottom) x [left, right) as matrix of its own, palette of the used colors."""
+        height, width = self._shape
+        if not (0 <= top < bottom <= height and 0 <= left < right <= width):
+            raise ValueError(
+                f'Invalid rectangle ({top}, {left}, {bottom}, {right}) '
+                f'for matrix of size {width} x {height}'
+            )
+        colors, indices = self._palette()
+        palette: np.ndarray = np.array(
+            [[c.red, c.green, c.blue, c.alpha] for c in colors], dtype=np.uint8
+        )
+        return ColorMatrix.from_palette(palette, indices[top:bottom, left:right])
+
+    @property
+    def _shape(self) -> Tuple[int, int]:
+        if self._pixels is not None:
+            return self._pixels.shape[0], self._pixels.shape[1]
+        return self._palette()[1].shape
 
     @property
     def width(self) -> int:
-        return len(self._matrix[0])
+        return self._shape[1]
 
     @property
     def height(self) -> int:
-        return len(self._matrix)
+        return self._shape[0]
 
     @property
     def is_empty(self) -> bool:
-        return len(self._matrix) == 0
+        return self.width * self.height == 0
+
+
+class RleColorMatrix(ColorMatrix):
+    """
+    Color matrix stored as rows of (palette_index, run_length), for flat pixel art.
+    Runs are kept in flat arrays, palette indexes and pixels are expanded on request only.
+    """
+
+    @staticmethod
+    def from_color_matrix(color_matrix: ColorMatrix) -> 'RleColorMatrix':
+        """Runs of all rows in one vectorized pass over the palette indexes."""
+        indices: np.ndarray = color_matrix.palette_indices
+        height, width = indices.shape
+        starts: np.ndarray = np.ones((height, width), dtype=bool)
+        starts[:, 1:] = indices[:, 1:] != indices[:, :-1]
+        run_starts: np.ndarray = np.flatnonzero(starts)
+        return RleColorMatrix._from_arrays(
+            color_matrix.distinct_colors,
+            indices.reshape(-1)[run_starts],
+            np.diff(np.append(run_starts, height * width)),
+            np.searchsorted(run_starts, np.arange(height + 1) * width),
+            width,
+        )
+
+    @staticmethod
+    def _from_arrays(
+        colors: List[Color],
+        run_indices: np.ndarray,
+        run_lengths: np.ndarray,
+        row_starts: np.ndarray,
+        width: int,
+    ) -> 'RleColorMatrix':
+        rle_matrix: RleColorMatrix = RleColorMatrix.__new__(RleColorMatrix)
+        rle_matrix._pixels = None
+        rle_matrix._colors = list(colors)
+        rle_matrix._indices = None
+        rle_matrix._run_indices = run_indices.astype(ColorMatrix.index_dtype(len(colors)))
+        rle_matrix._run_lengths = run_lengths.astype(np.int64)
+        rle_matrix._row_starts = row_starts.astype(np.int64)
+        rle_matrix._width = width
+        for array in (rle_matrix._run_indices, rle_matrix._run_lengths, rle_matrix._row_starts):
+            array.flags.writeable = False
+        return rle_matrix
+
+    def __init__(self, runs: List[List[Tuple[int, int]]], colors: List[Color]) -> None:
+        if len(runs) == 0 or len(runs[0]) == 0:
+            raise ValueError('Empty pixel matrix')
+        width: int = sum(length for _, length in runs[0])
+        if any(width != sum(length for _, length in row) for row in runs[1:]):
+            raise ValueError(f'Unequal number of pixels in rows detected: '
+                             f'expected all rows to have {width} pixels')
+        if any(not 0 <= idx < len(colors) or length <= 0 for row in runs for idx, length in row):
+            raise ValueError(f'Invalid run, palette index out of range {len(colors)} '
+                             'or run length <= 0')
+
+        self._pixels: Optional[np.ndarray] = None
+        self._colors: Optional[List[Color]] = list(colors)
+        self._indices: Optional[np.ndarray] = None
+        self._run_indices: np.ndarray = np.array(
+            [idx for row in runs for idx, _ in row], dtype=ColorMatrix.index_dtype(len(colors))
+        )
+        self._run_lengths: np.ndarray = np.array(
+            [length for row in runs for _, length in row], dtype=np.int64
+        )
+        self._row_starts: np.ndarray = np.cumsum([0] + [len(row) for row in runs])
+        self._width: int = width
+        for array in (self._run_indices, self._run_lengths, self._row_starts):
+            array.flags.writeable = False
+
+    @property
+    def run_count(self) -> int:
+        return self._run_indices.size
+
+    def _palette_colors(self) -> List[Color]:
+        assert self._colors is not None
+        return self._colors
+
+    def _palette(self) -> Tuple[List[Color], np.ndarray]:
+        # expanded on first use only, e.g. for images, kept like the indexes of ColorMatrix
+        if self._indices is None:
+            indices: np.ndarray = np.repeat(self._run_indices, self._run_lengths).reshape(
+                self._shape
+            )
+            indices.flags.writeable = False
+            self._indices = indices
+        return self._palette_colors(), self._indices
+
+    def has_more_colors_than(self, count: int) -> bool:
+        return len(self._palette_colors()) > count
+
+    def color_counts(self) -> List[int]:
+        """Number of pixels per distinct color, summed over the runs."""
+        return np.bincount(
+            self._run_indices, weights=self._run_lengths, minlength=self.color_count
+        ).astype(np.int64).tolist()
+
+    def rows(self) -> Iterator[List[Color]]:
+        colors: List[Color] = self._palette_colors()
+        for runs in self.row_runs():
+            pixel_row: List[Color] = []
+            for idx, length in runs:
+                pixel_row += [colors[idx]] * length
+            yield pixel_row
+
+    def row_runs(self) -> Iterator[List[Tuple[int, int]]]:
+        run_indices: List[int] = self._run_indices.tolist()
+        run_lengths: List[int] = self._run_lengths.tolist()
+        row_starts: List[int] = self._row_starts.tolist()
+        for start, end in zip(row_starts[:-1], row_starts[1:]):
+            yield list(zip(run_indices[start:end], run_lengths[start:end]))
+
+    def copy(self) -> 'RleColorMatrix':
+        """Independent copy with its own run arrays."""
+        return RleColorMatrix._from_arrays(
+            self._palette_colors(), self._run_indices, self._run_lengths,
+            self._row_starts, self._width
+        )
+
+    @property
+    def _shape(self) -> Tuple[int, int]:
+        return self._row_starts.size - 1, self._width
@@ -1,7 +1,9 @@
 """Classes for reading of images and providing process objects."""
-from typing import Final, List
-from core.color import Color, ColorMatrix
+from typing import Final, Optional, Iterator
+from dataclasses import dataclass
+from core.color import ColorMatrix, RleColorMatrix
 from PIL import Image  # type: ignore
+import numpy as np  # type: ignore
 from pathlib import Path
 
 
@@ -12,11 +14,29 @@ class FileExtensionError(OSError):
         self.expected_ext: Final[str] = expected_ext
 
 
+@dataclass
+class PngInfo:
+    """Header information of a PNG, color_count only if probed (max_colors > 0)."""
+
+    width: int
+    height: int
+    mode: str
+    palette_size: int
+    max_colors: int = 0
+    color_count: Optional[int] = None
+
+    @property
+    def too_many_colors(self) -> bool:
+        return self.max_colors > 0 and self.color_count is None
+
+
 class PngReader:
     def __init__(self):
         self._file_name: str = ""
-        self.width_max: Final[int] = 500
-        self.height_max: Final[int] = 500
+        self._width_max: int = 500
+        self._height_max: int = 500
+        self._max_colors: int = 0
+        self._run_length_encoded: bool = False
 
     @property
     def file_name(self) -> str:
@@ -28,26 +48,188 @@ class PngReader:
             raise ValueError("Empty file name")
         self._file_name = name
 
-    def read(self) -> ColorMatrix:
+    @property
+    def width_max(self) -> int:
+        return self._width_max
+
+    @width_max.setter
+    def width_max(self, width: int) -> None:
+        if width <= 0:
+            raise ValueError(f"Invalid maximum width {width}, must be > 0")
+        self._width_max = width
+
+    @property
+    def height_max(self) -> int:
+        return self._height_max
+
+    @height_max.setter
+    def height_max(self, height: int) -> None:
+        if height <= 0:
+            raise ValueError(f"Invalid maximum height {height}, must be > 0")
+        self._height_max = height
+
+    @property
+    def max_colors(self) -> int:
+        """Maximum number of colors, 0 disables the color probe."""
+        return self._max_colors
+
+    @max_colors.setter
+    def max_colors(self, count: int) -> None:
+        if count < 0:
+            raise ValueError(f"Invalid maximum number of colors {count}, must be >= 0")
+        self._max_colors = count
+
+    @property
+    def run_length_encoded(self) -> bool:
+        """Read into a RleColorMatrix, rows stored as runs of equal color."""
+        return self._run_length_encoded
+
+    @run_length_encoded.setter
+    def run_length_encoded(self, flag: bool) -> None:
+        self._run_length_encoded = flag
+
+    def _open(self) -> Image.Image:
         path: Path = Path(self._file_name)
         if not path.exists():
             raise FileNotFoundError(self._file_name)
         if path.suffix.lower() != ".png":
             raise FileExtensionError(self.file_name, path.suffix, "[.png, .PNG]")
 
-        img = Image.open(self.file_name).convert("RGBA")
+        # lazy, only the header is read until pixel data is accessed
+        return Image.open(self.file_name)
+
+    def _inspect(self, img: Image.Image) -> PngInfo:
         width, height = img.size
-        if width > self.width_max:
+        info: PngInfo = PngInfo(
+            width=width,
+            height=height,
+            mode=img.mode,
+            palette_size=(
+                len(img.palette.palette) // len(img.palette.mode)
+                if img.mode == "P" and img.palette is not None
+                else 0
+            ),
+        )
+        # color probe only for images within the size limits
+        if self._max_colors > 0 and not self._is_too_large(info):
+            info.max_colors = self._max_colors
+            info.color_count = PngReader._probe_color_count(img, self._max_colors)
+        return info
+
+    def _is_too_large(self, info: PngInfo) -> bool:
+        return info.width > self._width_max or info.height > self._height_max
+
+    def _check_limits(self, info: PngInfo) -> None:
+        if info.width > self._width_max:
             raise ValueError(
-                f"Image is too wide: current {width}, maximum {self.width_max}"
+                f"Image is too wide: current {info.width}, maximum {self._width_max}"
             )
-        if height > self.height_max:
+        if info.height > self._height_max:
             raise ValueError(
-                f"Image is too high: current {height}, maximum {self.height_max}"
+                f"Image is too high: current {info.height}, maximum {self._height_max}"
             )
+        if info.too_many_colors:
+            raise ValueError(
+                f"Image has too many colors: more than {info.max_colors}"
+            )
+
+    def inspect(self) -> PngInfo:
+        """Read size, mode and palette size from the header, probe colors if max_colors > 0."""
+        with self._open() as img:
+            return self._inspect(img)
+
+    def validate(self) -> PngInfo:
+        """Inspect and raise ValueError if the PNG exceeds size or color limits."""
+        info: PngInfo = self.inspect()
+        self._check_limits(info)
+        return info
+
+    def read(self) -> ColorMatrix:
+        with self._open() as img:
+            self._check_limits(self._inspect(img))
+
+            color_matrix: ColorMatrix
+            if PngReader._is_rgb_palette_image(img):
+                color_matrix = PngReader._read_palette_image(img)
+            else:
+                # (height, width, 4) uint8 straight from the Pillow buffer, no per-pixel objects
+                pixels: np.ndarray = np.asarray(img.convert("RGBA"), dtype=np.uint8)
+                color_matrix = ColorMatrix(pixels)
+
+        if self._run_length_encoded:
+            # the dense matrix is dropped, only the runs are kept
+            return RleColorMatrix.from_color_matrix(color_matrix)
+        return color_matrix
+
+    def read_bands(self, band_height: int) -> Iterator[ColorMatrix]:
+        """
+        Read an indexed PNG as consecutive bands of band_height rows.
+        Pillow decodes the whole image at once, one byte per pixel for indexed images,
+        only the conversion to colors is done one band at a time. Truecolor images
+        would be decoded to 3 or 4 bytes per pixel and are rejected.
+        """
+        if band_height <= 0:
+            raise ValueError(f"Invalid band height {band_height}, must be > 0")
+
+        with self._open() as img:
+            self._check_limits(self._inspect(img))
+            if not PngReader._is_rgb_palette_image(img):
+                raise ValueError(
+                    f'Reading in bands requires an indexed PNG, mode is "{img.mode}"'
+                )
+
+            rgba_palette: np.ndarray = PngReader._rgba_palette(img)
+            width, height = img.size
+            for top in range(0, height, band_height):
+                band = img.crop((0, top, width, min(top + band_height, height)))
+                yield ColorMatrix.from_palette(
+                    rgba_palette, np.asarray(band, dtype=np.uint8)
+                )
+
+    @staticmethod
+    def _is_rgb_palette_image(img: Image.Image) -> bool:
+        return (
+            img.mode == "P"
+            and img.palette is not None
+            and img.palette.mode == "RGB"
+        )
+
+    @staticmethod
+    def _rgba_palette(img: Image.Image) -> np.ndarray:
+        """(256, 4) RGBA palette of an indexed image including tRNS transparency."""
+        # full 256 entries, Pillow treats missing entries as opaque black
+        palette: np.ndarray = np.zeros((256, 4), dtype=np.uint8)
+        palette[:, 3] = 255
+        rgb: np.ndarray = np.array(img.getpalette(), dtype=np.uint8).reshape(-1, 3)[:256]
+        palette[: rgb.shape[0], :3] = rgb
+
+        # tRNS chunk: single transparent index or alpha per palette entry
+        transparency = img.info.get("transparency")
+        if isinstance(transparency, int):
+            palette[transparency, 3] = 0
+        elif isinstance(transparency, bytes):
+            alpha: np.ndarray = np.frombuffer(transparency, dtype=np.uint8)[:256]
+            palette[: alpha.size, 3] = alpha
+        return palette
+
+    @staticmethod
+    def _probe_color_count(img: Image.Image, max_colors: int) -> Optional[int]:
+        """Number of colors, None if there are more than max_colors."""
+        if PngReader._is_rgb_palette_image(img):
+            keys: np.ndarray = PngReader._rgba_palette(img).view(">u4")[:, 0]
+            used = img.getcolors(256)
+            if used is None:
+                # more than 256 colors
+                return None
+            indices: np.ndarray = np.array([index for _, index in used], dtype=np.intp)
+            color_count: int = np.unique(keys[indices]).size
+            return color_count if color_count <= max_colors else None
+
+        colors = img.convert("RGBA").getcolors(max_colors)
+        return len(colors) if colors is not None else None
 
-        pixels = img.load()
-        pixel_matrix: List[List[Color]] = [
-            [Color(*pixels[x, y]) for x in range(0, width)] for y in range(0, height)
-        ]
-        return ColorMatrix(pixel_matrix)
+    @staticmethod
+    def _read_palette_image(img: Image.Image) -> ColorMatrix:
+        """Indexed PNG: use palette and index buffer directly, no RGBA expansion."""
+        indices: np.ndarray = np.asarray(img, dtype=np.uint8)
+        return ColorMatrix.from_palette(PngReader._rgba_palette(img), indices)
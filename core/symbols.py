@@ -1,7 +1,8 @@
 """Generate symbols for a specific color."""
-from typing import Tuple, List, Set, Protocol, Dict, runtime_checkable
-from copy import deepcopy
-from core.color import Color, ColorMatrix
+from typing import Tuple, List, Set, Protocol, Dict, Iterator, Optional, runtime_checkable
+from copy import copy
+from core.color import Color, ColorMatrix, ColorPalette
+import numpy as np  # type: ignore
 
 
 @runtime_checkable
@@ -281,32 +282,45 @@ class SkinnySymbolProvider:
 
 
 class SymbolMatrix:
+    """Symbols of a color matrix as palette of (color, symbol) and per pixel palette indexes."""
+
     def __init__(
         self, color_matrix: ColorMatrix, symbol_provider: PSymbolProvider
     ) -> None:
 
         if color_matrix.is_empty:
             raise ValueError("Empty list of pixels")
-        if color_matrix.color_count > symbol_provider.max_number:
+        if color_matrix.has_more_colors_than(symbol_provider.max_number):
             raise ValueError(
-                f"Invalid number of colors {color_matrix.color_count}, "
-                "allowed max is {symbol_provider.max_number}"
+                "Invalid number of colors, "
+                f"more than the allowed max of {symbol_provider.max_number}"
             )
 
         self._color_matrix: ColorMatrix = color_matrix
 
-        # dict does not work, because of hash => use tuple(color, symbol)
-        color_to_symbol: List[Tuple[Color, str]] = [
+        # palette index of the color matrix is the index of the symbol
+        self._palette: List[Tuple[Color, str]] = [
             (col, symbol_provider.get()) for col in self._color_matrix.distinct_colors
         ]
-        self._matrix: List[List[str]] = [
-            [
-                [cts for cts in color_to_symbol if cts[0].is_equal(col)][0][1]
-                for col in pixel_row
-            ]
-            for pixel_row in self._color_matrix.matrix
-        ]
-        self._legend: Dict[str, Color] = {cts[1]: cts[0] for cts in color_to_symbol}
+        # None: same as the palette indexes of the color matrix, not expanded until used
+        self._indices: Optional[np.ndarray] = None
+
+    @staticmethod
+    def from_palette(
+        color_matrix: ColorMatrix, palette: ColorPalette, symbols: List[str]
+    ) -> "SymbolMatrix":
+        """Symbols of a band of a larger image, palette and symbols are shared by all bands."""
+        if len(symbols) != palette.color_count:
+            raise ValueError(
+                f"Number of symbols {len(symbols)} differs from number of colors "
+                f"{palette.color_count}"
+            )
+        symbol_matrix: SymbolMatrix = SymbolMatrix.__new__(SymbolMatrix)
+        symbol_matrix._color_matrix = color_matrix
+        symbol_matrix._palette = list(zip(palette.colors, symbols))
+        symbol_matrix._indices = palette.indices(color_matrix.keys)
+        symbol_matrix._indices.flags.writeable = False
+        return symbol_matrix
 
     @property
     def color_matrix(self) -> ColorMatrix:
@@ -314,16 +328,74 @@ class SymbolMatrix:
 
     @property
     def width(self) -> int:
-        return len(self._matrix[0])
+        return self._color_matrix.width
 
     @property
     def height(self) -> int:
-        return len(self._matrix)
+        return self._color_matrix.height
+
+    @property
+    def palette(self) -> List[Tuple[Color, str]]:
+        return list(self._palette)
+
+    @property
+    def palette_indices(self) -> np.ndarray:
+        """Read-only (height, width) array of indexes into palette."""
+        if self._indices is None:
+            return self._color_matrix.palette_indices
+        return self._indices
 
     @property
     def matrix(self) -> List[List[str]]:
-        return self._matrix
+        symbols: np.ndarray = np.array([cts[1] for cts in self._palette], dtype=object)
+        return symbols[self.palette_indices].tolist()
+
+    def rows(self) -> Iterator[List[str]]:
+        """Iterate symbol rows."""
+        for runs in self.row_runs():
+            symbol_row: List[str] = []
+            for symbol, length in runs:
+                symbol_row += [symbol] * length
+            yield symbol_row
+
+    def index_row_runs(self) -> Iterator[List[Tuple[int, int]]]:
+        """Iterate rows as runs of (palette_index, run_length), the runs of the color matrix."""
+        if self._indices is None:
+            return self._color_matrix.row_runs()
+        return (ColorMatrix.index_runs(row) for row in self._indices)
+
+    def row_runs(self) -> Iterator[List[Tuple[str, int]]]:
+        """Iterate rows as runs of (symbol, run_length)."""
+        symbols: List[str] = [cts[1] for cts in self._palette]
+        for runs in self.index_row_runs():
+            yield [(symbols[idx], length) for idx, length in runs]
+
+    def copy(self) -> "SymbolMatrix":
+        """Independent copy, including the color matrix."""
+        symbol_matrix: SymbolMatrix = copy(self)
+        symbol_matrix._color_matrix = self._color_matrix.copy()
+        if self._indices is not None:
+            symbol_matrix._indices = self._indices.copy()
+            symbol_matrix._indices.flags.writeable = False
+        symbol_matrix._palette = list(self._palette)
+        return symbol_matrix
+
+    def crop(self, top: int, left: int, bottom: int, right: int) -> "SymbolMatrix":
+        """Rectangle [top, bottom) x [left, right), keeps the symbols of all colors."""
+        symbol_matrix: SymbolMatrix = copy(self)
+        symbol_matrix._color_matrix = self._color_matrix.crop(top, left, bottom, right)
+        symbol_matrix._indices = self.palette_indices[top:bottom, left:right]
+        return symbol_matrix
 
     @property
     def legend(self) -> Dict[str, Color]:
-        return self._legend
+        return {cts[1]: cts[0] for cts in self._palette}
+
+    def stitch_counts(self) -> Dict[str, int]:
+        """Number of stitches per symbol."""
+        counts: List[int] = (
+            self._color_matrix.color_counts()
+            if self._indices is None
+            else np.bincount(self._indices.reshape(-1), minlength=len(self._palette)).tolist()
+        )
+        return {cts[1]: count for cts, count in zip(self._palette, counts)}
@@ -1,16 +1,19 @@
+from typing import List, Tuple
 from unittest import TestCase
 from core.symbols import SymbolMatrix, CharProvider
-from core.image import PngReader
-from core.color import Color, ColorMatrix
+from core.image import PngReader, PngInfo
+from core.color import Color, ColorMatrix, RleColorMatrix
 from pathlib import Path
+from PIL import Image  # type: ignore
+import numpy as np  # type: ignore
 
 
 class TestColor(TestCase):
 
     def test_color_properties(self) -> None:
         """
-        Test properties and setter for RGB color.
-        Create color object, set properties and evaluate.
+        Test properties of RGBA color.
+        Create color objects, evaluate properties and immutability.
         """
         print(TestColor.test_color_properties.__doc__)
 
@@ -21,40 +24,197 @@ class TestColor(TestCase):
         self.assertEqual(201, color.blue)
         self.assertEqual(10, color.alpha)
 
-        color.green = 231
-        print(color)
-        self.assertEqual(123, color.red)
-        self.assertEqual(231, color.green)
-        self.assertEqual(201, color.blue)
-        self.assertEqual(10, color.alpha)
-
-        color.red = 4
-        print(color)
-        self.assertEqual(4, color.red)
-        self.assertEqual(231, color.green)
-        self.assertEqual(201, color.blue)
-        self.assertEqual(10, color.alpha)
-
-        color.blue = 94
-        print(color)
-        self.assertEqual(4, color.red)
-        self.assertEqual(231, color.green)
-        self.assertEqual(94, color.blue)
-        self.assertEqual(10, color.alpha)
-
-        color.alpha = 255
+        color = Color(4, 231, 94, 255)
         print(color)
         self.assertEqual(4, color.red)
         self.assertEqual(231, color.green)
         self.assertEqual(94, color.blue)
         self.assertEqual(255, color.alpha)
+        self.assertFalse(color.is_transparent, 'transparent')
+
+        print('immutable')
+        with self.assertRaises(AttributeError):
+            color.green = 231  # type: ignore
+
+        print('invalid channel value')
+        with self.assertRaises(ValueError):
+            Color(256, 0, 0, 0)
+        with self.assertRaises(ValueError):
+            Color(0, 0, -1, 0)
 
         print('alpha=0 -> transparent')
-        color.alpha = 0
+        color = Color(4, 231, 94, 0)
         self.assertTrue(color.is_transparent, 'not transparent')
 
         print('> OK')
 
+    def test_color_key_and_hash(self) -> None:
+        """
+        Test packed RGBA key, equality and hashing of colors.
+        """
+        print(TestColor.test_color_key_and_hash.__doc__)
+
+        color: Color = Color(0x12, 0x34, 0x56, 0x78)
+        self.assertEqual(0x12345678, color.key)
+        self.assertTrue(color.is_equal(Color.from_key(0x12345678)), 'key round trip failed')
+
+        print('equal colors are equal and hash alike')
+        self.assertEqual(Color(1, 2, 3, 4), Color(1, 2, 3, 4))
+        self.assertNotEqual(Color(1, 2, 3, 4), Color(1, 2, 3, 5))
+        self.assertEqual(2, len({Color(1, 2, 3, 4), Color(1, 2, 3, 4), Color(4, 3, 2, 1)}))
+
+        print('> OK')
+
+    def test_color_from_rgba_bytes(self) -> None:
+        """
+        Test bulk creation of colors from RGBA bytes, identical colors share one instance.
+        """
+        print(TestColor.test_color_from_rgba_bytes.__doc__)
+
+        colors = Color.from_rgba_bytes(bytes([1, 2, 3, 4, 255, 0, 0, 255, 1, 2, 3, 4]))
+        self.assertEqual(3, len(colors))
+        self.assertEqual(Color(1, 2, 3, 4), colors[0])
+        self.assertEqual(Color(255, 0, 0, 255), colors[1])
+        self.assertIs(colors[0], colors[2], 'identical colors not interned')
+
+        with self.assertRaises(ValueError):
+            Color.from_rgba_bytes(bytes([1, 2, 3]))
+
+        print('> OK')
+
+
+class TestColorMatrix(TestCase):
+
+    def test_color_matrix_from_colors(self) -> None:
+        """
+        Create ColorMatrix from rows of Color, test size, pixel array and distinct colors.
+        """
+        print(TestColorMatrix.test_color_matrix_from_colors.__doc__)
+
+        red: Color = Color(255, 0, 0, 255)
+        blue: Color = Color(0, 0, 255, 255)
+        clear: Color = Color(0, 0, 0, 0)
+        color_matrix: ColorMatrix = ColorMatrix.from_colors([
+            [clear, red, red],
+            [blue, red, clear],
+        ])
+
+        self.assertEqual(3, color_matrix.width, 'width not 3')
+        self.assertEqual(2, color_matrix.height, 'height not 2')
+        self.assertEqual((2, 3, 4), color_matrix.pixels.shape, 'invalid pixel array shape')
+
+        print('distinct colors in order of first occurrence')
+        self.assertEqual(3, color_matrix.color_count, 'number of unique colors not 3')
+        for expected, color in zip([clear, red, blue], color_matrix.distinct_colors):
+            self.assertTrue(expected.is_equal(color), 'unexpected order of distinct colors')
+
+        print('palette indexes')
+        self.assertEqual([[0, 1, 1], [2, 1, 0]], color_matrix.palette_indices.tolist())
+        self.assertEqual(1, color_matrix.palette_indices.itemsize, 'palette index not 1 byte')
+
+        print('bounded color count, before and after computing the palette')
+        fresh_matrix: ColorMatrix = ColorMatrix(color_matrix.pixels)
+        self.assertTrue(fresh_matrix.has_more_colors_than(2))
+        self.assertFalse(fresh_matrix.has_more_colors_than(3))
+        self.assertTrue(color_matrix.has_more_colors_than(2))
+        self.assertFalse(color_matrix.has_more_colors_than(3))
+
+        print('read-only buffers, independent copy')
+        with self.assertRaises(ValueError):
+            color_matrix.pixels[0, 0, 0] = 1
+        with self.assertRaises(ValueError):
+            color_matrix.palette_indices[0, 0] = 1
+        color_copy: ColorMatrix = color_matrix.copy()
+        self.assertFalse(color_copy.pixels is color_matrix.pixels, 'copy shares pixels')
+        self.assertEqual(color_matrix.pixels.tolist(), color_copy.pixels.tolist())
+
+        print('crop, palette of the used colors only')
+        cropped: ColorMatrix = color_matrix.crop(0, 1, 2, 3)
+        self.assertEqual([[0, 0], [0, 1]], cropped.palette_indices.tolist())
+        self.assertEqual([red, clear], cropped.distinct_colors)
+        with self.assertRaises(ValueError):
+            color_matrix.crop(0, 2, 2, 2)
+
+        print('invalid input')
+        with self.assertRaises(ValueError):
+            ColorMatrix.from_colors([])
+        with self.assertRaises(ValueError):
+            ColorMatrix.from_colors([[red, red], [red]])
+
+        print('> OK')
+
+
+class TestRowRuns(TestCase):
+
+    def test_row_runs(self) -> None:
+        """
+        Rows of runs from PNG, expanded runs equal the palette indexes.
+        """
+        print(TestRowRuns.test_row_runs.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+        color_matrix: ColorMatrix = reader.read()
+
+        runs: List[List[Tuple[int, int]]] = list(color_matrix.row_runs())
+        print(f'number of runs: {sum(len(row) for row in runs)}')
+        self.assertEqual(117, len(runs))
+        expanded: List[List[int]] = [
+            [idx for idx, length in row for _ in range(length)] for row in runs
+        ]
+        self.assertEqual(color_matrix.palette_indices.tolist(), expanded,
+                         'palette indexes differ')
+        self.assertEqual(70 * 117, sum(color_matrix.color_counts()))
+        self.assertEqual(color_matrix.color_count, len(color_matrix.color_counts()))
+
+        print('> OK')
+
+
+class TestRleColorMatrix(TestCase):
+
+    def test_rle_color_matrix(self) -> None:
+        """
+        Read run-length encoded matrix from PNG, compare to the array based matrix.
+        """
+        print(TestRleColorMatrix.test_rle_color_matrix.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+        color_matrix: ColorMatrix = reader.read()
+        reader.run_length_encoded = True
+        rle_matrix: ColorMatrix = reader.read()
+        assert isinstance(rle_matrix, RleColorMatrix)
+
+        print(f'number of runs: {rle_matrix.run_count}')
+        self.assertTrue(rle_matrix.run_count < color_matrix.width * color_matrix.height)
+        self.assertEqual((70, 117), (rle_matrix.width, rle_matrix.height), 'size not 70 x 117')
+        self.assertEqual(color_matrix.distinct_colors, rle_matrix.distinct_colors)
+        self.assertEqual(list(color_matrix.row_runs()), list(rle_matrix.row_runs()))
+        self.assertEqual(color_matrix.color_counts(), rle_matrix.color_counts())
+        self.assertIsNone(rle_matrix._indices, 'expanded without request')
+
+        self.assertEqual(color_matrix.matrix, rle_matrix.matrix, 'rows differ')
+        self.assertEqual(color_matrix.palette_indices.tolist(),
+                         rle_matrix.palette_indices.tolist(), 'palette indexes differ')
+        self.assertIs(rle_matrix.palette_indices, rle_matrix.palette_indices,
+                      'expanded again')
+        self.assertEqual(color_matrix.pixels.tolist(), rle_matrix.pixels.tolist())
+        self.assertEqual(list(rle_matrix.row_runs()), list(rle_matrix.copy().row_runs()))
+
+        print('invalid runs')
+        red: Color = Color(255, 0, 0, 255)
+        self.assertEqual([[(0, 2)]], list(RleColorMatrix([[(0, 2)]], [red]).row_runs()))
+        with self.assertRaises(ValueError):
+            RleColorMatrix([[(0, 2)], [(0, 1)]], [red])
+        with self.assertRaises(ValueError):
+            RleColorMatrix([[(1, 2)]], [red])
+
+        print('> OK')
+
 
 class TestReadPNG(TestCase):
 
@@ -84,6 +244,71 @@ class TestReadPNG(TestCase):
 
         print('> OK')
 
+    def test_read_palette_png(self) -> None:
+        """
+        Read indexed PNG over the palette fast path, compare to RGBA conversion.
+        """
+        print(TestReadPNG.test_read_palette_png.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+        color_matrix: ColorMatrix = reader.read()
+
+        rgba_matrix: ColorMatrix = ColorMatrix(
+            np.asarray(Image.open(str(path)).convert('RGBA'))
+        )
+        self.assertEqual(rgba_matrix.distinct_colors, color_matrix.distinct_colors,
+                         'distinct colors differ')
+        self.assertEqual(rgba_matrix.palette_indices.tolist(),
+                         color_matrix.palette_indices.tolist(), 'palette indexes differ')
+        self.assertEqual(rgba_matrix.pixels.tolist(), color_matrix.pixels.tolist(),
+                         'pixels differ')
+
+        print('> OK')
+
+
+class TestInspectPNG(TestCase):
+
+    def test_inspect_and_limits(self) -> None:
+        """
+        Inspect PNG header, probe colors and reject PNG exceeding limits.
+        """
+        print(TestInspectPNG.test_inspect_and_limits.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+
+        info: PngInfo = reader.inspect()
+        self.assertEqual((70, 117), (info.width, info.height), 'size not 70 x 117')
+        self.assertEqual('P', info.mode, 'mode not P')
+        self.assertIsNone(info.color_count, 'colors probed without max_colors')
+
+        print('color probe')
+        reader.max_colors = 16
+        self.assertEqual(16, reader.inspect().color_count, 'number of colors not 16')
+        reader.max_colors = 15
+        self.assertTrue(reader.inspect().too_many_colors, 'too many colors not detected')
+        with self.assertRaises(ValueError):
+            reader.read()
+
+        print('size limits')
+        reader.max_colors = 0
+        reader.width_max = 69
+        with self.assertRaises(ValueError):
+            reader.validate()
+        reader.width_max = 70
+        reader.height_max = 116
+        with self.assertRaises(ValueError):
+            reader.read()
+        with self.assertRaises(ValueError):
+            reader.height_max = 0
+
+        print('> OK')
+
 
 class TestSymbolMaker(TestCase):
 
@@ -105,5 +330,12 @@ class TestSymbolMaker(TestCase):
         print(f'width x height = 70 x 117')
         self.assertEqual(70, symbol_matrix.width, 'width not 70')
         self.assertEqual(117, symbol_matrix.height, 'height not 117')
-        
+
+        print('symbols match legend colors')
+        legend = symbol_matrix.legend
+        self.assertEqual(16, len(legend), 'number of legend entries not 16')
+        for color_row, symbol_row in zip(color_matrix.matrix, symbol_matrix.matrix):
+            for color, symbol in zip(color_row, symbol_row):
+                self.assertTrue(legend[symbol].is_equal(color), 'symbol of invalid color')
+
         print('> OK')
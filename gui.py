@@ -1,7 +1,7 @@
 from typing import Any, Optional
 from tkinter import ttk
 from tkinter import filedialog, messagebox, Tk, N, E, S, W, NORMAL
-from tkinter import StringVar, BooleanVar
+from tkinter import StringVar, BooleanVar, IntVar
 from tkinter import PhotoImage
 from pathlib import Path
 from tki_gui.elements import PictureFrame, GeneratePatternFrame, MainMenu
@@ -28,6 +28,8 @@ class GUI:
         self._symbol_provider: Optional[Variable] = None
         self._center_color: Optional[StringVar] = None
         self._status_text: StringVar = None
+        self._max_width: Optional[IntVar] = None
+        self._max_height: Optional[IntVar] = None
 
         self._build()
         self._init_data()
@@ -43,6 +45,8 @@ class GUI:
         self._symbol_provider = Variable()
         self._center_color = StringVar(value="cyan")
         self._status_text = StringVar(value="")
+        self._max_width = IntVar(value=500)
+        self._max_height = IntVar(value=500)
 
     def _build(self) -> None:
         self._root = Tk()
@@ -79,6 +83,8 @@ class GUI:
         assert self._symbol_provider is not None
         assert self._center_color is not None
         assert self._status_text is not None
+        assert self._max_width is not None
+        assert self._max_height is not None
         assert self._gen_pattern_tab is not None
         assert self._picture_tab is not None
 
@@ -88,6 +94,8 @@ class GUI:
         self._gen_pattern_tab.overwrite_checkbutton["variable"] = self._overwrite_files
         self._gen_pattern_tab.center_color_combobox["textvariable"] = self._center_color
         self._gen_pattern_tab.status_label["textvariable"] = self._status_text
+        self._picture_tab.max_width_spinbox["textvariable"] = self._max_width
+        self._picture_tab.max_height_spinbox["textvariable"] = self._max_height
 
         clear_status_text: ClearVar = ClearVar(self._status_text)
         self._center_color.trace_add("write", clear_status_text.clear)
@@ -98,11 +106,13 @@ class GUI:
         load_png: LoadPngCtrl = LoadPngCtrl(
             self._png_file_name, self._picture_tab.image_canvas
         )
+        load_png.set_size_limits(self._max_width, self._max_height)
         self._picture_tab.open_png_button["command"] = load_png.open_png
 
         load_color_matrix: LoadColorMatrix = LoadColorMatrix(
             self._png_file_name, self._color_matrix_variable
         )
+        load_color_matrix.set_size_limits(self._max_width, self._max_height)
         self._png_file_name.trace("w", load_color_matrix.load)
 
         toggle_generate_button: ToggleWidgetState = ToggleWidgetState(
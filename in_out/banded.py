@@ -0,0 +1,156 @@
+"""Generation of pattern files band by band, for patterns too large to hold in memory."""
+from typing import Dict, List
+from pathlib import Path
+from core.color import ColorPalette
+from core.image import PngReader
+from core.symbols import PSymbolProvider, SymbolMatrix
+from in_out.html import HTML, MatrixHtmlTable, MatrixTableCSS
+from in_out.html import LegendHtmlTable, LegendCSS
+
+
+class BandedPatternWriter:
+    """
+    Write color plot, stitch pattern and legend reading the PNG in bands of rows.
+    Pass one collects the palette, pass two renders and writes one band at a time.
+    """
+
+    def __init__(
+        self,
+        png_reader: PngReader,
+        symbol_provider: PSymbolProvider,
+        band_height: int = 64,
+    ) -> None:
+        if band_height <= 0:
+            raise ValueError(f"Invalid band height {band_height}, must be > 0")
+
+        self._png_reader: PngReader = png_reader
+        self._symbol_provider: PSymbolProvider = symbol_provider
+        self._band_height: int = band_height
+        self._mark_center_cell: bool = True
+        self._mark_center_cell_color: str = "limegreen"
+        self._merge_runs: bool = False
+        self._chunk_rows: int = 0
+
+    @property
+    def band_height(self) -> int:
+        return self._band_height
+
+    @property
+    def mark_center_cell(self) -> bool:
+        return self._mark_center_cell
+
+    @mark_center_cell.setter
+    def mark_center_cell(self, flag: bool) -> None:
+        self._mark_center_cell = flag
+
+    @property
+    def mark_center_cell_color(self) -> str:
+        return self._mark_center_cell_color
+
+    @mark_center_cell_color.setter
+    def mark_center_cell_color(self, color: str) -> None:
+        if len(color) == 0:
+            raise ValueError("Empty color name")
+        self._mark_center_cell_color = color
+
+    @property
+    def merge_runs(self) -> bool:
+        """Merge runs of one color in the color plot, see MatrixHtmlTable.merge_runs."""
+        return self._merge_runs
+
+    @merge_runs.setter
+    def merge_runs(self, flag: bool) -> None:
+        self._merge_runs = flag
+
+    @property
+    def chunk_rows(self) -> int:
+        """Rows per chunk of both tables, see MatrixHtmlTable.chunk_rows."""
+        return self._chunk_rows
+
+    @chunk_rows.setter
+    def chunk_rows(self, rows: int) -> None:
+        if rows < 0:
+            raise ValueError(f"Invalid number of rows per chunk {rows}, must be >= 0")
+        self._chunk_rows = rows
+
+    def _collect_palette(self) -> ColorPalette:
+        palette: ColorPalette = ColorPalette()
+        for band in self._png_reader.read_bands(self._band_height):
+            palette.add(band.keys)
+            if palette.color_count > self._symbol_provider.max_number:
+                raise ValueError(
+                    "Invalid number of colors, "
+                    f"more than the allowed max of {self._symbol_provider.max_number}"
+                )
+        return palette
+
+    def write(self, color_plot: Path, stitch_pattern: Path, legend: Path) -> None:
+        palette: ColorPalette = self._collect_palette()
+        symbols: List[str] = [self._symbol_provider.get() for _ in palette.colors]
+        total_height: int = self._png_reader.inspect().height
+
+        color_css: MatrixTableCSS = MatrixTableCSS()
+        color_css.colors = palette.colors
+        stitch_css: MatrixTableCSS = MatrixTableCSS()
+        for css in (color_css, stitch_css):
+            css.chunked_layout = self._chunk_rows > 0
+        with open(str(color_plot), "w") as color_file, open(
+            str(stitch_pattern), "w"
+        ) as stitch_file:
+            first_row: int = 0
+            stitch_counts: Dict[str, int] = dict.fromkeys(symbols, 0)
+            for band in self._png_reader.read_bands(self._band_height):
+                symbol_matrix: SymbolMatrix = SymbolMatrix.from_palette(
+                    band, palette, symbols
+                )
+                for symbol, count in symbol_matrix.stitch_counts().items():
+                    stitch_counts[symbol] += count
+                color_html: MatrixHtmlTable = MatrixHtmlTable(band)
+                color_html.merge_runs = self._merge_runs
+                color_html.class_colors = palette.colors
+                color_html.chunk_rows = self._chunk_rows
+                stitch_html: MatrixHtmlTable = MatrixHtmlTable(band, symbol_matrix)
+                stitch_html.show_background_color = False
+                stitch_html.mark_center_cell = self._mark_center_cell
+                stitch_html.mark_center_cell_color = self._mark_center_cell_color
+                stitch_html.chunk_rows = self._chunk_rows
+
+                if first_row == 0:
+                    # table open depends on the width only, same for all bands
+                    for html_file, css, html_table in (
+                        (color_file, color_css, color_html),
+                        (stitch_file, stitch_css, stitch_html),
+                    ):
+                        html_file.write(
+                            "\n".join(
+                                [
+                                    HTML.make_html_open(css.make_html_style_tag()),
+                                    html_table.make_html_table_open(0, total_height),
+                                ]
+                            )
+                        )
+
+                color_file.writelines(color_html.iter_html_body(first_row, total_height))
+                stitch_file.writelines(
+                    stitch_html.iter_html_body(first_row, total_height)
+                )
+                first_row += band.height
+
+            # table close depends on the chunk_rows only, same for all bands
+            for html_file, html_table in (
+                (color_file, color_html),
+                (stitch_file, stitch_html),
+            ):
+                html_file.write(
+                    "\n"
+                    + "\n".join(
+                        [html_table.make_html_table_close(), HTML.make_html_close()]
+                    )
+                )
+
+        legend_html: LegendHtmlTable = LegendHtmlTable(dict(zip(symbols, palette.colors)))
+        legend_html.stitch_counts = stitch_counts
+        with open(str(legend), "w") as legend_file:
+            HTML.write_document(
+                legend_file, legend_html, LegendCSS().make_html_style_tag()
+            )
@@ -0,0 +1,121 @@
+"""Conversion of many PNG files, one process per file at a time."""
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from glob import glob
+from pathlib import Path
+
+
+# stems of written files, PNG output of earlier runs is no input
+OUTPUT_SUFFIXES: Tuple[str, ...] = ("_color_plot", "_stitch_pattern", "_legend")
+
+
+def find_png_files(entries: Iterable[str]) -> List[Path]:
+    """PNG files of directories (not recursive) and glob patterns, sorted per entry."""
+    png_files: List[Path] = []
+    for entry in entries:
+        paths: List[Path] = (
+            sorted(Path(entry).glob("*.png"))
+            if Path(entry).is_dir()
+            else sorted(Path(path) for path in glob(entry))
+        )
+        png_files += [
+            path
+            for path in paths
+            if path.is_file()
+            and path.suffix.lower() == ".png"
+            and not path.stem.endswith(OUTPUT_SUFFIXES)
+            and path not in png_files
+        ]
+    return png_files
+
+
+class BatchResult:
+    """Outcome of a batch, error messages by file in order of the files."""
+
+    def __init__(self, png_files: List[Path], errors: List[Tuple[Path, str]]) -> None:
+        self._png_files: List[Path] = png_files
+        self._errors: List[Tuple[Path, str]] = errors
+
+    @property
+    def png_files(self) -> List[Path]:
+        return list(self._png_files)
+
+    @property
+    def errors(self) -> List[Tuple[Path, str]]:
+        return list(self._errors)
+
+    @property
+    def converted(self) -> List[Path]:
+        failed: List[Path] = [path for path, _ in self._errors]
+        return [path for path in self._png_files if path not in failed]
+
+    def make_summary(self) -> str:
+        lines: List[str] = [
+            f"Converted {len(self.converted)} of {len(self._png_files)} PNG files"
+        ]
+        if len(self._errors) > 0:
+            lines += ["Failed:"]
+            lines += [f'  "{str(path)}": {message}' for path, message in self._errors]
+        return "\n".join(lines)
+
+
+def _run_one(
+    convert: Callable[[Path], Optional[List[Path]]], png_file: Path
+) -> Tuple[List[Path], Optional[str]]:
+    """Written files and None if converted, no files and the error message if failed."""
+    try:
+        outputs: Optional[List[Path]] = convert(png_file)
+    except FileExistsError as err:
+        return [], f'existing file "{err}"'
+    except Exception as err:
+        return [], f"{type(err).__name__}: {err}"
+    return (outputs if outputs is not None else []), None
+
+
+def run_batch(
+    convert: Callable[[Path], Optional[List[Path]]],
+    png_files: List[Path],
+    jobs: int = 1,
+    on_done: Optional[Callable[[Path, Optional[str], List[Path]], None]] = None,
+) -> BatchResult:
+    """
+    Convert each file by convert(png_file) on jobs processes, convert must be picklable
+    and may return the files it wrote.
+    Failed files are reported in the result, the other files are converted regardless.
+    on_done(png_file, error message or None, written files) is called in this process
+    as files complete, failed files have no written files.
+    """
+    if jobs <= 0:
+        raise ValueError(f"Invalid number of jobs {jobs}, must be > 0")
+
+    messages: Dict[Path, Optional[str]] = {}
+    outputs: List[Path]
+    if jobs == 1 or len(png_files) <= 1:
+        for png_file in png_files:
+            outputs, messages[png_file] = _run_one(convert, png_file)
+            if on_done is not None:
+                on_done(png_file, messages[png_file], outputs)
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(png_files))) as executor:
+            futures: Dict[Future, Path] = {
+                executor.submit(_run_one, convert, png_file): png_file
+                for png_file in png_files
+            }
+            for future in as_completed(futures):
+                png_file = futures[future]
+                try:
+                    outputs, messages[png_file] = future.result()
+                except Exception as err:
+                    # the worker process died, e.g. out of memory
+                    outputs, messages[png_file] = [], f"{type(err).__name__}: {err}"
+                if on_done is not None:
+                    on_done(png_file, messages[png_file], outputs)
+
+    return BatchResult(
+        png_files,
+        [
+            (png_file, message)
+            for png_file, message in ((path, messages[path]) for path in png_files)
+            if message is not None
+        ],
+    )
@@ -0,0 +1,174 @@
+"""Content-addressed cache of decoded images and output files, least recently used dropped first."""
+from typing import Any, Dict, List, Optional, Tuple
+from hashlib import sha256
+from pathlib import Path
+import json
+import os
+import shutil
+import time
+import numpy as np  # type: ignore
+from core.color import ColorMatrix
+
+
+MATRIX_FILE: str = "matrix.npz"
+# temporary directories of runs that died before the rename, in use ones are younger
+STALE_TEMP_SECONDS: int = 60 * 60
+
+
+class ArtifactCache:
+    """
+    One directory per key, written to a temporary directory and renamed, so concurrent
+    runs never see a partial entry. Entries are touched on use, the least recently used
+    are removed once the cache exceeds max_bytes. Temporary directories left by runs
+    that died are removed when the cache is opened and on eviction.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 512 * 2**20) -> None:
+        if max_bytes <= 0:
+            raise ValueError(f"Invalid cache size {max_bytes} bytes, must be > 0")
+        self._cache_dir: Path = cache_dir
+        self._max_bytes: int = max_bytes
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._remove_stale_temps()
+
+    @property
+    def cache_dir(self) -> Path:
+        return self._cache_dir
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @staticmethod
+    def make_key(digest: str, options: Dict[str, Any]) -> str:
+        """Key of content hash and options, options must be JSON serializable."""
+        return sha256(
+            json.dumps({"content": digest, "options": options}, sort_keys=True).encode()
+        ).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self._cache_dir / key
+
+    def _touch(self, entry: Path) -> None:
+        try:
+            os.utime(str(entry))
+        except OSError:
+            pass
+
+    def file_names(self, key: str) -> Optional[List[str]]:
+        """Names of the output files of the entry, None if not cached."""
+        entry: Path = self._entry(key)
+        try:
+            return sorted(path.name for path in entry.iterdir() if path.is_file())
+        except OSError:
+            return None
+
+    def restore(self, key: str, folder: Path) -> Optional[List[Path]]:
+        """Copy the output files of the entry to folder, None if not cached."""
+        entry: Path = self._entry(key)
+        names: Optional[List[str]] = self.file_names(key)
+        if names is None:
+            return None
+        restored: List[Path] = []
+        try:
+            for name in names:
+                shutil.copyfile(str(entry / name), str(folder / name))
+                restored += [folder / name]
+        except FileNotFoundError:
+            # removed by a concurrent run
+            return None
+        self._touch(entry)
+        return restored
+
+    def store(self, key: str, files: List[Path]) -> None:
+        """Copy files into the entry of key, names must be unique."""
+        temp: Path = self._cache_dir / f".{key}.{os.getpid()}.tmp"
+        shutil.rmtree(str(temp), ignore_errors=True)
+        temp.mkdir()
+        for path in files:
+            shutil.copyfile(str(path), str(temp / path.name))
+        self._commit(key, temp)
+
+    def load_matrix(self, key: str) -> Optional[ColorMatrix]:
+        entry: Path = self._entry(key)
+        try:
+            with np.load(str(entry / MATRIX_FILE), allow_pickle=False) as data:
+                color_matrix: ColorMatrix = ColorMatrix.from_palette(
+                    data["palette"], data["indices"]
+                )
+        except (OSError, KeyError, ValueError):
+            return None
+        self._touch(entry)
+        return color_matrix
+
+    def store_matrix(self, key: str, color_matrix: ColorMatrix) -> None:
+        """Palette and palette indexes, a fraction of the RGBA pixels."""
+        temp: Path = self._cache_dir / f".{key}.{os.getpid()}.tmp"
+        shutil.rmtree(str(temp), ignore_errors=True)
+        temp.mkdir()
+        palette: np.ndarray = np.array(
+            [[c.red, c.green, c.blue, c.alpha] for c in color_matrix.distinct_colors],
+            dtype=np.uint8,
+        ).reshape(-1, 4)
+        np.savez(
+            str(temp / MATRIX_FILE),
+            palette=palette,
+            indices=color_matrix.palette_indices,
+        )
+        self._commit(key, temp)
+
+    def _commit(self, key: str, temp: Path) -> None:
+        entry: Path = self._entry(key)
+        try:
+            temp.rename(entry)
+        except OSError:
+            # stored by a concurrent run in the meantime, same content
+            shutil.rmtree(str(temp), ignore_errors=True)
+        self._evict(keep=key)
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        """(last use, size in bytes, directory) of the entries."""
+        entries: List[Tuple[float, int, Path]] = []
+        for entry in self._cache_dir.iterdir():
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            try:
+                entries += [
+                    (
+                        entry.stat().st_mtime,
+                        sum(path.stat().st_size for path in entry.iterdir()),
+                        entry,
+                    )
+                ]
+            except OSError:
+                continue
+        return entries
+
+    @property
+    def size(self) -> int:
+        """Bytes of all entries."""
+        return sum(size for _, size, _ in self._entries())
+
+    def _remove_stale_temps(self) -> None:
+        """Remove temporary directories older than STALE_TEMP_SECONDS."""
+        oldest: float = time.time() - STALE_TEMP_SECONDS
+        for temp in self._cache_dir.glob(".*.tmp"):
+            try:
+                if temp.is_dir() and temp.stat().st_mtime < oldest:
+                    shutil.rmtree(str(temp), ignore_errors=True)
+            except OSError:
+                # removed by a concurrent run
+                continue
+
+    def _evict(self, keep: str) -> None:
+        """Remove least recently used entries down to max_bytes, except entry keep."""
+        self._remove_stale_temps()
+        entries: List[Tuple[float, int, Path]] = sorted(self._entries())
+        total: int = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self._max_bytes:
+                break
+            if entry.name == keep:
+                continue
+            shutil.rmtree(str(entry), ignore_errors=True)
+            total -= size
@@ -0,0 +1,310 @@
+"""Canvas viewer, HTML that paints the visible part of a pattern only."""
+from typing import Any, Dict, Final, Iterator, List, Optional, TextIO, Tuple
+from base64 import b64encode
+from html import unescape
+import json
+import numpy as np  # type: ignore
+from core.color import Color, ColorMatrix
+from core.symbols import SymbolMatrix
+from in_out.html import MatrixHtmlTable
+
+
+# repaints the viewport on scroll, resize and zoom (ctrl + wheel or buttons)
+VIEWER_SCRIPT: Final[str] = """(function () {
+  const p = pattern;
+  const raw = atob(p.indices);
+  const bytes = new Uint8Array(raw.length);
+  for (let i = 0; i < raw.length; i++) {
+    bytes[i] = raw.charCodeAt(i);
+  }
+  const indices = p.index_size === 4 ? new Uint32Array(bytes.buffer)
+    : p.index_size === 2 ? new Uint16Array(bytes.buffer) : bytes;
+  const fills = p.palette.map(c => `rgba(${c[0]}, ${c[1]}, ${c[2]}, ${c[3] / 255})`);
+  const viewer = document.getElementById("viewer");
+  const spacer = viewer.querySelector(".viewer-spacer");
+  const canvas = viewer.querySelector("canvas");
+  const ctx = canvas.getContext("2d");
+  let cell = p.cell_size;
+  let pending = false;
+
+  function isCenter(row, col) {
+    return p.center !== null
+      && (col === p.center[0][0] || col === p.center[0][1])
+      && (row === p.center[1][0] || row === p.center[1][1]);
+  }
+
+  function paint() {
+    pending = false;
+    const w = viewer.clientWidth;
+    const h = viewer.clientHeight;
+    if (canvas.width !== w || canvas.height !== h) {
+      canvas.width = w;
+      canvas.height = h;
+    }
+    const x0 = viewer.scrollLeft;
+    const y0 = viewer.scrollTop;
+    const c0 = Math.floor(x0 / cell);
+    const c1 = Math.min(p.width, Math.ceil((x0 + w) / cell));
+    const r0 = Math.floor(y0 / cell);
+    const r1 = Math.min(p.height, Math.ceil((y0 + h) / cell));
+    const drawSymbols = p.symbols !== null && cell >= 6;
+
+    ctx.fillStyle = "white";
+    ctx.fillRect(0, 0, w, h);
+    ctx.font = `bold ${cell - 1}px sans-serif`;
+    ctx.textAlign = "center";
+    ctx.textBaseline = "middle";
+    for (let row = r0; row < r1; row++) {
+      const y = row * cell - y0;
+      for (let col = c0; col < c1; col++) {
+        const x = col * cell - x0;
+        const idx = indices[row * p.width + col];
+        if (p.show_background) {
+          ctx.fillStyle = fills[idx];
+          ctx.fillRect(x, y, cell, cell);
+        }
+        if (drawSymbols && p.palette[idx][3] !== 0) {
+          if (isCenter(row, col)) {
+            ctx.fillStyle = p.center_color;
+            ctx.fillRect(x, y, cell, cell);
+          }
+          ctx.fillStyle = "black";
+          ctx.fillText(p.symbols[idx], x + cell / 2, y + cell / 2);
+        }
+      }
+    }
+    if (p.show_grid && cell >= 4) {
+      const right = c1 * cell - x0;
+      const bottom = r1 * cell - y0;
+      ctx.beginPath();
+      for (let col = c0; col <= c1; col++) {
+        ctx.moveTo(col * cell - x0 + 0.5, r0 * cell - y0);
+        ctx.lineTo(col * cell - x0 + 0.5, bottom);
+      }
+      for (let row = r0; row <= r1; row++) {
+        ctx.moveTo(c0 * cell - x0, row * cell - y0 + 0.5);
+        ctx.lineTo(right, row * cell - y0 + 0.5);
+      }
+      ctx.strokeStyle = "rgb(190,190,190)";
+      ctx.lineWidth = 1;
+      ctx.stroke();
+    }
+  }
+
+  function schedule() {
+    if (!pending) {
+      pending = true;
+      window.requestAnimationFrame(paint);
+    }
+  }
+
+  function layout() {
+    spacer.style.width = `${p.width * cell}px`;
+    spacer.style.height = `${p.height * cell}px`;
+  }
+
+  function zoom(step) {
+    const next = Math.max(2, Math.min(64, cell + step));
+    if (next === cell) {
+      return;
+    }
+    const cx = (viewer.scrollLeft + viewer.clientWidth / 2) / cell;
+    const cy = (viewer.scrollTop + viewer.clientHeight / 2) / cell;
+    cell = next;
+    layout();
+    viewer.scrollLeft = cx * cell - viewer.clientWidth / 2;
+    viewer.scrollTop = cy * cell - viewer.clientHeight / 2;
+    schedule();
+  }
+
+  viewer.addEventListener("scroll", schedule);
+  window.addEventListener("resize", schedule);
+  viewer.addEventListener("wheel", e => {
+    if (e.ctrlKey) {
+      e.preventDefault();
+      zoom(e.deltaY < 0 ? 2 : -2);
+    }
+  }, {passive: false});
+  document.querySelectorAll(".viewer-zoom button").forEach(button => {
+    button.addEventListener("click", () => zoom(Number(button.dataset.zoom)));
+  });
+  layout();
+  schedule();
+})();"""
+
+
+class MatrixCanvasViewer:
+    """
+    Color plot or stitch pattern painted on a canvas, for patterns too large for a table.
+    The HTML holds the palette and one palette index per cell (base64), a script paints
+    the cells of the viewport only.
+    """
+
+    def __init__(
+        self, color_matrix: ColorMatrix, symbol_matrix: Optional[SymbolMatrix] = None
+    ):
+        if color_matrix.is_empty:
+            raise ValueError("Empty color matrix")
+        if symbol_matrix is not None:
+            if symbol_matrix.width != color_matrix.width:
+                raise ValueError(
+                    "Differing width for symbol and color matrix: "
+                    f"{symbol_matrix.width} != {color_matrix.width}"
+                )
+            if symbol_matrix.height != color_matrix.height:
+                raise ValueError(
+                    "Differing height for symbol and color matrix: "
+                    f"{symbol_matrix.height} != {color_matrix.height}"
+                )
+
+        self._color_matrix: ColorMatrix = color_matrix
+        self._symbol_matrix: Optional[SymbolMatrix] = symbol_matrix
+        self._show_background_color: bool = True
+        self._mark_center_cell: bool = True
+        self._mark_center_cell_color: str = "limegreen"
+        self._cell_size: int = 12
+        self._show_grid: bool = True
+
+    @property
+    def show_background_color(self) -> bool:
+        return self._show_background_color
+
+    @show_background_color.setter
+    def show_background_color(self, flag: bool) -> None:
+        if self._symbol_matrix is None and not flag:
+            raise ValueError("Undefined symbol matrix, cannot disable background color")
+        self._show_background_color = flag
+
+    @property
+    def mark_center_cell(self) -> bool:
+        return self._mark_center_cell
+
+    @mark_center_cell.setter
+    def mark_center_cell(self, flag: bool) -> None:
+        self._mark_center_cell = flag
+
+    @property
+    def mark_center_cell_color(self) -> str:
+        return self._mark_center_cell_color
+
+    @mark_center_cell_color.setter
+    def mark_center_cell_color(self, color: str) -> None:
+        if len(color) == 0:
+            raise ValueError("Empty color name")
+        self._mark_center_cell_color = color
+
+    @property
+    def cell_size(self) -> int:
+        """Initial cell size in pixels, the viewer zooms from there."""
+        return self._cell_size
+
+    @cell_size.setter
+    def cell_size(self, size: int) -> None:
+        if size < 2 or size > 64:
+            raise ValueError(f"Invalid cell size {size}, must be in [2, 64]")
+        self._cell_size = size
+
+    @property
+    def show_grid(self) -> bool:
+        return self._show_grid
+
+    @show_grid.setter
+    def show_grid(self, flag: bool) -> None:
+        self._show_grid = flag
+
+    def _palette(self) -> Tuple[List[Color], Optional[List[str]], np.ndarray]:
+        """Colors, symbols (None for the color plot) and palette indexes."""
+        if self._symbol_matrix is None:
+            return (
+                self._color_matrix.distinct_colors,
+                None,
+                self._color_matrix.palette_indices,
+            )
+        palette: List[Tuple[Color, str]] = self._symbol_matrix.palette
+        return (
+            [color for color, _ in palette],
+            # canvas draws text, not HTML entities
+            [unescape(symbol) for _, symbol in palette],
+            self._symbol_matrix.palette_indices,
+        )
+
+    def _make_pattern(
+        self, colors: List[Color], symbols: Optional[List[str]], index_size: int
+    ) -> Dict[str, Any]:
+        center: Optional[List[Tuple[int, int]]] = None
+        if symbols is not None and self._mark_center_cell:
+            center = [
+                MatrixHtmlTable._center_indexes(self._color_matrix.width),
+                MatrixHtmlTable._center_indexes(self._color_matrix.height),
+            ]
+        return {
+            "width": self._color_matrix.width,
+            "height": self._color_matrix.height,
+            "palette": [[c.red, c.green, c.blue, c.alpha] for c in colors],
+            "symbols": symbols,
+            "index_size": index_size,
+            "show_background": self._show_background_color,
+            "show_grid": self._show_grid,
+            "cell_size": self._cell_size,
+            "center": center,
+            "center_color": self._mark_center_cell_color,
+        }
+
+    def make_html_style_tag(self) -> str:
+        return "\n".join(
+            [
+                "<style>",
+                "html, body {margin: 0px; padding: 0px; overflow: hidden;}",
+                "#viewer {position: relative; overflow: auto; width: 100vw;"
+                " height: 100vh;}",
+                "#viewer canvas {position: sticky; top: 0px; left: 0px; display: block;}",
+                "#viewer .viewer-spacer {position: absolute; top: 0px; left: 0px;}",
+                ".viewer-zoom {position: fixed; right: 20px; top: 4px; z-index: 1;}",
+                ".viewer-zoom button {width: 28px; font-weight: bold;}",
+                "</style>",
+            ]
+        )
+
+    def make_html(self) -> str:
+        return "".join(self.iter_html())
+
+    def iter_html(self) -> Iterator[str]:
+        """Viewer HTML, the index buffer in chunks of rows."""
+        colors, symbols, indices = self._palette()
+        # little endian for the typed arrays of the browser
+        index_dtype: np.dtype = ColorMatrix.index_dtype(len(colors)).newbyteorder("<")
+
+        yield "\n".join(
+            [
+                '<div class="viewer-zoom">',
+                '<button data-zoom="-2">-</button>',
+                '<button data-zoom="2">+</button>',
+                "</div>",
+                '<div id="viewer">',
+                "<canvas></canvas>",
+                '<div class="viewer-spacer"></div>',
+                "</div>",
+                "<script>",
+            ]
+        )
+        pattern_json: str = json.dumps(
+            self._make_pattern(colors, symbols, index_dtype.itemsize)
+        )
+        yield "\nconst pattern = " + pattern_json.replace("</", "<\\/") + ";"
+        yield '\npattern.indices = "'
+
+        # chunks of whole rows of multiples of 3 bytes, base64 without padding in between
+        index_bytes: bytes = b""
+        row_bytes: int = self._color_matrix.width * index_dtype.itemsize
+        rows_per_chunk: int = max(1, 0x10000 // row_bytes)
+        for top in range(0, indices.shape[0], rows_per_chunk):
+            index_bytes += indices[top : top + rows_per_chunk].astype(index_dtype).tobytes()
+            aligned: int = len(index_bytes) - len(index_bytes) % 3
+            yield b64encode(index_bytes[:aligned]).decode("ascii")
+            index_bytes = index_bytes[aligned:]
+        yield b64encode(index_bytes).decode("ascii")
+
+        yield '";\n' + VIEWER_SCRIPT + "\n</script>"
+
+    def write_to(self, html_file: TextIO) -> None:
+        html_file.writelines(self.iter_html())
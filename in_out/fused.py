@@ -0,0 +1,141 @@
+"""Outputs of one pattern rendered by a single walk over its rows of runs."""
+from typing import Dict, List, Optional, Protocol, TextIO, Tuple
+from contextlib import ExitStack
+from pathlib import Path
+from core.color import Color
+from core.symbols import SymbolMatrix
+from in_out.html import HTML, LegendHtmlTable, MatrixHtmlRowRenderer, MatrixHtmlTable
+
+
+class PRowSink(Protocol):
+    def open(self, palette: List[Tuple[Color, str]]) -> None:
+        """Palette of (color, symbol) the palette indexes of the runs refer to."""
+        ...
+
+    def add_row(
+        self, row_idx: int, runs: List[Tuple[int, int]], symbol_runs: List[Tuple[str, int]]
+    ) -> None:
+        """Runs of (palette_index, run_length) and (symbol, run_length) of one row."""
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+class HtmlTableSink:
+    """HTML document of a MatrixHtmlTable of the whole pattern, written row by row."""
+
+    def __init__(
+        self, html_table: MatrixHtmlTable, html_file: TextIO, header_html: str = ""
+    ) -> None:
+        self._html_table: MatrixHtmlTable = html_table
+        self._html_file: TextIO = html_file
+        self._header_html: str = header_html
+        self._row_renderer: Optional[MatrixHtmlRowRenderer] = None
+
+    def open(self, palette: List[Tuple[Color, str]]) -> None:
+        self._row_renderer = MatrixHtmlRowRenderer(
+            self._html_table, [color for color, _ in palette]
+        )
+        self._html_file.write(
+            "\n".join(
+                [HTML.make_html_open(self._header_html), self._html_table.make_html_head()]
+            )
+        )
+
+    def add_row(
+        self, row_idx: int, runs: List[Tuple[int, int]], symbol_runs: List[Tuple[str, int]]
+    ) -> None:
+        assert self._row_renderer is not None, "sink not opened"
+        self._html_file.write(
+            self._row_renderer.make_body_html(
+                row_idx,
+                runs,
+                symbol_runs if self._html_table.symbol_matrix is not None else None,
+            )
+        )
+
+    def close(self) -> None:
+        self._html_file.write(
+            "\n".join([self._html_table.make_html_foot(), HTML.make_html_close()])
+        )
+
+
+class StitchCountSink:
+    """Number of stitches per symbol, e.g. for the legend."""
+
+    def __init__(self) -> None:
+        self._counts: List[int] = []
+        self._symbols: List[str] = []
+
+    def open(self, palette: List[Tuple[Color, str]]) -> None:
+        self._symbols = [symbol for _, symbol in palette]
+        self._counts = [0] * len(palette)
+
+    def add_row(
+        self, row_idx: int, runs: List[Tuple[int, int]], symbol_runs: List[Tuple[str, int]]
+    ) -> None:
+        for idx, run_length in runs:
+            self._counts[idx] += run_length
+
+    def close(self) -> None:
+        pass
+
+    @property
+    def stitch_counts(self) -> Dict[str, int]:
+        return dict(zip(self._symbols, self._counts))
+
+
+class FusedPatternRenderer:
+    """
+    Walk the runs of a symbol matrix once, row by row, and push the runs
+    of each row to all sinks. Each sink costs its own formatting only.
+    """
+
+    def __init__(self, symbol_matrix: SymbolMatrix) -> None:
+        self._symbol_matrix: SymbolMatrix = symbol_matrix
+        self._sinks: List[PRowSink] = []
+
+    def add_sink(self, sink: PRowSink) -> None:
+        self._sinks += [sink]
+
+    def render(self) -> None:
+        palette: List[Tuple[Color, str]] = self._symbol_matrix.palette
+        symbols: List[str] = [symbol for _, symbol in palette]
+        for sink in self._sinks:
+            sink.open(palette)
+
+        for row_idx, runs in enumerate(self._symbol_matrix.index_row_runs()):
+            symbol_runs: List[Tuple[str, int]] = [
+                (symbols[idx], run_length) for idx, run_length in runs
+            ]
+            for sink in self._sinks:
+                sink.add_row(row_idx, runs, symbol_runs)
+
+        for sink in self._sinks:
+            sink.close()
+
+
+def write_html_pattern(
+    symbol_matrix: SymbolMatrix,
+    tables: List[Tuple[Path, MatrixHtmlTable, str]],
+    legend: Optional[Tuple[Path, LegendHtmlTable, str]] = None,
+) -> None:
+    """
+    Write (path, table, header) documents in one walk over the pattern, the legend
+    (path, legend, header) afterwards with the counted stitches.
+    """
+    renderer: FusedPatternRenderer = FusedPatternRenderer(symbol_matrix)
+    stitch_counter: StitchCountSink = StitchCountSink()
+    with ExitStack() as files:
+        for path, html_table, header_html in tables:
+            html_file: TextIO = files.enter_context(open(str(path), "w"))
+            renderer.add_sink(HtmlTableSink(html_table, html_file, header_html))
+        renderer.add_sink(stitch_counter)
+        renderer.render()
+
+    if legend is not None:
+        legend_path, legend_html, legend_header = legend
+        legend_html.stitch_counts = stitch_counter.stitch_counts
+        with open(str(legend_path), "w") as legend_file:
+            HTML.write_document(legend_file, legend_html, legend_header)
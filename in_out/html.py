@@ -1,14 +1,22 @@
 """Classes for writing of data to HTML."""
-from typing import Final, List, Tuple, Optional, Dict, Protocol
-from core.image import ColorMatrix, Color
+from typing import Final, List, Tuple, Optional, Dict, Protocol, Iterator, Set, TextIO
+from itertools import repeat
+from collections import OrderedDict
+from base64 import b64encode
+from io import BytesIO
+from PIL import Image  # type: ignore
+import numpy as np  # type: ignore
+from core.color import ColorMatrix, Color
 from core.symbols import SymbolMatrix
-from copy import deepcopy
 
 
 class PHtml(Protocol):
     def make_html(self) -> str:
         ...
 
+    def iter_html(self) -> Iterator[str]:
+        ...
+
 
 class PCss(Protocol):
     def make_html_style_tag(self) -> str:
@@ -25,19 +33,60 @@ class HTML:
         self._inner_html: str = body_html
         self._header_html: str = header_html
 
-    def make_html(self) -> str:
+    @staticmethod
+    def make_html_open(header_html: str = "") -> str:
+        """Document up to and including the body tag."""
         html_content: List[str] = ["<!DOCTYPE html>", "<html>"]
-        if self._header_html != "":
-            html_content += ["<head>", self._header_html, "</head>"]
+        if header_html != "":
+            html_content += ["<head>", header_html, "</head>"]
 
-        html_content += ["<body>", self._inner_html, "</body>", "</html>"]
+        html_content += ["<body>"]
         return "\n".join(html_content)
 
+    @staticmethod
+    def make_html_close() -> str:
+        """Document from the closing body tag."""
+        return "\n".join(["</body>", "</html>"])
+
+    @staticmethod
+    def iter_document(body: PHtml, header_html: str = "") -> Iterator[str]:
+        """Document with the body streamed chunk by chunk from body.iter_html()."""
+        yield HTML.make_html_open(header_html)
+        yield "\n"
+        yield from body.iter_html()
+        yield "\n"
+        yield HTML.make_html_close()
+
+    @staticmethod
+    def write_document(html_file: TextIO, body: PHtml, header_html: str = "") -> None:
+        """Write the document without building it in memory as one string."""
+        html_file.writelines(HTML.iter_document(body, header_html))
+
+    def make_html(self) -> str:
+        return "".join(self.iter_html())
+
+    def iter_html(self) -> Iterator[str]:
+        yield HTML.make_html_open(self._header_html)
+        yield "\n"
+        yield self._inner_html
+        yield "\n"
+        yield HTML.make_html_close()
+
+    def write_to(self, html_file: TextIO) -> None:
+        html_file.writelines(self.iter_html())
+
 
 class MatrixTableCSS:
     def __init__(self) -> None:
         self._pixel_size: Tuple[int, int] = (12, 12)
         self._show_grid: bool = True
+        self._colors: List[Color] = []
+        self._chunked_layout: bool = False
+
+    @staticmethod
+    def color_class(color: Color) -> str:
+        """CSS class of a palette color, derived from the RGBA key (stable for all bands)."""
+        return f"c{color.key:08x}"
 
     @property
     def pixel_size(self) -> Tuple[int, int]:
@@ -59,6 +108,24 @@ class MatrixTableCSS:
     def show_grid(self, flag: bool) -> None:
         self._show_grid = flag
 
+    @property
+    def chunked_layout(self) -> bool:
+        """Fixed layout of chunks laid out when on screen, see MatrixHtmlTable.chunk_rows."""
+        return self._chunked_layout
+
+    @chunked_layout.setter
+    def chunked_layout(self, flag: bool) -> None:
+        self._chunked_layout = flag
+
+    @property
+    def colors(self) -> List[Color]:
+        """Palette colors to define background color classes for."""
+        return list(self._colors)
+
+    @colors.setter
+    def colors(self, colors: List[Color]) -> None:
+        self._colors = list(colors)
+
     def make_html_style_tag(self) -> str:
         html_content = ["<style>"]
         html_content += [
@@ -97,6 +164,43 @@ class MatrixTableCSS:
             "font-weight: bold;",
             "}",
         ]
+        # merged runs (colspan): columns keep their width, the grid is drawn per pixel
+        html_content += [
+            "table col {",
+            f"width: {self._pixel_size[0]}px;",
+            "}",
+        ]
+        if self._show_grid:
+            pitch: int = self._pixel_size[0] + 1
+            html_content += [
+                "table tr td[colspan] {",
+                "background-image: repeating-linear-gradient(to right, transparent 0px,"
+                f" transparent {pitch - 1}px, rgb(190,190,190) {pitch - 1}px,"
+                f" rgb(190,190,190) {pitch}px);",
+                "}",
+            ]
+        if self._chunked_layout:
+            # cells of collapsed borders take width + 1px, chunks share the border
+            table_width: str = f"calc(var(--cols) * {self._pixel_size[0] + 1}px + 1px)"
+            html_content += [
+                ".chunk {",
+                "content-visibility: auto;",
+                f"contain-intrinsic-size: auto {table_width}"
+                f" auto calc(var(--rows) * {self._pixel_size[1] + 1}px + 1px);",
+                "}",
+                ".chunk + .chunk {",
+                "margin-top: -1px;",
+                "}",
+                ".chunk table {",
+                "table-layout: fixed;",
+                f"width: {table_width};",
+                "}",
+            ]
+        html_content += [
+            f".{MatrixTableCSS.color_class(c)} {{background-color: "
+            f"rgba({c.red}, {c.green}, {c.blue}, {c.alpha});}}"
+            for c in self._colors
+        ]
         html_content += ["</style>"]
 
         return "\n".join(html_content)
@@ -121,13 +225,20 @@ class MatrixHtmlTable:
                     f"{symbol_matrix.height} != {color_matrix.height}"
                 )
 
-        self._color_matrix: ColorMatrix = deepcopy(color_matrix)
-        self._symbol_matrix: Optional[SymbolMatrix] = (
-            deepcopy(symbol_matrix) if symbol_matrix is not None else None
-        )
+        # matrices are immutable, share them
+        self._color_matrix: ColorMatrix = color_matrix
+        self._symbol_matrix: Optional[SymbolMatrix] = symbol_matrix
         self._show_background_color: bool = True
         self._mark_center_cell: bool = True
         self._mark_center_cell_color: str = "limegreen"
+        self._row_cache_size: int = 1024
+        self._merge_runs: bool = False
+        self._chunk_rows: int = 0
+        self._show_coordinates: bool = False
+        # (first_row, first_col) and (height, width) of the pattern the matrix is part of
+        self._origin: Tuple[int, int] = (0, 0)
+        self._pattern_size: Optional[Tuple[int, int]] = None
+        self._class_keys: Set[int] = set()
 
     @staticmethod
     def _center_indexes(element_count: int) -> Tuple[int, int]:
@@ -165,54 +276,486 @@ class MatrixHtmlTable:
             raise ValueError("Empty color name")
         self._mark_center_cell_color = color
 
+    @property
+    def merge_runs(self) -> bool:
+        """Merge horizontal runs of one color into a single cell with colspan."""
+        return self._merge_runs
+
+    @merge_runs.setter
+    def merge_runs(self, flag: bool) -> None:
+        if self._symbol_matrix is not None and flag:
+            raise ValueError("Defined symbol matrix, cannot merge runs of cells")
+        self._merge_runs = flag
+
+    @property
+    def class_colors(self) -> List[Color]:
+        """
+        Colors with a background class in the style, see MatrixTableCSS.colors.
+        Cells of other colors get an inline background color.
+        """
+        return [Color.from_key(key) for key in sorted(self._class_keys)]
+
+    @class_colors.setter
+    def class_colors(self, colors: List[Color]) -> None:
+        self._class_keys = {color.key for color in colors}
+
+    def _background_attribute(self, color: Color) -> str:
+        if color.key in self._class_keys:
+            return f'class="{MatrixTableCSS.color_class(color)}"'
+        return (
+            f'style="background-color: rgba({color.red}, {color.green},'
+            f' {color.blue}, {color.alpha});"'
+        )
+
+    @property
+    def chunk_rows(self) -> int:
+        """
+        Rows per chunk, each chunk is a table of its own which the browser lays out
+        only when on screen (see MatrixTableCSS.chunked_layout), 0 for one table.
+        """
+        return self._chunk_rows
+
+    @chunk_rows.setter
+    def chunk_rows(self, rows: int) -> None:
+        if rows < 0:
+            raise ValueError(f"Invalid number of rows per chunk {rows}, must be >= 0")
+        self._chunk_rows = rows
+
+    @property
+    def show_coordinates(self) -> bool:
+        """Number rows and columns (1-based) in a header row and column."""
+        return self._show_coordinates
+
+    @show_coordinates.setter
+    def show_coordinates(self, flag: bool) -> None:
+        self._show_coordinates = flag
+
+    def place_in_pattern(
+        self, first_row: int, first_col: int, height: int, width: int
+    ) -> None:
+        """
+        Place the matrix as page at (first_row, first_col) of a pattern of height x width.
+        Center cells and coordinates refer to the pattern.
+        """
+        if (
+            first_row < 0
+            or first_col < 0
+            or first_row + self._color_matrix.height > height
+            or first_col + self._color_matrix.width > width
+        ):
+            raise ValueError(
+                f"Invalid position ({first_row}, {first_col}) of matrix of size "
+                f"{self._color_matrix.width} x {self._color_matrix.height} "
+                f"in pattern of size {width} x {height}"
+            )
+        self._origin = (first_row, first_col)
+        self._pattern_size = (height, width)
+
+    @property
+    def row_cache_size(self) -> int:
+        """Maximum number of distinct rendered rows kept for reuse, 0 disables."""
+        return self._row_cache_size
+
+    @row_cache_size.setter
+    def row_cache_size(self, size: int) -> None:
+        if size < 0:
+            raise ValueError(f"Invalid row cache size {size}, must be >= 0")
+        self._row_cache_size = size
+
     @property
     def color_matrix(self) -> ColorMatrix:
         return self._color_matrix
 
+    @property
+    def symbol_matrix(self) -> Optional[SymbolMatrix]:
+        return self._symbol_matrix
+
+    def _make_cell_html(
+        self, color: Color, symbol: Optional[str], mark_center: bool
+    ) -> str:
+        cell_html: List[str] = []
+        if self._show_background_color:
+            cell_html += [f"<td {self._background_attribute(color)}>"]
+        else:
+            cell_html += ["<td>"]
+
+        if symbol is not None and not color.is_transparent:
+            open_div: str = "<div>"
+            if mark_center:
+                open_div = (
+                    '<div style="background-color:'
+                    f' {self._mark_center_cell_color};">'
+                )
+            cell_html += [open_div, symbol, "</div>"]
+        cell_html += ["</td>"]
+        return "".join(cell_html)
+
     def make_html(self) -> str:
+        return "".join(self.iter_html())
+
+    def make_html_table_open(
+        self, first_row: int = 0, total_height: Optional[int] = None
+    ) -> str:
+        """Table up to and including the tbody tag, for the chunk starting at first_row."""
+        html_tags: List[str] = []
+        if self._chunk_rows > 0:
+            # rows after the table: a placed matrix ends within the pattern,
+            # a band is followed by the others up to total_height
+            end_row: int = (
+                self._origin[0] + self._color_matrix.height
+                if self._pattern_size is not None
+                else total_height
+                if total_height is not None
+                else self._color_matrix.height
+            )
+            # chunks break at multiples of chunk_rows of the pattern
+            chunk_end: int = min(
+                (first_row // self._chunk_rows + 1) * self._chunk_rows, end_row
+            )
+            # containment works on blocks only, not on table sections like tbody
+            html_tags += [
+                f'<div class="chunk" style="--cols: {self._color_matrix.width};'
+                f' --rows: {chunk_end - first_row};">'
+            ]
+        html_tags += ["<table>"]
+        if self._merge_runs:
+            # columns of merged cells only need a defined width
+            html_tags += [
+                f'<colgroup><col span="{self._color_matrix.width}"></colgroup>'
+            ]
+        html_tags += ["<tbody>"]
+        return "\n".join(html_tags)
 
-        center_cell_indexes_from_to: List[Tuple[int, int]] = [
-            MatrixHtmlTable._center_indexes(self._color_matrix.width),
-            MatrixHtmlTable._center_indexes(self._color_matrix.height),
-        ]
+    def make_html_table_close(self) -> str:
+        """Table from the closing tbody tag."""
+        html_tags: List[str] = ["</tbody>", "</table>"]
+        if self._chunk_rows > 0:
+            html_tags += ["</div>"]
+        return "\n".join(html_tags)
 
-        html_tags: List[str] = ["<table>", "<tbody>"]
-        for row_idx, row in enumerate(self._color_matrix.matrix):
-            html_tags += ["<tr>"]
-            for col_idx, color in enumerate(row):
-                if self._show_background_color:
-                    html_tags += [
-                        f'<td style="background-color: rgba({color.red}, {color.green},'
-                        f' {color.blue}, {color.alpha});" ',
-                        f">",
-                    ]
-                else:
-                    html_tags += ["<td>"]
-
-                if self._symbol_matrix is not None and not color.is_transparent:
-
-                    open_div: str = "<div>"
-                    if self._mark_center_cell and self._symbol_matrix is not None:
-                        if (
-                            col_idx in center_cell_indexes_from_to[0]
-                            and row_idx in center_cell_indexes_from_to[1]
-                        ):
-                            open_div = (
-                                '<div style="background-color:'
-                                f' {self._mark_center_cell_color};">'
-                            )
-
-                    html_tags += [
-                        open_div,
-                        f"{self._symbol_matrix.matrix[row_idx][col_idx]}",
-                        "</div>",
+    def make_html_head(self) -> str:
+        """Table open and the row of column numbers, if shown."""
+        total_height: Optional[int] = (
+            self._pattern_size[0] if self._pattern_size is not None else None
+        )
+        html_head: str = self.make_html_table_open(self._origin[0], total_height)
+        if self._show_coordinates:
+            first_col: int = self._origin[1]
+            html_head += "\n" + "".join(
+                ["<tr><th></th>"]
+                + [
+                    f"<th>{col + 1}</th>"
+                    for col in range(first_col, first_col + self._color_matrix.width)
+                ]
+                + ["</tr>"]
+            )
+        return html_head
+
+    def make_html_foot(self) -> str:
+        return "\n" + self.make_html_table_close()
+
+    def iter_html(self) -> Iterator[str]:
+        """Table HTML in chunks of one row, joined they equal make_html()."""
+        total_height: Optional[int] = (
+            self._pattern_size[0] if self._pattern_size is not None else None
+        )
+        yield self.make_html_head()
+        yield from self.iter_html_body(self._origin[0], total_height)
+        yield self.make_html_foot()
+
+    def _iter_runs(
+        self,
+    ) -> Iterator[Tuple[List[Tuple[int, int]], Optional[List[Tuple[str, int]]]]]:
+        symbol_row_runs: Iterator[Optional[List[Tuple[str, int]]]] = (
+            self._symbol_matrix.row_runs()
+            if self._symbol_matrix is not None
+            else repeat(None)
+        )
+        return zip(self._color_matrix.row_runs(), symbol_row_runs)
+
+    def iter_html_body(
+        self, first_row: int = 0, total_height: Optional[int] = None
+    ) -> Iterator[str]:
+        """Rows with leading line break, tables of chunks closed and opened in between."""
+        row_renderer: MatrixHtmlRowRenderer = MatrixHtmlRowRenderer(
+            self, self._color_matrix.distinct_colors, total_height
+        )
+        for row_idx, (runs, symbol_runs) in enumerate(self._iter_runs(), start=first_row):
+            yield row_renderer.make_body_html(row_idx, runs, symbol_runs)
+
+    def write_to(self, html_file: TextIO) -> None:
+        html_file.writelines(self.iter_html())
+
+    def make_html_rows(
+        self, first_row: int = 0, total_height: Optional[int] = None
+    ) -> List[str]:
+        """HTML of the table rows only, one string per row."""
+        return list(self.iter_html_rows(first_row, total_height))
+
+    def iter_html_rows(
+        self, first_row: int = 0, total_height: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        HTML of the table rows only, generated one row at a time.
+        first_row and total_height place the matrix as band within a larger matrix.
+        Background colors refer to the classes of MatrixTableCSS, see class_colors.
+        """
+        row_renderer: MatrixHtmlRowRenderer = MatrixHtmlRowRenderer(
+            self, self._color_matrix.distinct_colors, total_height
+        )
+        for row_idx, (runs, symbol_runs) in enumerate(self._iter_runs(), start=first_row):
+            yield row_renderer.make_row_html(row_idx, runs, symbol_runs)
+
+    def _make_row_html(
+        self,
+        runs: List[Tuple[int, int]],
+        symbol_runs: Optional[List[Tuple[str, int]]],
+        colors: List[Color],
+        cell_fragments: Dict[int, str],
+        center_cols: Optional[Tuple[int, int]],
+    ) -> str:
+        """One <tr>, center_cols are the columns to mark or None."""
+        # work per run of equal color, not per cell
+        row_html: List[str] = ["<tr>"]
+        col_idx: int = 0
+        for run_idx, (color_idx, run_length) in enumerate(runs):
+            color: Color = colors[color_idx]
+            symbol: Optional[str] = (
+                symbol_runs[run_idx][0] if symbol_runs is not None else None
+            )
+            if color_idx not in cell_fragments:
+                cell_fragments[color_idx] = self._make_cell_html(color, symbol, False)
+
+            run_cols: range = range(col_idx, col_idx + run_length)
+            if self._merge_runs and run_length > 1:
+                row_html += [
+                    f'<td {self._background_attribute(color)} colspan="{run_length}"></td>'
+                ]
+            elif center_cols is not None and any(col in run_cols for col in center_cols):
+                for col in run_cols:
+                    row_html += [
+                        self._make_cell_html(color, symbol, True)
+                        if col in center_cols
+                        else cell_fragments[color_idx]
                     ]
-                html_tags += ["</td>"]
-            html_tags += ["</tr>"]
+            else:
+                row_html += [cell_fragments[color_idx]] * run_length
+            col_idx += run_length
+        row_html += ["</tr>"]
+        return "".join(row_html)
 
-        html_tags += ["</tbody>", "</table>"]
 
-        return "\n".join(html_tags)
+class MatrixHtmlRowRenderer:
+    """
+    Rows of a MatrixHtmlTable from palette index runs, one row at a time.
+    The runs index colors, rows are either walked by the table or pushed by a
+    renderer that walks the matrix once for several outputs.
+    """
+
+    def __init__(
+        self,
+        html_table: MatrixHtmlTable,
+        colors: List[Color],
+        total_height: Optional[int] = None,
+    ) -> None:
+        self._html_table: MatrixHtmlTable = html_table
+        self._colors: List[Color] = colors
+        self._total_height: Optional[int] = total_height
+
+        color_matrix: ColorMatrix = html_table.color_matrix
+        pattern_size: Optional[Tuple[int, int]] = html_table._pattern_size
+        # center columns relative to the matrix, rows relative to the pattern
+        first_col: int = html_table._origin[1]
+        self._center_cols: Tuple[int, int] = tuple(  # type: ignore
+            col - first_col
+            for col in MatrixHtmlTable._center_indexes(
+                pattern_size[1] if pattern_size is not None else color_matrix.width
+            )
+        )
+        self._center_rows: Tuple[int, int] = MatrixHtmlTable._center_indexes(
+            total_height if total_height is not None else color_matrix.height
+        )
+        self._mark_center: bool = (
+            html_table.mark_center_cell and html_table.symbol_matrix is not None
+        )
+
+        # complete <td> per palette entry, built on first use
+        self._cell_fragments: Dict[int, str] = {}
+        # rendered rows by their palette index runs, least recently used dropped first
+        self._row_cache: "OrderedDict[Tuple[Tuple[int, int], ...], str]" = OrderedDict()
+
+    def make_row_html(
+        self,
+        row_idx: int,
+        runs: List[Tuple[int, int]],
+        symbol_runs: Optional[List[Tuple[str, int]]],
+    ) -> str:
+        """One <tr> of the row at row_idx of the pattern."""
+        if self._mark_center and row_idx in self._center_rows:
+            # marked cells are unique to the center rows, never cached
+            return self._html_table._make_row_html(
+                runs, symbol_runs, self._colors, self._cell_fragments, self._center_cols
+            )
+
+        # runs encode the row's palette indexes, symbols follow from the indexes
+        row_key: Tuple[Tuple[int, int], ...] = tuple(runs)
+        row_html: Optional[str] = self._row_cache.get(row_key)
+        if row_html is not None:
+            self._row_cache.move_to_end(row_key)
+            return row_html
+
+        row_html = self._html_table._make_row_html(
+            runs, symbol_runs, self._colors, self._cell_fragments, None
+        )
+        if self._html_table.row_cache_size > 0:
+            self._row_cache[row_key] = row_html
+            if len(self._row_cache) > self._html_table.row_cache_size:
+                self._row_cache.popitem(last=False)
+        return row_html
+
+    def make_body_html(
+        self,
+        row_idx: int,
+        runs: List[Tuple[int, int]],
+        symbol_runs: Optional[List[Tuple[str, int]]],
+    ) -> str:
+        """Row with leading line break, preceded by the break between chunks."""
+        html_table: MatrixHtmlTable = self._html_table
+        row_html: str = self.make_row_html(row_idx, runs, symbol_runs)
+        if html_table.show_coordinates:
+            row_html = f"<tr><th>{row_idx + 1}</th>" + row_html[len("<tr>") :]
+        if (
+            html_table.chunk_rows > 0
+            and row_idx > html_table._origin[0]
+            and row_idx % html_table.chunk_rows == 0
+        ):
+            return "".join(
+                [
+                    "\n",
+                    html_table.make_html_table_close(),
+                    "\n",
+                    html_table.make_html_table_open(row_idx, self._total_height),
+                    "\n",
+                    row_html,
+                ]
+            )
+        return "\n" + row_html
+
+
+class MatrixImageCSS:
+    """Style of MatrixHtmlImage, image scaled without smoothing, grid by gradients."""
+
+    def __init__(self) -> None:
+        self._pixel_size: Tuple[int, int] = (12, 12)
+        self._show_grid: bool = True
+
+    @property
+    def pixel_size(self) -> Tuple[int, int]:
+        return self._pixel_size
+
+    @pixel_size.setter
+    def pixel_size(self, size: Tuple[int, int]) -> None:
+        if len(size) != 2:
+            raise ValueError(
+                f"Invalid length of tuple size {len(size)}, required (width, height)"
+            )
+        self._pixel_size = size
+
+    @property
+    def show_grid(self) -> bool:
+        return self._show_grid
+
+    @show_grid.setter
+    def show_grid(self, flag: bool) -> None:
+        self._show_grid = flag
+
+    def make_html_style_tag(self) -> str:
+        width, height = self._pixel_size
+        html_content: List[str] = ["<style>"]
+        html_content += [
+            ".pattern {",
+            "position: relative;",
+            "display: inline-block;",
+            "line-height: 0px;",
+            "}",
+            ".pattern img {",
+            f"width: calc(var(--cols) * {width}px);",
+            f"height: calc(var(--rows) * {height}px);",
+            "image-rendering: crisp-edges;",
+            "image-rendering: pixelated;",
+            "}",
+        ]
+        if self._show_grid:
+            html_content += [
+                ".pattern::after {",
+                'content: "";',
+                "position: absolute;",
+                "top: 0px; left: 0px; right: 0px; bottom: 0px;",
+                "pointer-events: none;",
+                "border-right: 1px solid rgb(190,190,190);",
+                "border-bottom: 1px solid rgb(190,190,190);",
+                "background-image:"
+                " linear-gradient(to right, rgb(190,190,190) 1px, transparent 1px),"
+                " linear-gradient(to bottom, rgb(190,190,190) 1px, transparent 1px);",
+                f"background-size: {width}px {height}px;",
+                "}",
+            ]
+        html_content += ["</style>"]
+
+        return "\n".join(html_content)
+
+
+class MatrixHtmlImage:
+    """Color plot as the original pixels, one embedded PNG (data URI) instead of a table."""
+
+    def __init__(self, color_matrix: ColorMatrix):
+        if color_matrix.is_empty:
+            raise ValueError("Empty color matrix")
+
+        self._color_matrix: ColorMatrix = color_matrix
+
+    @property
+    def color_matrix(self) -> ColorMatrix:
+        return self._color_matrix
+
+    def make_png(self) -> bytes:
+        """PNG of the color matrix, indexed if possible."""
+        colors: List[Color] = self._color_matrix.distinct_colors
+        image: Image.Image
+        transparency: Dict[str, bytes] = {}
+        if len(colors) <= 256:
+            image = Image.fromarray(
+                self._color_matrix.palette_indices.astype(np.uint8), "L"
+            ).convert("P")
+            image.putpalette([v for c in colors for v in (c.red, c.green, c.blue)])
+            if any(c.alpha < 255 for c in colors):
+                transparency["transparency"] = bytes(c.alpha for c in colors)
+        else:
+            image = Image.fromarray(np.ascontiguousarray(self._color_matrix.pixels), "RGBA")
+
+        png: BytesIO = BytesIO()
+        image.save(png, "PNG", optimize=True, **transparency)
+        return png.getvalue()
+
+    def make_html(self) -> str:
+        return "".join(self.iter_html())
+
+    def iter_html(self) -> Iterator[str]:
+        """Image tag, the base64 data in chunks."""
+        yield (
+            '<div class="pattern" style="--cols: '
+            f'{self._color_matrix.width}; --rows: {self._color_matrix.height};">'
+            '<img alt="color plot" src="data:image/png;base64,'
+        )
+        png: bytes = self.make_png()
+        # multiples of 3 bytes, no base64 padding in between
+        chunk_size: int = 3 * 0x4000
+        for start in range(0, len(png), chunk_size):
+            yield b64encode(png[start : start + chunk_size]).decode("ascii")
+        yield '"></div>'
+
+    def write_to(self, html_file: TextIO) -> None:
+        html_file.writelines(self.iter_html())
 
 
 class LegendHtmlTable:
@@ -220,22 +763,33 @@ class LegendHtmlTable:
         if len(legend) == 0:
             raise ValueError("Empty legend dictionary")
 
-        self._legend = deepcopy(legend)
+        self._legend: Dict[str, Color] = dict(legend)
         self._legend_bar_width: int = 80
         self._legend_bar_height: int = 30
         self._ignore_transparent: bool = ignore_transparent
+        self._stitch_counts: Optional[Dict[str, int]] = None
 
-    def make_html(self) -> str:
+    @property
+    def stitch_counts(self) -> Optional[Dict[str, int]]:
+        """Number of stitches per symbol, shown in a third column if defined."""
+        return self._stitch_counts
 
-        html_content: List[str] = [
-            "<table>",
-            "<tbody>",
-        ]
+    @stitch_counts.setter
+    def stitch_counts(self, counts: Optional[Dict[str, int]]) -> None:
+        if counts is not None and any(symbol not in counts for symbol in self._legend):
+            raise ValueError("Missing stitch counts of legend symbols")
+        self._stitch_counts = counts
 
+    def make_html(self) -> str:
+        return "".join(self.iter_html())
+
+    def iter_html(self) -> Iterator[str]:
+        """Legend HTML in chunks of one row, joined they equal make_html()."""
+        yield "<table>\n<tbody>"
         for k, c in self._legend.items():
             if self._ignore_transparent and c.is_transparent:
                 continue
-            html_content += ["<tr>"]
+            html_content: List[str] = ["<tr>"]
             html_content += [
                 "<td>",
                 k,
@@ -247,11 +801,14 @@ class LegendHtmlTable:
                 "</div>",
                 "</td>",
             ]
+            if self._stitch_counts is not None:
+                html_content += ["<td>", str(self._stitch_counts[k]), "</td>"]
             html_content += ["</tr>"]
+            yield "\n" + "\n".join(html_content)
+        yield "\n</tbody>\n</table>"
 
-        html_content += ["</tbody>", "</table>"]
-
-        return "\n".join(html_content)
+    def write_to(self, html_file: TextIO) -> None:
+        html_file.writelines(self.iter_html())
 
 
 class LegendCSS:
@@ -0,0 +1,91 @@
+"""Journal of converted files, for resuming interrupted batches."""
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, asdict
+from hashlib import sha256
+from pathlib import Path
+import json
+import os
+
+
+def file_hash(path: Path) -> str:
+    """SHA-256 of the file content, hex digits."""
+    digest = sha256()
+    with open(str(path), "rb") as data_file:
+        for block in iter(lambda: data_file.read(0x100000), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class JournalEntry:
+
+    png_file: str
+    sha256: str
+    options: Dict[str, Any]
+    status: str
+    outputs: List[str]
+    error: str = ""
+
+
+class JobJournal:
+    """
+    Entries appended as JSON lines as files complete, flushed to disk one by one.
+    A line cut off by an interruption is ignored when read.
+    """
+
+    DONE: str = "done"
+    FAILED: str = "failed"
+
+    def __init__(self, path: Path) -> None:
+        self._path: Path = path
+        # latest entry per PNG file
+        self._latest: Dict[str, JournalEntry] = {
+            entry.png_file: entry for entry in self.entries()
+        }
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def append(self, entry: JournalEntry) -> None:
+        if entry.status not in (JobJournal.DONE, JobJournal.FAILED):
+            raise ValueError(f'Invalid journal status "{entry.status}"')
+        line: str = json.dumps(asdict(entry), sort_keys=True) + "\n"
+        if self._path.exists() and self._path.stat().st_size > 0:
+            with open(str(self._path), "rb") as journal_file:
+                journal_file.seek(-1, os.SEEK_END)
+                if journal_file.read(1) != b"\n":
+                    # end the line cut off by an interruption
+                    line = "\n" + line
+        with open(str(self._path), "a", encoding="utf-8") as journal_file:
+            journal_file.write(line)
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+        self._latest[entry.png_file] = entry
+
+    def entries(self) -> List[JournalEntry]:
+        if not self._path.exists():
+            return []
+        entries: List[JournalEntry] = []
+        with open(str(self._path), encoding="utf-8") as journal_file:
+            for line in journal_file:
+                try:
+                    entries += [JournalEntry(**json.loads(line))]
+                except (ValueError, TypeError):
+                    # cut off by an interruption
+                    continue
+        return entries
+
+    def is_completed(self, png_file: Path, digest: str, options: Dict[str, Any]) -> bool:
+        """
+        Latest entry of the file is done, for equal content and options, and the
+        outputs still exist.
+        """
+        entry: Optional[JournalEntry] = self._latest.get(str(png_file.absolute()))
+        return (
+            entry is not None
+            and entry.status == JobJournal.DONE
+            and entry.sha256 == digest
+            and entry.options == options
+            and all(Path(output).exists() for output in entry.outputs)
+        )
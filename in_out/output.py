@@ -0,0 +1,87 @@
+"""Concurrent writing of output files, one job per file."""
+from typing import Any, Callable, List, Tuple
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from in_out.html import HTML, PHtml
+from in_out.svg import MatrixSvg
+
+
+class OutputError(Exception):
+    """Errors of one or more output jobs, (job name, error) in order of the jobs."""
+
+    def __init__(self, errors: List[Tuple[str, Exception]]):
+        super().__init__(
+            "\n".join(f"{name}: {type(err).__name__}: {err}" for name, err in errors)
+        )
+        self.errors: List[Tuple[str, Exception]] = errors
+
+
+def write_html_file(path: Path, body: PHtml, header_html: str = "") -> None:
+    with open(str(path), "w") as html_file:
+        HTML.write_document(html_file, body, header_html)
+
+
+def write_svg_file(path: Path, svg: MatrixSvg) -> None:
+    with open(str(path), "w", encoding="utf-8") as svg_file:
+        svg.write_to(svg_file)
+
+
+class OutputStage:
+    """
+    Run output jobs on a pool of workers, threads by default or processes.
+    Each job writes files of its own, the output does not depend on the order of the jobs.
+    For processes jobs must be picklable, e.g. functools.partial of a module function.
+    """
+
+    def __init__(self, workers: int = 3, processes: bool = False) -> None:
+        if workers <= 0:
+            raise ValueError(f"Invalid number of workers {workers}, must be > 0")
+
+        self._workers: int = workers
+        self._processes: bool = processes
+        self._jobs: List[Tuple[str, Callable[[], Any]]] = []
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @property
+    def processes(self) -> bool:
+        return self._processes
+
+    @property
+    def job_names(self) -> List[str]:
+        return [name for name, _ in self._jobs]
+
+    def add(self, name: str, job: Callable[[], Any]) -> None:
+        self._jobs += [(name, job)]
+
+    def run(self) -> None:
+        """Run all jobs, also if some fail, raise OutputError with all errors."""
+        jobs: List[Tuple[str, Callable[[], Any]]] = self._jobs
+        self._jobs = []
+        errors: List[Tuple[str, Exception]] = []
+
+        if self._workers == 1 or len(jobs) <= 1:
+            for name, job in jobs:
+                try:
+                    job()
+                except Exception as err:
+                    errors += [(name, err)]
+        else:
+            executor: Executor = (
+                ProcessPoolExecutor(max_workers=min(self._workers, len(jobs)))
+                if self._processes
+                else ThreadPoolExecutor(max_workers=min(self._workers, len(jobs)))
+            )
+            with executor:
+                futures: List[Future] = [executor.submit(job) for _, job in jobs]
+                # results in order of the jobs, not of completion
+                for (name, _), future in zip(jobs, futures):
+                    try:
+                        future.result()
+                    except Exception as err:
+                        errors += [(name, err)]
+
+        if len(errors) > 0:
+            raise OutputError(errors)
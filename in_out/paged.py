@@ -0,0 +1,209 @@
+"""Stitch pattern split into pages of their own HTML file, with an index page."""
+from typing import List, Tuple
+from pathlib import Path
+from core.symbols import SymbolMatrix
+from in_out.html import HTML, MatrixHtmlTable, MatrixTableCSS
+from in_out.html import MatrixHtmlImage, MatrixImageCSS
+
+
+class PagedPatternWriter:
+    """
+    Write the stitch pattern as pages of page_width x page_height stitches.
+    Neighboring pages repeat overlap rows and columns, the index page links all pages.
+    """
+
+    def __init__(self, symbol_matrix: SymbolMatrix) -> None:
+        self._symbol_matrix: SymbolMatrix = symbol_matrix
+        self._page_width: int = 70
+        self._page_height: int = 100
+        self._overlap: int = 0
+        self._mark_center_cell: bool = True
+        self._mark_center_cell_color: str = "limegreen"
+
+    @property
+    def page_width(self) -> int:
+        return self._page_width
+
+    @page_width.setter
+    def page_width(self, width: int) -> None:
+        if width <= self._overlap:
+            raise ValueError(
+                f"Invalid page width {width}, must be > overlap {self._overlap}"
+            )
+        self._page_width = width
+
+    @property
+    def page_height(self) -> int:
+        return self._page_height
+
+    @page_height.setter
+    def page_height(self, height: int) -> None:
+        if height <= self._overlap:
+            raise ValueError(
+                f"Invalid page height {height}, must be > overlap {self._overlap}"
+            )
+        self._page_height = height
+
+    @property
+    def overlap(self) -> int:
+        """Rows and columns repeated on neighboring pages."""
+        return self._overlap
+
+    @overlap.setter
+    def overlap(self, overlap: int) -> None:
+        if overlap < 0 or overlap >= min(self._page_width, self._page_height):
+            raise ValueError(
+                f"Invalid overlap {overlap}, must be >= 0 and < page width and height"
+            )
+        self._overlap = overlap
+
+    @property
+    def mark_center_cell(self) -> bool:
+        return self._mark_center_cell
+
+    @mark_center_cell.setter
+    def mark_center_cell(self, flag: bool) -> None:
+        self._mark_center_cell = flag
+
+    @property
+    def mark_center_cell_color(self) -> str:
+        return self._mark_center_cell_color
+
+    @mark_center_cell_color.setter
+    def mark_center_cell_color(self, color: str) -> None:
+        if len(color) == 0:
+            raise ValueError("Empty color name")
+        self._mark_center_cell_color = color
+
+    @staticmethod
+    def _page_starts(size: int, page_size: int, overlap: int) -> List[int]:
+        starts: List[int] = [0]
+        while starts[-1] + page_size < size:
+            starts += [starts[-1] + page_size - overlap]
+        return starts
+
+    def pages(self) -> List[List[Tuple[int, int, int, int]]]:
+        """Rectangles (top, left, bottom, right) of the pages, one list per page row."""
+        height: int = self._symbol_matrix.height
+        width: int = self._symbol_matrix.width
+        return [
+            [
+                (top, left, min(top + self._page_height, height),
+                 min(left + self._page_width, width))
+                for left in PagedPatternWriter._page_starts(
+                    width, self._page_width, self._overlap
+                )
+            ]
+            for top in PagedPatternWriter._page_starts(
+                height, self._page_height, self._overlap
+            )
+        ]
+
+    @staticmethod
+    def page_path(index_path: Path, page_row: int, page_col: int) -> Path:
+        return index_path.parent / (
+            f"{index_path.stem}_p{page_row + 1:02d}_{page_col + 1:02d}.html"
+        )
+
+    def page_paths(self, index_path: Path) -> List[Path]:
+        return [
+            PagedPatternWriter.page_path(index_path, page_row, page_col)
+            for page_row, row in enumerate(self.pages())
+            for page_col, _ in enumerate(row)
+        ]
+
+    @staticmethod
+    def _make_style_tag() -> str:
+        return "\n".join(
+            [
+                "<style>",
+                "table tr th {font-size: 8px; font-weight: normal; color: gray;"
+                " padding: 0px 2px;}",
+                ".pages td {padding: 4px; vertical-align: top; font-size: 12px;}",
+                "</style>",
+            ]
+        )
+
+    @staticmethod
+    def _page_caption(page: Tuple[int, int, int, int]) -> str:
+        top, left, bottom, right = page
+        return f"rows {top + 1} - {bottom}, columns {left + 1} - {right}"
+
+    def write(self, index_path: Path) -> List[Path]:
+        """Write index and pages, pages are named after the index. Paths written, index first."""
+        pages: List[List[Tuple[int, int, int, int]]] = self.pages()
+        height: int = self._symbol_matrix.height
+        width: int = self._symbol_matrix.width
+        page_css: str = "\n".join(
+            [MatrixTableCSS().make_html_style_tag(), PagedPatternWriter._make_style_tag()]
+        )
+        thumbnail_css: MatrixImageCSS = MatrixImageCSS()
+        thumbnail_css.pixel_size = (2, 2)
+        thumbnail_css.show_grid = False
+
+        index_html: List[str] = [
+            f"<p>{width} x {height} stitches, {len(pages)} x {len(pages[0])} pages</p>",
+            '<table class="pages">',
+            "<tbody>",
+        ]
+        written: List[Path] = [index_path]
+        for page_row, row in enumerate(pages):
+            index_html += ["<tr>"]
+            for page_col, page in enumerate(row):
+                top, left, bottom, right = page
+                page_symbols: SymbolMatrix = self._symbol_matrix.crop(
+                    top, left, bottom, right
+                )
+                page_path: Path = PagedPatternWriter.page_path(
+                    index_path, page_row, page_col
+                )
+
+                html_table: MatrixHtmlTable = MatrixHtmlTable(
+                    page_symbols.color_matrix, page_symbols
+                )
+                html_table.show_background_color = False
+                html_table.show_coordinates = True
+                html_table.mark_center_cell = self._mark_center_cell
+                html_table.mark_center_cell_color = self._mark_center_cell_color
+                html_table.place_in_pattern(top, left, height, width)
+
+                with open(str(page_path), "w") as page_file:
+                    page_file.write(
+                        "\n".join(
+                            [
+                                HTML.make_html_open(page_css),
+                                f'<p><a href="{index_path.name}">Index</a>'
+                                f" - page {page_row + 1} / {page_col + 1},"
+                                f" {PagedPatternWriter._page_caption(page)}</p>",
+                                "",
+                            ]
+                        )
+                    )
+                    html_table.write_to(page_file)
+                    page_file.write("\n" + HTML.make_html_close())
+                written += [page_path]
+
+                index_html += [
+                    "<td>",
+                    f'<a href="{page_path.name}">',
+                    MatrixHtmlImage(page_symbols.color_matrix).make_html(),
+                    "</a>",
+                    f"<br>{PagedPatternWriter._page_caption(page)}",
+                    "</td>",
+                ]
+            index_html += ["</tr>"]
+        index_html += ["</tbody>", "</table>"]
+
+        with open(str(index_path), "w") as index_file:
+            index_file.write(
+                HTML(
+                    "\n".join(index_html),
+                    "\n".join(
+                        [
+                            thumbnail_css.make_html_style_tag(),
+                            PagedPatternWriter._make_style_tag(),
+                        ]
+                    ),
+                ).make_html()
+            )
+        return written
@@ -0,0 +1,395 @@
+"""Classes for writing of color plot, stitch pattern and legend to PNG and PDF."""
+from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from html import unescape
+from pathlib import Path
+from PIL import Image, ImageColor, ImageDraw, ImageFont  # type: ignore
+import numpy as np  # type: ignore
+from core.color import Color, ColorMatrix
+from core.symbols import SymbolMatrix
+from in_out.html import MatrixHtmlTable
+
+
+GRID_COLOR: Tuple[int, int, int] = (190, 190, 190)
+SYMBOL_COLOR: Tuple[int, int, int] = (0, 0, 0)
+BACKGROUND_COLOR: Tuple[int, int, int] = (255, 255, 255)
+# larger images are saved without the slow search for the smallest PNG encoding
+OPTIMIZE_MAX_PIXELS: int = 2**22
+# fonts with the symbol glyphs tried in order, Pillow also searches the font
+# directories of Windows and macOS for bare file names
+DEFAULT_FONTS: Tuple[str, ...] = (
+    "DejaVuSans-Bold.ttf",
+    "DejaVuSans.ttf",
+    "seguisym.ttf",
+    "arialbd.ttf",
+    "Arial Unicode.ttf",
+    "Arial Bold.ttf",
+    "LiberationSans-Bold.ttf",
+    "FreeSansBold.ttf",
+)
+
+
+@lru_cache(maxsize=16)
+def find_font(font_name: str = "") -> str:
+    """Font file name or path that can be loaded, first of DEFAULT_FONTS if empty."""
+    candidates: Tuple[str, ...] = (font_name,) if font_name != "" else DEFAULT_FONTS
+    for candidate in candidates:
+        try:
+            ImageFont.truetype(candidate, 12)
+        except OSError:
+            continue
+        return candidate
+    # Pillow's built-in font lacks most symbols, cells would be left blank
+    if font_name != "":
+        raise ValueError(f'Cannot load font "{font_name}" for the symbols')
+    raise ValueError(
+        "None of the fonts "
+        + ", ".join(f'"{candidate}"' for candidate in DEFAULT_FONTS)
+        + " found for the symbols, use [--font] to set a TrueType font file"
+    )
+
+
+@lru_cache(maxsize=16)
+def _load_font(font_name: str, size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(find_font(font_name), size)
+
+
+@lru_cache(maxsize=1024)
+def glyph_mask(symbol: str, cell_size: int, font_name: str) -> np.ndarray:
+    """(cell_size, cell_size) coverage of a symbol centered in a cell, rendered once per size."""
+    mask: Image.Image = Image.new("L", (cell_size, cell_size), 0)
+    draw: ImageDraw.ImageDraw = ImageDraw.Draw(mask)
+    draw.text(
+        (cell_size / 2, cell_size / 2),
+        symbol,
+        fill=255,
+        font=_load_font(font_name, max(1, cell_size - 4)),
+        anchor="mm",
+    )
+    coverage: np.ndarray = np.asarray(mask, dtype=np.uint8)
+    coverage.flags.writeable = False
+    return coverage
+
+
+def _over_background(color: Color) -> np.ndarray:
+    """RGB of a color composed over the white background."""
+    rgb: np.ndarray = np.array([color.red, color.green, color.blue], dtype=np.float64)
+    alpha: float = color.alpha / 255
+    return np.rint(rgb * alpha + np.array(BACKGROUND_COLOR) * (1 - alpha)).astype(
+        np.uint8
+    )
+
+
+class MatrixRaster:
+    """
+    Color plot or stitch pattern as RGB image.
+    One tile per palette entry from cached glyphs, copied into the image per cell.
+    """
+
+    def __init__(
+        self, color_matrix: ColorMatrix, symbol_matrix: Optional[SymbolMatrix] = None
+    ):
+        if color_matrix.is_empty:
+            raise ValueError("Empty color matrix")
+        if symbol_matrix is not None:
+            if symbol_matrix.width != color_matrix.width:
+                raise ValueError(
+                    "Differing width for symbol and color matrix: "
+                    f"{symbol_matrix.width} != {color_matrix.width}"
+                )
+            if symbol_matrix.height != color_matrix.height:
+                raise ValueError(
+                    "Differing height for symbol and color matrix: "
+                    f"{symbol_matrix.height} != {color_matrix.height}"
+                )
+
+        self._color_matrix: ColorMatrix = color_matrix
+        self._symbol_matrix: Optional[SymbolMatrix] = symbol_matrix
+        self._show_background_color: bool = True
+        self._mark_center_cell: bool = True
+        self._mark_center_cell_color: str = "limegreen"
+        self._cell_size: int = 24
+        self._show_grid: bool = True
+        self._font_name: str = ""
+
+    @property
+    def show_background_color(self) -> bool:
+        return self._show_background_color
+
+    @show_background_color.setter
+    def show_background_color(self, flag: bool) -> None:
+        if self._symbol_matrix is None and not flag:
+            raise ValueError("Undefined symbol matrix, cannot disable background color")
+        self._show_background_color = flag
+
+    @property
+    def mark_center_cell(self) -> bool:
+        return self._mark_center_cell
+
+    @mark_center_cell.setter
+    def mark_center_cell(self, flag: bool) -> None:
+        self._mark_center_cell = flag
+
+    @property
+    def mark_center_cell_color(self) -> str:
+        return self._mark_center_cell_color
+
+    @mark_center_cell_color.setter
+    def mark_center_cell_color(self, color: str) -> None:
+        if len(color) == 0:
+            raise ValueError("Empty color name")
+        self._mark_center_cell_color = color
+
+    @property
+    def cell_size(self) -> int:
+        return self._cell_size
+
+    @cell_size.setter
+    def cell_size(self, size: int) -> None:
+        if size < 4:
+            raise ValueError(f"Invalid cell size {size}, must be >= 4")
+        self._cell_size = size
+
+    @property
+    def show_grid(self) -> bool:
+        return self._show_grid
+
+    @show_grid.setter
+    def show_grid(self, flag: bool) -> None:
+        self._show_grid = flag
+
+    @property
+    def font_name(self) -> str:
+        """TrueType font file name or path for the symbols, empty for DEFAULT_FONTS."""
+        return self._font_name
+
+    @font_name.setter
+    def font_name(self, name: str) -> None:
+        self._font_name = name
+
+    def _make_tile(self, color: Color, symbol: Optional[str], fill: np.ndarray) -> np.ndarray:
+        """(cell, cell, 3) tile of one palette entry, symbol blended over fill."""
+        cell: int = self._cell_size
+        tile: np.ndarray = np.empty((cell, cell, 3), dtype=np.uint8)
+        tile[:, :] = fill
+        if symbol is not None and not color.is_transparent:
+            coverage: np.ndarray = glyph_mask(symbol, cell, self._font_name)[:, :, None] / 255
+            tile[:] = np.rint(tile * (1 - coverage) + np.array(SYMBOL_COLOR) * coverage)
+        return tile
+
+    def _palette(self) -> Tuple[List[Color], List[Optional[str]], np.ndarray]:
+        if self._symbol_matrix is None:
+            colors: List[Color] = self._color_matrix.distinct_colors
+            return colors, [None] * len(colors), self._color_matrix.palette_indices
+        palette: List[Tuple[Color, str]] = self._symbol_matrix.palette
+        return (
+            [color for color, _ in palette],
+            [unescape(symbol) for _, symbol in palette],
+            self._symbol_matrix.palette_indices,
+        )
+
+    def _make_tiles(self, colors: List[Color], symbols: List[Optional[str]]) -> np.ndarray:
+        return np.stack(
+            [
+                self._make_tile(
+                    color,
+                    symbol,
+                    _over_background(color)
+                    if self._show_background_color
+                    else np.array(BACKGROUND_COLOR, dtype=np.uint8),
+                )
+                for color, symbol in zip(colors, symbols)
+            ]
+        )
+
+    def _make_region(
+        self, tiles: np.ndarray, top: int, left: int, bottom: int, right: int
+    ) -> Image.Image:
+        """Image of the cells [top, bottom) x [left, right)."""
+        cell: int = self._cell_size
+        colors, symbols, indices = self._palette()
+        height, width = bottom - top, right - left
+
+        # one more pixel row and column for the closing grid lines
+        border: int = 1 if self._show_grid else 0
+        pixels: np.ndarray = np.empty(
+            (height * cell + border, width * cell + border, 3), dtype=np.uint8
+        )
+        pixels[:] = GRID_COLOR
+        # one tile copy per cell, written straight into the preallocated image
+        cells: np.ndarray = pixels[: height * cell, : width * cell].reshape(
+            height, cell, width, cell, 3
+        )
+        np.take(
+            tiles,
+            indices[top:bottom, left:right],
+            axis=0,
+            out=cells.transpose(0, 2, 1, 3, 4),
+            mode="clip",
+        )
+
+        if self._symbol_matrix is not None and self._mark_center_cell:
+            center_rgb: Tuple[int, int, int] = ImageColor.getrgb(
+                self._mark_center_cell_color
+            )[:3]
+            matrix_height, matrix_width = indices.shape
+            for row in set(MatrixHtmlTable._center_indexes(matrix_height)):
+                for col in set(MatrixHtmlTable._center_indexes(matrix_width)):
+                    if not (top <= row < bottom and left <= col < right):
+                        continue
+                    color_idx: int = int(indices[row, col])
+                    if colors[color_idx].is_transparent:
+                        continue
+                    y: int = (row - top) * cell
+                    x: int = (col - left) * cell
+                    pixels[y : y + cell, x : x + cell] = self._make_tile(
+                        colors[color_idx],
+                        symbols[color_idx],
+                        np.array(center_rgb, dtype=np.uint8),
+                    )
+
+        if self._show_grid:
+            # all grid lines including the closing ones in two slice assignments
+            pixels[::cell, :] = GRID_COLOR
+            pixels[:, ::cell] = GRID_COLOR
+
+        return Image.fromarray(pixels, "RGB")
+
+    def make_image(self) -> Image.Image:
+        colors, symbols, _ = self._palette()
+        return self._make_region(
+            self._make_tiles(colors, symbols),
+            0,
+            0,
+            self._color_matrix.height,
+            self._color_matrix.width,
+        )
+
+    def make_pages(self, page_width: int, page_height: int) -> List[Image.Image]:
+        """Pages of page_width x page_height cells, row by row, each rendered on its own."""
+        if page_width <= 0 or page_height <= 0:
+            raise ValueError(
+                f"Invalid page size {page_width} x {page_height} cells, must be > 0"
+            )
+        colors, symbols, _ = self._palette()
+        tiles: np.ndarray = self._make_tiles(colors, symbols)
+        height: int = self._color_matrix.height
+        width: int = self._color_matrix.width
+        pages: List[Image.Image] = []
+        for top in range(0, height, page_height):
+            for left in range(0, width, page_width):
+                pages += [
+                    self._make_region(
+                        tiles,
+                        top,
+                        left,
+                        min(top + page_height, height),
+                        min(left + page_width, width),
+                    )
+                ]
+        return pages
+
+    def write_png(self, path: Path) -> None:
+        image: Image.Image = self.make_image()
+        image.save(
+            str(path), "PNG", optimize=image.width * image.height <= OPTIMIZE_MAX_PIXELS
+        )
+
+    def write_pdf(self, path: Path, page_width: int = 50, page_height: int = 70) -> None:
+        """Multi-page PDF, one page per page_width x page_height cells."""
+        pages: List[Image.Image] = self.make_pages(page_width, page_height)
+        pages[0].save(
+            str(path), "PDF", save_all=True, append_images=pages[1:], resolution=150.0
+        )
+
+
+class LegendRaster:
+    """Symbol to color legend as RGB image."""
+
+    def __init__(self, legend: Dict[str, Color], ignore_transparent: bool = True):
+        if len(legend) == 0:
+            raise ValueError("Empty legend dictionary")
+
+        self._legend: Dict[str, Color] = dict(legend)
+        self._ignore_transparent: bool = ignore_transparent
+        self._cell_size: int = 24
+        self._font_name: str = ""
+        self._stitch_counts: Optional[Dict[str, int]] = None
+
+    @property
+    def cell_size(self) -> int:
+        return self._cell_size
+
+    @cell_size.setter
+    def cell_size(self, size: int) -> None:
+        if size < 4:
+            raise ValueError(f"Invalid cell size {size}, must be >= 4")
+        self._cell_size = size
+
+    @property
+    def stitch_counts(self) -> Optional[Dict[str, int]]:
+        """Number of stitches per symbol, shown in a third column if defined."""
+        return self._stitch_counts
+
+    @stitch_counts.setter
+    def stitch_counts(self, counts: Optional[Dict[str, int]]) -> None:
+        if counts is not None and any(symbol not in counts for symbol in self._legend):
+            raise ValueError("Missing stitch counts of legend symbols")
+        self._stitch_counts = counts
+
+    @property
+    def font_name(self) -> str:
+        """TrueType font file name or path for the symbols, empty for DEFAULT_FONTS."""
+        return self._font_name
+
+    @font_name.setter
+    def font_name(self, name: str) -> None:
+        self._font_name = name
+
+    def make_image(self) -> Image.Image:
+        cell: int = self._cell_size
+        entries: List[Tuple[str, Color]] = [
+            (symbol, color)
+            for symbol, color in self._legend.items()
+            if not (self._ignore_transparent and color.is_transparent)
+        ]
+        bar_width: int = 4 * cell
+        count_width: int = 3 * cell if self._stitch_counts is not None else 0
+        pixels: np.ndarray = np.empty(
+            (max(1, len(entries)) * cell + 1, cell + bar_width + count_width + 1, 3),
+            dtype=np.uint8,
+        )
+        pixels[:] = BACKGROUND_COLOR
+        for row, (symbol, color) in enumerate(entries):
+            top: int = row * cell
+            coverage: np.ndarray = (
+                glyph_mask(unescape(symbol), cell, self._font_name)[:, :, None] / 255
+            )
+            pixels[top : top + cell, :cell] = np.rint(
+                np.array(BACKGROUND_COLOR) * (1 - coverage)
+                + np.array(SYMBOL_COLOR) * coverage
+            )
+            pixels[top : top + cell, cell : cell + bar_width] = _over_background(color)
+
+        pixels[::cell, :] = SYMBOL_COLOR
+        pixels[:, [0, cell, cell + bar_width, -1]] = SYMBOL_COLOR
+        image: Image.Image = Image.fromarray(pixels, "RGB")
+
+        if self._stitch_counts is not None:
+            draw: ImageDraw.ImageDraw = ImageDraw.Draw(image)
+            font: ImageFont.FreeTypeFont = _load_font(self._font_name, max(1, cell - 8))
+            for row, (symbol, _) in enumerate(entries):
+                draw.text(
+                    (image.width - cell / 4, row * cell + cell / 2),
+                    str(self._stitch_counts[symbol]),
+                    fill=SYMBOL_COLOR,
+                    font=font,
+                    anchor="rm",
+                )
+        return image
+
+    def write_png(self, path: Path) -> None:
+        self.make_image().save(str(path), "PNG", optimize=True)
+
+    def write_pdf(self, path: Path) -> None:
+        self.make_image().save(str(path), "PDF", resolution=150.0)
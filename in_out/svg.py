@@ -0,0 +1,209 @@
+"""Classes for writing of color plot and stitch pattern to SVG."""
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+from html import escape, unescape
+from core.color import Color, ColorMatrix
+from core.symbols import SymbolMatrix
+from in_out.html import MatrixHtmlTable
+
+
+class MatrixSvg:
+    """
+    Color plot or stitch pattern as SVG.
+    Colors are one path per palette color, symbols are defined once and placed by <use>.
+    """
+
+    def __init__(
+        self, color_matrix: ColorMatrix, symbol_matrix: Optional[SymbolMatrix] = None
+    ):
+        if color_matrix.is_empty:
+            raise ValueError("Empty color matrix")
+        if symbol_matrix is not None:
+            if symbol_matrix.width != color_matrix.width:
+                raise ValueError(
+                    "Differing width for symbol and color matrix: "
+                    f"{symbol_matrix.width} != {color_matrix.width}"
+                )
+            if symbol_matrix.height != color_matrix.height:
+                raise ValueError(
+                    "Differing height for symbol and color matrix: "
+                    f"{symbol_matrix.height} != {color_matrix.height}"
+                )
+
+        self._color_matrix: ColorMatrix = color_matrix
+        self._symbol_matrix: Optional[SymbolMatrix] = symbol_matrix
+        self._show_background_color: bool = True
+        self._mark_center_cell: bool = True
+        self._mark_center_cell_color: str = "limegreen"
+        self._cell_size: int = 12
+        self._show_grid: bool = True
+
+    @property
+    def show_background_color(self) -> bool:
+        return self._show_background_color
+
+    @show_background_color.setter
+    def show_background_color(self, flag: bool) -> None:
+        if self._symbol_matrix is None and not flag:
+            raise ValueError("Undefined symbol matrix, cannot disable background color")
+        self._show_background_color = flag
+
+    @property
+    def mark_center_cell(self) -> bool:
+        return self._mark_center_cell
+
+    @mark_center_cell.setter
+    def mark_center_cell(self, flag: bool) -> None:
+        self._mark_center_cell = flag
+
+    @property
+    def mark_center_cell_color(self) -> str:
+        return self._mark_center_cell_color
+
+    @mark_center_cell_color.setter
+    def mark_center_cell_color(self, color: str) -> None:
+        if len(color) == 0:
+            raise ValueError("Empty color name")
+        self._mark_center_cell_color = color
+
+    @property
+    def cell_size(self) -> int:
+        return self._cell_size
+
+    @cell_size.setter
+    def cell_size(self, size: int) -> None:
+        if size <= 0:
+            raise ValueError(f"Invalid cell size {size}, must be > 0")
+        self._cell_size = size
+
+    @property
+    def show_grid(self) -> bool:
+        return self._show_grid
+
+    @show_grid.setter
+    def show_grid(self, flag: bool) -> None:
+        self._show_grid = flag
+
+    @staticmethod
+    def _fill(color: Color) -> str:
+        fill: str = f'fill="rgb({color.red},{color.green},{color.blue})"'
+        if color.alpha < 255:
+            fill += f' fill-opacity="{color.alpha / 255:.3f}"'
+        return fill
+
+    def make_svg(self) -> str:
+        return "".join(self.iter_svg())
+
+    def iter_svg(self) -> Iterator[str]:
+        """SVG document, colors as one chunk per color, symbols as one chunk per row."""
+        cell: int = self._cell_size
+        width: int = self._color_matrix.width * cell
+        height: int = self._color_matrix.height * cell
+        # one more pixel for the closing right and bottom grid line
+        border: int = 1 if self._show_grid else 0
+        yield "\n".join(
+            [
+                '<?xml version="1.0" encoding="UTF-8"?>',
+                '<svg xmlns="http://www.w3.org/2000/svg"'
+                ' xmlns:xlink="http://www.w3.org/1999/xlink"'
+                f' width="{width + border}" height="{height + border}"'
+                f' viewBox="0 0 {width + border} {height + border}"'
+                ' shape-rendering="crispEdges">',
+                "<style>",
+                f"text {{font: bold {cell - 1}px sans-serif; text-anchor: middle;"
+                " dominant-baseline: central;}",
+                "</style>",
+            ]
+        )
+        yield from self._iter_defs()
+        yield (
+            f'\n<rect width="{width + border}" height="{height + border}" fill="white"/>'
+        )
+        if self._show_background_color:
+            yield from self._iter_color_paths()
+        if self._symbol_matrix is not None and self._mark_center_cell:
+            yield from self._iter_center_marks()
+        if self._show_grid:
+            yield f'\n<rect width="{width}" height="{height}" fill="url(#grid)"/>'
+            yield (
+                f'\n<path d="M{width}.5 0V{height + 1}M0 {height}.5H{width + 1}"'
+                ' fill="none" stroke="rgb(190,190,190)" stroke-width="1"/>'
+            )
+        if self._symbol_matrix is not None:
+            yield from self._iter_symbol_uses()
+        yield "\n</svg>\n"
+
+    def write_to(self, svg_file: TextIO) -> None:
+        svg_file.writelines(self.iter_svg())
+
+    def _iter_defs(self) -> Iterator[str]:
+        cell: int = self._cell_size
+        defs: List[str] = ["<defs>"]
+        if self._show_grid:
+            defs += [
+                f'<pattern id="grid" width="{cell}" height="{cell}"'
+                ' patternUnits="userSpaceOnUse">',
+                # top and left line of each cell, inside the tile
+                f'<path d="M0 .5H{cell}M.5 0V{cell}" fill="none"'
+                ' stroke="rgb(190,190,190)" stroke-width="1"/>',
+                "</pattern>",
+            ]
+        if self._symbol_matrix is not None:
+            # each symbol once, text relative to the cell origin of the <use>
+            defs += [
+                f'<symbol id="s{idx}" overflow="visible"><text x="{cell / 2:g}"'
+                f' y="{cell / 2:g}">{escape(unescape(symbol))}</text></symbol>'
+                for idx, (_, symbol) in enumerate(self._symbol_matrix.palette)
+            ]
+        defs += ["</defs>"]
+        yield "\n" + "\n".join(defs)
+
+    def _iter_color_paths(self) -> Iterator[str]:
+        """One path per palette color, one rectangle per run."""
+        cell: int = self._cell_size
+        colors: List[Color] = self._color_matrix.distinct_colors
+        run_paths: Dict[int, List[str]] = {}
+        for row_idx, runs in enumerate(self._color_matrix.row_runs()):
+            col_idx: int = 0
+            for color_idx, run_length in runs:
+                run_paths.setdefault(color_idx, []).append(
+                    f"M{col_idx * cell} {row_idx * cell}h{run_length * cell}"
+                    f"v{cell}h-{run_length * cell}z"
+                )
+                col_idx += run_length
+
+        for color_idx, paths in run_paths.items():
+            color: Color = colors[color_idx]
+            if color.is_transparent:
+                continue
+            yield f'\n<path {MatrixSvg._fill(color)} d="{"".join(paths)}"/>'
+
+    def _iter_center_marks(self) -> Iterator[str]:
+        """Center cells marked below grid and symbols."""
+        assert self._symbol_matrix is not None
+        cell: int = self._cell_size
+        palette: List[Tuple[Color, str]] = self._symbol_matrix.palette
+        indices = self._symbol_matrix.palette_indices
+        for row_idx in sorted(set(MatrixHtmlTable._center_indexes(self._color_matrix.height))):
+            for col_idx in sorted(
+                set(MatrixHtmlTable._center_indexes(self._color_matrix.width))
+            ):
+                if palette[int(indices[row_idx, col_idx])][0].is_transparent:
+                    continue
+                yield (
+                    f'\n<rect x="{col_idx * cell}" y="{row_idx * cell}" width="{cell}"'
+                    f' height="{cell}" fill="{escape(self._mark_center_cell_color)}"/>'
+                )
+
+    def _iter_symbol_uses(self) -> Iterator[str]:
+        """Symbols of one row per group."""
+        assert self._symbol_matrix is not None
+        cell: int = self._cell_size
+        palette: List[Tuple[Color, str]] = self._symbol_matrix.palette
+        for row_idx, row in enumerate(self._symbol_matrix.palette_indices.tolist()):
+            row_svg: List[str] = [f'<g transform="translate(0,{row_idx * cell})">']
+            for col_idx, idx in enumerate(row):
+                if palette[idx][0].is_transparent:
+                    continue
+                row_svg += [f'<use xlink:href="#s{idx}" x="{col_idx * cell}"/>']
+            row_svg += ["</g>"]
+            yield "\n" + "".join(row_svg)
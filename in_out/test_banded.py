@@ -0,0 +1,112 @@
+"""Banded generation of pattern files."""
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from pathlib import Path
+from PIL import Image  # type: ignore
+from in_out.banded import BandedPatternWriter
+from in_out.html import HTML, MatrixHtmlTable, MatrixTableCSS, LegendHtmlTable, LegendCSS
+from core.image import PngReader
+from core.color import ColorMatrix
+from core.symbols import SymbolMatrix, HtmlSymbolProvider
+
+
+class TestBandedPatternWriter(TestCase):
+
+    def test_banded_equals_full(self) -> None:
+        """
+        Write pattern files in bands of rows, compare to HTML generated from the full image.
+        """
+        print(TestBandedPatternWriter.test_banded_equals_full.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+
+        color_matrix: ColorMatrix = reader.read()
+        symbol_matrix: SymbolMatrix = SymbolMatrix(color_matrix, HtmlSymbolProvider())
+        css: MatrixTableCSS = MatrixTableCSS()
+        color_css: MatrixTableCSS = MatrixTableCSS()
+        color_css.colors = color_matrix.distinct_colors
+        stitch_html: MatrixHtmlTable = MatrixHtmlTable(color_matrix, symbol_matrix)
+        stitch_html.show_background_color = False
+        color_html: MatrixHtmlTable = MatrixHtmlTable(color_matrix)
+        color_html.class_colors = color_css.colors
+        expected_color: str = HTML(
+            color_html.make_html(), color_css.make_html_style_tag()
+        ).make_html()
+        merged_html: MatrixHtmlTable = MatrixHtmlTable(color_matrix)
+        merged_html.merge_runs = True
+        merged_html.class_colors = color_css.colors
+        expected_merged: str = HTML(
+            merged_html.make_html(), color_css.make_html_style_tag()
+        ).make_html()
+        expected_stitch: str = HTML(
+            stitch_html.make_html(), css.make_html_style_tag()
+        ).make_html()
+
+        legend_html: LegendHtmlTable = LegendHtmlTable(symbol_matrix.legend)
+        legend_html.stitch_counts = symbol_matrix.stitch_counts()
+        expected_legend: str = HTML(
+            legend_html.make_html(), LegendCSS().make_html_style_tag()
+        ).make_html()
+
+        stitch_html.chunk_rows = 16
+        chunked_css: MatrixTableCSS = MatrixTableCSS()
+        chunked_css.chunked_layout = True
+        expected_chunked: str = HTML(
+            stitch_html.make_html(), chunked_css.make_html_style_tag()
+        ).make_html()
+
+        for band_height in [1, 10, 117, 500]:
+            print(f'band height {band_height}')
+            with TemporaryDirectory() as out_dir:
+                out_path: Path = Path(out_dir)
+                writer: BandedPatternWriter = BandedPatternWriter(
+                    reader, HtmlSymbolProvider(), band_height
+                )
+                writer.write(out_path / 'color.html', out_path / 'stitch.html',
+                             out_path / 'legend.html')
+
+                self.assertEqual(expected_color, (out_path / 'color.html').read_text(),
+                                 'color plot differs')
+                self.assertEqual(expected_stitch, (out_path / 'stitch.html').read_text(),
+                                 'stitch pattern differs')
+                self.assertEqual(expected_legend, (out_path / 'legend.html').read_text(),
+                                 'legend differs')
+
+                writer.merge_runs = True
+                writer.write(out_path / 'color.html', out_path / 'stitch.html',
+                             out_path / 'legend.html')
+                self.assertEqual(expected_merged, (out_path / 'color.html').read_text(),
+                                 'merged color plot differs')
+
+                writer = BandedPatternWriter(reader, HtmlSymbolProvider(), band_height)
+                writer.chunk_rows = 16
+                writer.write(out_path / 'color.html', out_path / 'stitch.html',
+                             out_path / 'legend.html')
+                self.assertEqual(expected_chunked, (out_path / 'stitch.html').read_text(),
+                                 'chunked stitch pattern differs')
+
+        print('> OK')
+
+    def test_truecolor_rejected(self) -> None:
+        """
+        Truecolor PNG files are decoded at once and not read in bands.
+        """
+        print(TestBandedPatternWriter.test_truecolor_rejected.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        with TemporaryDirectory() as out_dir:
+            out_path: Path = Path(out_dir)
+            with Image.open(str(path)) as img:
+                img.convert('RGBA').save(str(out_path / 'rgba.png'))
+            reader: PngReader = PngReader()
+            reader.file_name = str(out_path / 'rgba.png')
+
+            writer: BandedPatternWriter = BandedPatternWriter(reader, HtmlSymbolProvider(), 10)
+            self.assertRaises(ValueError, writer.write, out_path / 'color.html',
+                              out_path / 'stitch.html', out_path / 'legend.html')
+
+        print('> OK')
@@ -0,0 +1,61 @@
+"""Conversion of many PNG files."""
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from shutil import copyfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from in_out.batch import BatchResult, find_png_files, run_batch
+
+
+def _convert(png_file: Path) -> List[Path]:
+    if png_file.stem.startswith('bad'):
+        raise ValueError('too many colors')
+    if png_file.stem.startswith('existing'):
+        raise FileExistsError(str(png_file.with_suffix('.html')))
+    png_file.with_suffix('.txt').write_text(png_file.name)
+    return [png_file.with_suffix('.txt')]
+
+
+class TestBatch(TestCase):
+
+    def test_find_and_run(self) -> None:
+        """
+        Find PNG files of directories and globs, convert them with one and more jobs,
+        failed files are in the summary.
+        """
+        print(TestBatch.test_find_and_run.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        with TemporaryDirectory() as out_dir:
+            folder: Path = Path(out_dir)
+            for name in ('b.png', 'a.png', 'bad.png', 'existing.png', 'a_legend.png'):
+                copyfile(str(path), str(folder / name))
+            (folder / 'notes.txt').write_text('no PNG')
+
+            png_files = find_png_files([out_dir, str(folder / 'a*.png')])
+            self.assertEqual([folder / name for name in
+                              ('a.png', 'b.png', 'bad.png', 'existing.png')], png_files,
+                             'wrong files')
+            self.assertEqual([], find_png_files([str(folder / '*.gif')]))
+
+            for jobs in (1, 3):
+                done: Dict[Path, Tuple[Optional[str], List[Path]]] = {}
+                result: BatchResult = run_batch(
+                    _convert, png_files, jobs,
+                    lambda png_file, error, outputs: done.update({png_file: (error, outputs)}))
+                self.assertEqual((None, [folder / 'a.txt']), done[folder / 'a.png'],
+                                 'wrong written files')
+                self.assertEqual([], done[folder / 'bad.png'][1], 'outputs of failed file')
+                self.assertEqual([folder / 'a.png', folder / 'b.png'], result.converted)
+                self.assertEqual('b.png', (folder / 'b.txt').read_text(), 'not converted')
+                self.assertEqual(
+                    [(folder / 'bad.png', 'ValueError: too many colors'),
+                     (folder / 'existing.png',
+                      f'existing file "{str(folder / "existing.html")}"')],
+                    result.errors, 'wrong errors')
+                self.assertTrue(result.make_summary().startswith('Converted 2 of 4 PNG files'))
+
+            self.assertRaises(ValueError, run_batch, _convert, png_files, 0)
+
+        print('> OK')
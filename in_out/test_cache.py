@@ -0,0 +1,103 @@
+"""Content-addressed cache."""
+from typing import Optional
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from pathlib import Path
+import os
+import numpy as np  # type: ignore
+from in_out.cache import ArtifactCache
+from core.image import PngReader
+from core.color import ColorMatrix
+
+
+class TestArtifactCache(TestCase):
+
+    def test_files_and_matrix(self) -> None:
+        """
+        Store and restore output files and a decoded image, keys differ by options.
+        """
+        print(TestArtifactCache.test_files_and_matrix.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+
+        color_matrix: ColorMatrix = reader.read()
+
+        with TemporaryDirectory() as out_dir:
+            folder: Path = Path(out_dir)
+            cache: ArtifactCache = ArtifactCache(folder / 'cache')
+            key: str = ArtifactCache.make_key('abc', {'symbols': 'default'})
+            self.assertNotEqual(key, ArtifactCache.make_key('abc', {'symbols': 'letters'}))
+            self.assertEqual(key, ArtifactCache.make_key('abc', {'symbols': 'default'}))
+
+            self.assertIsNone(cache.file_names(key))
+            self.assertIsNone(cache.restore(key, folder))
+            output: Path = folder / 'a_legend.html'
+            output.write_text('legend')
+            cache.store(key, [output])
+            output.unlink()
+            self.assertEqual(['a_legend.html'], cache.file_names(key))
+            self.assertEqual([output], cache.restore(key, folder))
+            self.assertEqual('legend', output.read_text(), 'content differs')
+
+            matrix_key: str = ArtifactCache.make_key('abc', {'max_colors': 64})
+            self.assertIsNone(cache.load_matrix(matrix_key))
+            cache.store_matrix(matrix_key, color_matrix)
+            cached: Optional[ColorMatrix] = cache.load_matrix(matrix_key)
+            assert cached is not None
+            self.assertEqual(color_matrix.distinct_colors, cached.distinct_colors)
+            self.assertTrue(np.array_equal(color_matrix.palette_indices,
+                                           cached.palette_indices), 'indexes differ')
+
+        print('> OK')
+
+    def test_eviction(self) -> None:
+        """
+        Least recently used entries are removed once the cache is too large,
+        stale temporary directories when opened and on eviction.
+        """
+        print(TestArtifactCache.test_eviction.__doc__)
+
+        self.assertRaises(ValueError, ArtifactCache, Path('.'), 0)
+
+        with TemporaryDirectory() as out_dir:
+            folder: Path = Path(out_dir)
+            cache: ArtifactCache = ArtifactCache(folder / 'cache', 2500)
+            output: Path = folder / 'out.html'
+            output.write_text('x' * 1000)
+
+            keys = [ArtifactCache.make_key(str(idx), {}) for idx in range(3)]
+            for age, key in enumerate(keys[:2]):
+                cache.store(key, [output])
+                os.utime(str(folder / 'cache' / key), (1000 + age, 1000 + age))
+            # use of the older entry makes the newer one the least recently used
+            self.assertIsNotNone(cache.restore(keys[0], folder))
+            cache.store(keys[2], [output])
+
+            self.assertIsNotNone(cache.file_names(keys[0]), 'used entry removed')
+            self.assertIsNone(cache.file_names(keys[1]), 'least recently used kept')
+            self.assertIsNotNone(cache.file_names(keys[2]), 'new entry removed')
+            self.assertEqual(2000, cache.size)
+
+            # the new entry is kept, even if larger than the cache
+            output.write_text('x' * 3000)
+            cache.store(ArtifactCache.make_key('large', {}), [output])
+            self.assertEqual(3000, cache.size)
+
+            # temporary directories of died runs are removed, those in use are kept
+            stale: Path = folder / 'cache' / '.stale.1.tmp'
+            stale.mkdir()
+            (stale / 'out.html').write_text('x')
+            os.utime(str(stale), (1000, 1000))
+            in_use: Path = folder / 'cache' / '.in_use.2.tmp'
+            in_use.mkdir()
+            ArtifactCache(folder / 'cache', 2500)
+            self.assertFalse(stale.exists(), 'stale temporary directory kept')
+            self.assertTrue(in_use.exists(), 'temporary directory in use removed')
+            os.utime(str(in_use), (1000, 1000))
+            cache.store(ArtifactCache.make_key('other', {}), [output])
+            self.assertFalse(in_use.exists(), 'stale temporary directory kept on eviction')
+
+        print('> OK')
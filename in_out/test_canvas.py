@@ -0,0 +1,75 @@
+"""Canvas viewer output."""
+from unittest import TestCase
+from pathlib import Path
+from base64 import b64decode
+import json
+import numpy as np
+from in_out.canvas import MatrixCanvasViewer
+from core.image import PngReader
+from core.color import ColorMatrix
+from core.symbols import SymbolMatrix, HtmlSymbolProvider
+
+
+class TestMatrixCanvasViewer(TestCase):
+
+    def test_index_buffer(self) -> None:
+        """
+        Generate the stitch pattern viewer, decode palette and index buffer from the HTML.
+        """
+        print(TestMatrixCanvasViewer.test_index_buffer.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+
+        color_matrix: ColorMatrix = reader.read()
+        symbol_matrix: SymbolMatrix = SymbolMatrix(color_matrix, HtmlSymbolProvider())
+        viewer: MatrixCanvasViewer = MatrixCanvasViewer(color_matrix, symbol_matrix)
+        viewer.show_background_color = False
+        html: str = viewer.make_html()
+
+        pattern = json.loads(html.split('const pattern = ')[1].split(';\n')[0])
+        self.assertEqual([color_matrix.width, color_matrix.height],
+                         [pattern['width'], pattern['height']], 'wrong size')
+        self.assertEqual([[c.red, c.green, c.blue, c.alpha] for c, _ in symbol_matrix.palette],
+                         pattern['palette'], 'palette differs')
+        self.assertEqual(len(symbol_matrix.palette), len(pattern['symbols']), 'symbols')
+        self.assertFalse(any('&' in symbol for symbol in pattern['symbols']),
+                         'symbols must be text, not HTML entities')
+
+        indices: np.ndarray = np.frombuffer(
+            b64decode(html.split('pattern.indices = "')[1].split('"')[0]), dtype=np.uint8
+        ).reshape(color_matrix.height, color_matrix.width)
+        np.testing.assert_array_equal(symbol_matrix.palette_indices, indices)
+
+        print('about one byte per cell:', len(html), 'bytes for',
+              color_matrix.width * color_matrix.height, 'cells')
+        self.assertLess(len(html), 2 * color_matrix.width * color_matrix.height + 8000,
+                        'viewer too large')
+
+        with self.assertRaises(ValueError):
+            MatrixCanvasViewer(color_matrix).show_background_color = False
+
+        print('> OK')
+
+    def test_chunked_uint16_indices(self) -> None:
+        """
+        Encode more than 256 colors as 16-bit indexes in chunks, decode and compare.
+        """
+        print(TestMatrixCanvasViewer.test_chunked_uint16_indices.__doc__)
+
+        pixels: np.ndarray = np.zeros((300, 701, 4), dtype=np.uint8)
+        pixels[:, :, 0] = (np.arange(300 * 701) % 300).reshape(300, 701) % 256
+        pixels[:, :, 1] = (np.arange(300 * 701) % 300).reshape(300, 701) // 256
+        pixels[:, :, 3] = 255
+        color_matrix: ColorMatrix = ColorMatrix(pixels)
+        html: str = MatrixCanvasViewer(color_matrix).make_html()
+
+        self.assertIn('"index_size": 2', html, 'expected 16-bit indexes')
+        indices: np.ndarray = np.frombuffer(
+            b64decode(html.split('pattern.indices = "')[1].split('"')[0]), dtype='<u2'
+        ).reshape(color_matrix.height, color_matrix.width)
+        np.testing.assert_array_equal(color_matrix.palette_indices, indices)
+
+        print('> OK')
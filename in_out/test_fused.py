@@ -0,0 +1,102 @@
+"""Outputs rendered by one walk over the pattern."""
+from typing import Dict, Optional
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from io import StringIO
+from pathlib import Path
+from in_out.fused import FusedPatternRenderer, HtmlTableSink, StitchCountSink
+from in_out.fused import write_html_pattern
+from in_out.html import HTML, MatrixHtmlTable, MatrixTableCSS, LegendHtmlTable, LegendCSS
+from core.image import PngReader
+from core.color import ColorMatrix
+from core.symbols import SymbolMatrix, HtmlSymbolProvider
+
+
+class TestFusedPatternRenderer(TestCase):
+
+    def test_fused_equals_separate(self) -> None:
+        """
+        Render color plot and stitch pattern in one walk, compare to the documents of
+        the tables, check the stitch counts.
+        """
+        print(TestFusedPatternRenderer.test_fused_equals_separate.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+
+        color_matrix: ColorMatrix = reader.read()
+        symbol_matrix: SymbolMatrix = SymbolMatrix(color_matrix, HtmlSymbolProvider())
+
+        for chunk_rows in (0, 16):
+            color_html: MatrixHtmlTable = MatrixHtmlTable(color_matrix)
+            color_html.merge_runs = True
+            stitch_html: MatrixHtmlTable = MatrixHtmlTable(color_matrix, symbol_matrix)
+            stitch_html.show_background_color = False
+            stitch_html.mark_center_cell_color = 'cyan'
+            for html_table in (color_html, stitch_html):
+                html_table.chunk_rows = chunk_rows
+            css: str = MatrixTableCSS().make_html_style_tag()
+
+            color_file: StringIO = StringIO()
+            stitch_file: StringIO = StringIO()
+            counter: StitchCountSink = StitchCountSink()
+            renderer: FusedPatternRenderer = FusedPatternRenderer(symbol_matrix)
+            renderer.add_sink(HtmlTableSink(color_html, color_file, css))
+            renderer.add_sink(HtmlTableSink(stitch_html, stitch_file, css))
+            renderer.add_sink(counter)
+            renderer.render()
+
+            self.assertEqual(HTML(color_html.make_html(), css).make_html(),
+                             color_file.getvalue(), 'color plot differs')
+            self.assertEqual(HTML(stitch_html.make_html(), css).make_html(),
+                             stitch_file.getvalue(), 'stitch pattern differs')
+
+            counts = counter.stitch_counts
+            self.assertEqual(list(symbol_matrix.legend), list(counts), 'symbols differ')
+            self.assertEqual(color_matrix.color_counts(), list(counts.values()),
+                             'counts differ')
+
+        print('> OK')
+
+    def test_write_html_pattern(self) -> None:
+        """
+        Write both tables and the legend with stitch counts to files.
+        """
+        print(TestFusedPatternRenderer.test_write_html_pattern.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+
+        color_matrix: ColorMatrix = reader.read()
+        symbol_matrix: SymbolMatrix = SymbolMatrix(color_matrix, HtmlSymbolProvider())
+        stitch_html: MatrixHtmlTable = MatrixHtmlTable(color_matrix, symbol_matrix)
+        stitch_html.show_background_color = False
+        legend_html: LegendHtmlTable = LegendHtmlTable(symbol_matrix.legend)
+
+        with TemporaryDirectory() as out_dir:
+            stitch_path: Path = Path(out_dir) / 'stitch.html'
+            legend_path: Path = Path(out_dir) / 'legend.html'
+            write_html_pattern(
+                symbol_matrix, [(stitch_path, stitch_html, '')],
+                (legend_path, legend_html, LegendCSS().make_html_style_tag()))
+
+            self.assertEqual(HTML(stitch_html.make_html()).make_html(),
+                             stitch_path.read_text(), 'stitch pattern differs')
+            legend: str = legend_path.read_text()
+            stitch_counts: Optional[Dict[str, int]] = legend_html.stitch_counts
+            assert stitch_counts is not None
+            self.assertEqual(symbol_matrix.stitch_counts(), stitch_counts,
+                             'counts differ from the symbol matrix')
+            self.assertEqual(color_matrix.width * color_matrix.height,
+                             sum(stitch_counts.values()), 'wrong total')
+            for symbol, count in stitch_counts.items():
+                if not symbol_matrix.legend[symbol].is_transparent:
+                    self.assertIn(f'<td>\n{count}\n</td>', legend, 'count missing')
+
+        self.assertRaises(ValueError, setattr, legend_html, 'stitch_counts', {})
+
+        print('> OK')
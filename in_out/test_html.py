@@ -1,9 +1,17 @@
+from typing import List
 from unittest import TestCase
 from in_out.html import MatrixHtmlTable, MatrixTableCSS, HTML, LegendHtmlTable, LegendCSS
+from in_out.html import MatrixHtmlImage, MatrixImageCSS, PHtml
+from base64 import b64decode
+from io import BytesIO
+from PIL import Image
 from core.image import PngReader
-from core.color import ColorMatrix
+from core.color import ColorMatrix, RleColorMatrix
 from core.symbols import SymbolMatrix, HtmlSymbolProvider
 from pathlib import Path
+from io import StringIO
+import numpy as np
+import re
 
 
 class TestColorMatrixHtmlTable(TestCase):
@@ -57,6 +65,13 @@ class TestHTMLandCSS(TestCase):
         html: HTML = HTML(html_table.make_html(), header_html=css.make_html_style_tag())
         
         html_graphics_str: str = html.make_html()
+        # no background classes in the style, cells carry their color
+        self.assertNotIn('class="c', html_graphics_str, 'undefined class')
+        self.assertEqual(color_matrix.width * color_matrix.height,
+                         html_graphics_str.count('<td style="background-color: rgba('))
+        html_table.class_colors = color_matrix.distinct_colors
+        self.assertNotIn('<td style=', html_table.make_html(), 'inline background')
+        html_table.class_colors = []
         print('- open -')
         print(html_graphics_str[:25])
         print('- close -')
@@ -89,3 +104,225 @@ class TestHTMLandCSS(TestCase):
             html_file.write(html_legend_str)
 
         print('> OK')
+
+
+class TestRunLengthHtml(TestCase):
+
+    def test_rle_html_equals_html(self) -> None:
+        """
+        Generate HTML tables from run-length encoded matrices, compare to array based ones.
+        """
+        print(TestRunLengthHtml.test_rle_html_equals_html.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+
+        color_matrix: ColorMatrix = reader.read()
+        rle_matrix: RleColorMatrix = RleColorMatrix.from_color_matrix(color_matrix)
+
+        self.assertEqual(MatrixHtmlTable(color_matrix).make_html(),
+                         MatrixHtmlTable(rle_matrix).make_html(), 'color plot differs')
+
+        symbol_matrix: SymbolMatrix = SymbolMatrix(color_matrix, HtmlSymbolProvider())
+        rle_symbol_matrix: SymbolMatrix = SymbolMatrix(rle_matrix, HtmlSymbolProvider())
+        self.assertEqual(symbol_matrix.stitch_counts(), rle_symbol_matrix.stitch_counts())
+
+        html_table: MatrixHtmlTable = MatrixHtmlTable(color_matrix, symbol_matrix)
+        html_table.show_background_color = False
+        rle_html_table: MatrixHtmlTable = MatrixHtmlTable(rle_matrix, rle_symbol_matrix)
+        rle_html_table.show_background_color = False
+        self.assertEqual(html_table.make_html(), rle_html_table.make_html(),
+                         'stitch pattern differs')
+        self.assertIsNone(rle_matrix._indices, 'runs expanded to palette indexes')
+
+        print('> OK')
+
+
+class TestStreamingHtml(TestCase):
+
+    def test_write_to_equals_make_html(self) -> None:
+        """
+        Stream color plot, stitch pattern and legend to a file object, compare to make_html.
+        """
+        print(TestStreamingHtml.test_write_to_equals_make_html.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+
+        color_matrix: ColorMatrix = reader.read()
+        symbol_matrix: SymbolMatrix = SymbolMatrix(color_matrix, HtmlSymbolProvider())
+        stitch_table: MatrixHtmlTable = MatrixHtmlTable(color_matrix, symbol_matrix)
+        stitch_table.show_background_color = False
+        css: MatrixTableCSS = MatrixTableCSS()
+
+        html_tables: List[PHtml] = [MatrixHtmlTable(color_matrix), stitch_table,
+                                    LegendHtmlTable(symbol_matrix.legend)]
+        for html_table in html_tables:
+            chunks = list(html_table.iter_html())
+            self.assertTrue(len(chunks) > 2, 'expected one chunk per row')
+            self.assertEqual(html_table.make_html(), ''.join(chunks), 'chunks differ')
+
+            html_file: StringIO = StringIO()
+            HTML.write_document(html_file, html_table, css.make_html_style_tag())
+            self.assertEqual(
+                HTML(html_table.make_html(), css.make_html_style_tag()).make_html(),
+                html_file.getvalue(), 'streamed document differs')
+
+        print('> OK')
+
+
+class TestRowCacheHtml(TestCase):
+
+    def test_row_cache_equals_uncached(self) -> None:
+        """
+        Render a striped pattern with repeated rows, with and without the row cache.
+        """
+        print(TestRowCacheHtml.test_row_cache_equals_uncached.__doc__)
+
+        palette: np.ndarray = np.array(
+            [[255, 0, 0, 255], [0, 0, 255, 255], [0, 0, 0, 0]], dtype=np.uint8
+        )
+        indices: np.ndarray = np.zeros((40, 30), dtype=np.uint8)
+        indices[::4, :] = 1
+        indices[:, 10:12] = 2
+        color_matrix: ColorMatrix = ColorMatrix.from_palette(palette, indices)
+        symbol_matrix: SymbolMatrix = SymbolMatrix(color_matrix, HtmlSymbolProvider())
+
+        for size in [1, 2, 1024]:
+            html_table: MatrixHtmlTable = MatrixHtmlTable(color_matrix, symbol_matrix)
+            html_table.row_cache_size = size
+            uncached_table: MatrixHtmlTable = MatrixHtmlTable(color_matrix, symbol_matrix)
+            uncached_table.row_cache_size = 0
+            self.assertEqual(uncached_table.make_html(), html_table.make_html(),
+                             f'cache size {size}: HTML differs')
+
+        rows = MatrixHtmlTable(color_matrix, symbol_matrix).make_html_rows()
+        self.assertEqual(rows[1], rows[2], 'repeated rows differ')
+        self.assertNotEqual(rows[18], rows[19], 'center row not marked')
+        self.assertEqual(2, sum('<div style=' in row for row in rows), 'expected 2 marked rows')
+
+        with self.assertRaises(ValueError):
+            MatrixHtmlTable(color_matrix).row_cache_size = -1
+
+        print('> OK')
+
+
+class TestColspanHtml(TestCase):
+
+    def test_merge_runs(self) -> None:
+        """
+        Merge runs of one color with colspan, each row must still span the full width.
+        """
+        print(TestColspanHtml.test_merge_runs.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+
+        color_matrix: ColorMatrix = reader.read()
+        html_table: MatrixHtmlTable = MatrixHtmlTable(color_matrix)
+        html_table.merge_runs = True
+        html: str = html_table.make_html()
+        html_rows = html_table.make_html_rows()
+
+        self.assertIn(f'<col span="{color_matrix.width}">', html, 'no column group')
+        self.assertEqual(color_matrix.height, len(html_rows), 'wrong number of rows')
+        for row_html, runs in zip(html_rows, color_matrix.row_runs()):
+            self.assertEqual(len(runs), row_html.count('<td'), 'expected one cell per run')
+            cols: int = sum(
+                int(cell.split('colspan="')[1].split('"')[0]) if 'colspan' in cell else 1
+                for cell in row_html.split('<td')[1:]
+            )
+            self.assertEqual(color_matrix.width, cols, 'row does not span the width')
+
+        self.assertLess(len(html), len(MatrixHtmlTable(color_matrix).make_html()),
+                        'merged HTML not smaller')
+
+        symbol_matrix: SymbolMatrix = SymbolMatrix(color_matrix, HtmlSymbolProvider())
+        with self.assertRaises(ValueError):
+            MatrixHtmlTable(color_matrix, symbol_matrix).merge_runs = True
+
+        print('> OK')
+
+
+class TestImageHtml(TestCase):
+
+    def test_embedded_image(self) -> None:
+        """
+        Write the color plot as embedded PNG, decode the data URI and compare the pixels.
+        """
+        print(TestImageHtml.test_embedded_image.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+
+        color_matrix: ColorMatrix = reader.read()
+        html_image: MatrixHtmlImage = MatrixHtmlImage(color_matrix)
+        html: str = HTML(html_image.make_html(),
+                         MatrixImageCSS().make_html_style_tag()).make_html()
+        self.assertIn('image-rendering: pixelated', html, 'no pixelated rendering')
+        self.assertIn('--cols: 70; --rows: 117;', html, 'no size')
+
+        data: str = html.split('base64,')[1].split('"')[0]
+        image: Image.Image = Image.open(BytesIO(b64decode(data)))
+        self.assertEqual('P', image.mode, 'expected indexed PNG')
+        np.testing.assert_array_equal(color_matrix.pixels,
+                                      np.asarray(image.convert('RGBA')))
+        print(f'size {len(html)} bytes, table {len(MatrixHtmlTable(color_matrix).make_html())}')
+
+        print('> OK')
+
+
+class TestChunkedHtml(TestCase):
+
+    def test_chunked_tables(self) -> None:
+        """
+        Split the stitch pattern into chunks of rows, compare rows to the single table.
+        """
+        print(TestChunkedHtml.test_chunked_tables.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+
+        color_matrix: ColorMatrix = reader.read()
+        symbol_matrix: SymbolMatrix = SymbolMatrix(color_matrix, HtmlSymbolProvider())
+        html_table: MatrixHtmlTable = MatrixHtmlTable(color_matrix, symbol_matrix)
+        html: str = html_table.make_html()
+        html_table.chunk_rows = 50
+        chunked_html: str = html_table.make_html()
+
+        self.assertEqual(3, chunked_html.count('<div class="chunk"'), 'expected 3 chunks')
+        self.assertEqual(3, chunked_html.count('</table>\n</div>'), 'chunks not closed')
+        self.assertIn('--rows: 17;', chunked_html, 'wrong rows of last chunk')
+        self.assertEqual([line for line in html.split('\n') if line.startswith('<tr>')],
+                         [line for line in chunked_html.split('\n')
+                          if line.startswith('<tr>')],
+                         'rows differ')
+
+        # page of rows 40 to 109, chunks of the rows inside the page only
+        page_matrix: SymbolMatrix = symbol_matrix.crop(40, 0, 110, color_matrix.width)
+        page_table: MatrixHtmlTable = MatrixHtmlTable(page_matrix.color_matrix, page_matrix)
+        page_table.chunk_rows = 50
+        page_table.place_in_pattern(40, 0, color_matrix.height, color_matrix.width)
+        page_html: str = page_table.make_html()
+        self.assertEqual(['10', '50', '10'], re.findall(r'--rows: (\d+);', page_html),
+                         'wrong rows of page chunks')
+        self.assertNotIn('<tbody>\n</tbody>', page_html, 'empty chunk')
+
+        css: MatrixTableCSS = MatrixTableCSS()
+        self.assertNotIn('content-visibility', css.make_html_style_tag(), 'unexpected')
+        css.chunked_layout = True
+        style: str = css.make_html_style_tag()
+        self.assertIn('content-visibility: auto;', style, 'no content-visibility')
+        self.assertIn('table-layout: fixed;', style, 'no fixed layout')
+
+        print('> OK')
@@ -0,0 +1,56 @@
+"""Journal of converted files."""
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from pathlib import Path
+from in_out.journal import JobJournal, JournalEntry, file_hash
+
+
+class TestJobJournal(TestCase):
+
+    def test_append_and_resume(self) -> None:
+        """
+        Append entries, read them after an interrupted write, check completed files
+        by content, options and outputs.
+        """
+        print(TestJobJournal.test_append_and_resume.__doc__)
+
+        with TemporaryDirectory() as out_dir:
+            folder: Path = Path(out_dir)
+            png_file: Path = folder / 'a.png'
+            png_file.write_bytes(b'first')
+            output: Path = folder / 'a_legend.html'
+            output.write_text('legend')
+            digest: str = file_hash(png_file)
+            options = {'symbols': 'default', 'chunk_rows': 0}
+
+            journal_path: Path = folder / 'journal.jsonl'
+            journal: JobJournal = JobJournal(journal_path)
+            self.assertFalse(journal.is_completed(png_file, digest, options))
+            journal.append(JournalEntry(str(png_file.absolute()), digest, options,
+                                        JobJournal.FAILED, [str(output)], 'ValueError'))
+            self.assertFalse(journal.is_completed(png_file, digest, options), 'failed')
+
+            # interrupted in the middle of a line
+            with open(str(journal_path), 'a') as journal_file:
+                journal_file.write('{"png_file": "b.p')
+            journal.append(JournalEntry(str(png_file.absolute()), digest, options,
+                                        JobJournal.DONE, [str(output)]))
+            self.assertRaises(ValueError, journal.append,
+                              JournalEntry('c.png', digest, options, 'started', []))
+
+            # as read by the next run
+            journal = JobJournal(journal_path)
+            self.assertEqual([JobJournal.FAILED, JobJournal.DONE],
+                             [entry.status for entry in journal.entries()])
+            self.assertTrue(journal.is_completed(png_file, digest, options), 'not completed')
+            self.assertFalse(journal.is_completed(png_file, digest, {'symbols': 'letters'}),
+                             'options differ')
+
+            png_file.write_bytes(b'second')
+            self.assertFalse(journal.is_completed(png_file, file_hash(png_file), options),
+                             'content differs')
+            output.unlink()
+            self.assertFalse(journal.is_completed(png_file, digest, options),
+                             'output missing')
+
+        print('> OK')
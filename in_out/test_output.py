@@ -0,0 +1,86 @@
+"""Concurrent output stage."""
+from typing import List
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from functools import partial
+from pathlib import Path
+from in_out.output import OutputStage, OutputError, write_html_file
+from in_out.html import MatrixHtmlTable, MatrixTableCSS, LegendHtmlTable, LegendCSS
+from core.image import PngReader
+from core.color import ColorMatrix
+from core.symbols import SymbolMatrix, HtmlSymbolProvider
+
+
+def _fail(message: str) -> None:
+    raise ValueError(message)
+
+
+class TestOutputStage(TestCase):
+
+    def test_parallel_equals_sequential(self) -> None:
+        """
+        Write color plot, stitch pattern and legend with threads, processes and one worker,
+        all files are equal.
+        """
+        print(TestOutputStage.test_parallel_equals_sequential.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+
+        color_matrix: ColorMatrix = reader.read()
+        symbol_matrix: SymbolMatrix = SymbolMatrix(color_matrix, HtmlSymbolProvider())
+        color_html: MatrixHtmlTable = MatrixHtmlTable(color_matrix)
+        color_html.merge_runs = True
+        symbol_html: MatrixHtmlTable = MatrixHtmlTable(color_matrix, symbol_matrix)
+        symbol_html.show_background_color = False
+        color_css: MatrixTableCSS = MatrixTableCSS()
+        color_css.colors = color_matrix.distinct_colors
+
+        with TemporaryDirectory() as out_dir:
+            outputs = {}
+            for name, stage in (('sequential', OutputStage(1)),
+                                ('threads', OutputStage(3)),
+                                ('processes', OutputStage(3, processes=True))):
+                files = [Path(out_dir) / f'{name}_{kind}.html'
+                         for kind in ('color', 'stitch', 'legend')]
+                stage.add('color plot', partial(write_html_file, files[0], color_html,
+                                                color_css.make_html_style_tag()))
+                stage.add('stitch pattern', partial(write_html_file, files[1], symbol_html,
+                                                    MatrixTableCSS().make_html_style_tag()))
+                stage.add('legend', partial(write_html_file, files[2],
+                                            LegendHtmlTable(symbol_matrix.legend),
+                                            LegendCSS().make_html_style_tag()))
+                stage.run()
+                self.assertEqual([], stage.job_names, 'jobs not cleared')
+                outputs[name] = [f.read_text() for f in files]
+
+            self.assertEqual(outputs['sequential'], outputs['threads'], 'threads differ')
+            self.assertEqual(outputs['sequential'], outputs['processes'], 'processes differ')
+
+        print('> OK')
+
+    def test_errors(self) -> None:
+        """
+        Failing jobs do not stop the other jobs, all errors are raised in order of the jobs.
+        """
+        print(TestOutputStage.test_errors.__doc__)
+
+        self.assertRaises(ValueError, OutputStage, 0)
+
+        for workers in (1, 3):
+            done: List[str] = []
+            stage: OutputStage = OutputStage(workers)
+            stage.add('first', partial(_fail, 'first failed'))
+            stage.add('second', partial(done.append, 'second'))
+            stage.add('third', partial(_fail, 'third failed'))
+
+            with self.assertRaises(OutputError) as context:
+                stage.run()
+            self.assertEqual(['second'], done, 'job not run')
+            self.assertEqual(['first', 'third'], [name for name, _ in context.exception.errors])
+            self.assertEqual('first: ValueError: first failed\nthird: ValueError: third failed',
+                             str(context.exception))
+
+        print('> OK')
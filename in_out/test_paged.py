@@ -0,0 +1,62 @@
+"""Stitch pattern split into pages."""
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from pathlib import Path
+from in_out.paged import PagedPatternWriter
+from core.image import PngReader
+from core.color import ColorMatrix
+from core.symbols import SymbolMatrix, HtmlSymbolProvider
+
+
+class TestPagedPatternWriter(TestCase):
+
+    def test_pages_and_index(self) -> None:
+        """
+        Split the stitch pattern into overlapping pages, check rectangles, files and index.
+        """
+        print(TestPagedPatternWriter.test_pages_and_index.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+
+        color_matrix: ColorMatrix = reader.read()
+        symbol_matrix: SymbolMatrix = SymbolMatrix(color_matrix, HtmlSymbolProvider())
+        writer: PagedPatternWriter = PagedPatternWriter(symbol_matrix)
+        writer.page_width = 40
+        writer.page_height = 60
+        writer.overlap = 5
+
+        pages = writer.pages()
+        self.assertEqual([(0, 0, 60, 40), (0, 35, 60, 70)], pages[0], 'wrong first row')
+        self.assertEqual([(55, 0, 115, 40), (55, 35, 115, 70)], pages[1], 'wrong second row')
+        self.assertEqual([(110, 0, 117, 40), (110, 35, 117, 70)], pages[2], 'wrong last row')
+
+        page_symbols: SymbolMatrix = symbol_matrix.crop(55, 35, 115, 70)
+        self.assertEqual([row[35:70] for row in symbol_matrix.matrix[55:115]],
+                         page_symbols.matrix, 'page symbols differ')
+
+        with TemporaryDirectory() as out_dir:
+            index_path: Path = Path(out_dir) / 'stitch.html'
+            written = writer.write(index_path)
+            self.assertEqual([index_path] + writer.page_paths(index_path), written)
+            self.assertTrue(all(p.exists() for p in written), 'files missing')
+
+            index: str = index_path.read_text()
+            self.assertEqual(6, index.count('data:image/png;base64,'), 'thumbnails missing')
+            for page_path in written[1:]:
+                self.assertIn(f'href="{page_path.name}"', index, 'link missing')
+
+            page: str = (Path(out_dir) / 'stitch_p02_01.html').read_text()
+            self.assertIn('<tr><th></th><th>1</th>', page, 'no column coordinates')
+            self.assertIn('<tr><th>56</th>', page, 'no row coordinates')
+            self.assertIn('rows 56 - 115, columns 1 - 40', page, 'no caption')
+            marked: int = sum(p.read_text().count('<div style=') for p in written[1:])
+            # center (34, 57), (35, 57) on 2 rows of pages, column 35 also on the right page
+            self.assertEqual(2 * (2 + 1), marked, 'center cells not marked on all pages')
+
+        with self.assertRaises(ValueError):
+            writer.overlap = 40
+
+        print('> OK')
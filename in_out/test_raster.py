@@ -0,0 +1,91 @@
+"""Writing of PNG and PDF images."""
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from pathlib import Path
+import numpy as np
+from PIL import Image
+from in_out.raster import MatrixRaster, LegendRaster, glyph_mask, find_font, DEFAULT_FONTS, GRID_COLOR
+from core.image import PngReader
+from core.color import ColorMatrix
+from core.symbols import SymbolMatrix, HtmlSymbolProvider
+
+
+class TestMatrixRaster(TestCase):
+
+    def test_images_and_pages(self) -> None:
+        """
+        Render color plot, stitch pattern and legend, check cells, glyph cache and PDF pages.
+        """
+        print(TestMatrixRaster.test_images_and_pages.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+
+        color_matrix: ColorMatrix = reader.read()
+        color_raster: MatrixRaster = MatrixRaster(color_matrix)
+        color_raster.cell_size = 10
+        color_image: Image.Image = color_raster.make_image()
+        # one more pixel for the closing grid lines
+        self.assertEqual((color_matrix.width * 10 + 1, color_matrix.height * 10 + 1),
+                         color_image.size, 'wrong image size')
+
+        pixels: np.ndarray = np.asarray(color_image)
+        self.assertEqual(list(GRID_COLOR), pixels[0, 5].tolist(), 'no grid line')
+        self.assertEqual(list(GRID_COLOR), pixels[-1, 5].tolist(), 'no closing grid line')
+        self.assertEqual(pixels[-5, 5].tolist(), pixels[-2, 5].tolist(),
+                         'last pixel row of the cells overwritten')
+        for row, col in [(60, 30), (100, 10)]:
+            color = color_matrix.matrix[row][col]
+            if color.alpha == 255:
+                self.assertEqual([color.red, color.green, color.blue],
+                                 pixels[row * 10 + 5, col * 10 + 5].tolist(),
+                                 f'cell ({row}, {col}) differs')
+
+        symbol_matrix: SymbolMatrix = SymbolMatrix(color_matrix, HtmlSymbolProvider())
+        symbol_raster: MatrixRaster = MatrixRaster(color_matrix, symbol_matrix)
+        symbol_raster.show_background_color = False
+        glyph_mask.cache_clear()
+        symbol_raster.make_image()
+        self.assertLessEqual(glyph_mask.cache_info().misses, len(symbol_matrix.palette),
+                             'expected one glyph per symbol')
+
+        pages = symbol_raster.make_pages(30, 50)
+        self.assertEqual(3 * 3, len(pages), 'wrong number of pages')
+        self.assertEqual((30 * 24 + 1, 50 * 24 + 1), pages[0].size, 'wrong page size')
+        self.assertEqual((10 * 24 + 1, 17 * 24 + 1), pages[-1].size, 'wrong last page size')
+        # pages are rendered on their own, closing grid lines are the next cell's lines
+        symbol_image: np.ndarray = np.asarray(symbol_raster.make_image())
+        for page_idx, page in enumerate(pages):
+            top: int = (page_idx // 3) * 50 * 24
+            left: int = (page_idx % 3) * 30 * 24
+            page_pixels: np.ndarray = np.asarray(page)
+            height, width = page_pixels.shape[:2]
+            self.assertTrue(np.array_equal(
+                symbol_image[top:top + height, left:left + width],
+                page_pixels), f'page {page_idx} differs')
+
+        no_font_raster: MatrixRaster = MatrixRaster(color_matrix, symbol_matrix)
+        no_font_raster.font_name = 'no-such-font.ttf'
+        self.assertRaises(ValueError, no_font_raster.make_image)
+        self.assertRaises(ValueError, find_font, 'no-such-font.ttf')
+        self.assertIn(find_font(), DEFAULT_FONTS, 'default font not of the searched fonts')
+        self.assertEqual(find_font(), find_font(DEFAULT_FONTS[0]), 'wrong first default font')
+
+        with TemporaryDirectory() as out_dir:
+            pdf_path: Path = Path(out_dir) / 'stitch.pdf'
+            symbol_raster.write_pdf(pdf_path, 30, 50)
+            self.assertEqual(9, pdf_path.read_bytes().count(b'/Type /Page\n'),
+                             'wrong number of PDF pages')
+            legend_path: Path = Path(out_dir) / 'legend.png'
+            legend_raster: LegendRaster = LegendRaster(symbol_matrix.legend)
+            legend_raster.write_png(legend_path)
+            self.assertTrue(legend_path.exists(), 'no legend')
+            legend_width: int = legend_raster.make_image().width
+            legend_raster.stitch_counts = symbol_matrix.stitch_counts()
+            self.assertEqual(legend_width + 3 * 24, legend_raster.make_image().width,
+                             'no column of stitch counts')
+            self.assertRaises(ValueError, setattr, legend_raster, 'stitch_counts', {})
+
+        print('> OK')
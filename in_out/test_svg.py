@@ -0,0 +1,70 @@
+"""Writing of SVG files."""
+from unittest import TestCase
+from typing import List, Optional
+from pathlib import Path
+from xml.dom import minidom
+import re
+from in_out.svg import MatrixSvg
+from core.image import PngReader
+from core.color import ColorMatrix
+from core.symbols import SymbolMatrix, HtmlSymbolProvider
+
+
+class TestMatrixSvg(TestCase):
+
+    def test_color_plot_and_stitch_pattern(self) -> None:
+        """
+        Generate color plot and stitch pattern SVG, check paths, symbol definitions and uses.
+        """
+        print(TestMatrixSvg.test_color_plot_and_stitch_pattern.__doc__)
+
+        path: Path = Path(__file__).parent.absolute() / '..' / 'img' / 'Pelican1.png'
+
+        reader: PngReader = PngReader()
+        reader.file_name = str(path)
+
+        color_matrix: ColorMatrix = reader.read()
+        opaque_colors: int = sum(
+            not c.is_transparent for c in color_matrix.distinct_colors
+        )
+        opaque_cells: int = sum(
+            count for c, count in zip(color_matrix.distinct_colors,
+                                      color_matrix.color_counts())
+            if not c.is_transparent
+        )
+
+        color_svg = minidom.parseString(MatrixSvg(color_matrix).make_svg())
+        paths = [p for p in color_svg.getElementsByTagName('path') if p.hasAttribute('fill')
+                 and p.getAttribute('fill') != 'none']
+        self.assertEqual(opaque_colors, len(paths), 'expected one path per color')
+        run_widths = [int(w) for p in paths for w in re.findall(r'h(\d+)v', p.getAttribute('d'))]
+        self.assertEqual(opaque_cells * 12, sum(run_widths), 'runs do not cover the cells')
+
+        symbol_matrix: SymbolMatrix = SymbolMatrix(color_matrix, HtmlSymbolProvider())
+        symbol_svg: MatrixSvg = MatrixSvg(color_matrix, symbol_matrix)
+        symbol_svg.show_background_color = False
+        stitch_svg = minidom.parseString(symbol_svg.make_svg())
+        self.assertEqual(len(symbol_matrix.palette),
+                         len(stitch_svg.getElementsByTagName('symbol')), 'symbols')
+        self.assertEqual(opaque_cells, len(stitch_svg.getElementsByTagName('use')), 'uses')
+        self.assertEqual(0, len([p for p in stitch_svg.getElementsByTagName('path')
+                                 if p.getAttribute('fill') != 'none']),
+                         'no color paths expected')
+
+        root: Optional[minidom.Element] = stitch_svg.documentElement
+        assert root is not None
+        self.assertEqual('http://www.w3.org/1999/xlink', root.getAttribute('xmlns:xlink'))
+        self.assertTrue(all(use.hasAttribute('xlink:href')
+                            for use in stitch_svg.getElementsByTagName('use')), 'no xlink:href')
+        # closing grid line on one more pixel
+        self.assertEqual(str(color_matrix.width * 12 + 1), root.getAttribute('width'))
+        elements: List[minidom.Element] = [
+            node for node in root.childNodes if isinstance(node, minidom.Element)]
+        marks = [idx for idx, node in enumerate(elements) if node.tagName == 'rect'
+                 and node.getAttribute('fill') not in ('white', 'url(#grid)')]
+        grid = [idx for idx, node in enumerate(elements)
+                if node.getAttribute('fill') == 'url(#grid)']
+        self.assertTrue(len(marks) > 0, 'no center marks')
+        self.assertTrue(max(marks) < grid[0], 'center marks cover the grid')
+
+        print('> OK')
@@ -3,19 +3,35 @@
 
 """Main CLI."""
 from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from copy import copy
+from io import StringIO
+import os
 from tki_gui.generate import HtmlFileSet
-from typing import Final, Dict
+from typing import Any, Final, Dict, List, Optional, Tuple
 from core.symbols import HtmlSymbolProvider, SymbolMatrix, HtmlFilledSymbolProvider
 from core.symbols import CharProvider, PSymbolProvider, SkinnySymbolProvider
 from core.image import PngReader
-from core.color import ColorMatrix
+from core.color import ColorMatrix, RleColorMatrix
 from in_out.html import (
     LegendCSS,
     LegendHtmlTable,
-    HTML,
     MatrixTableCSS,
     MatrixHtmlTable,
+    MatrixHtmlImage,
+    MatrixImageCSS,
 )
+from in_out.banded import BandedPatternWriter
+from in_out.canvas import MatrixCanvasViewer
+from in_out.svg import MatrixSvg
+from in_out.raster import MatrixRaster, LegendRaster, find_font
+from in_out.paged import PagedPatternWriter
+from in_out.fused import write_html_pattern
+from in_out.batch import BatchResult, find_png_files, run_batch
+from in_out.journal import JobJournal, JournalEntry, file_hash
+from in_out.cache import ArtifactCache
+from in_out.output import OutputError, OutputStage, write_html_file, write_svg_file
+from functools import partial
 from pathlib import Path
 
 
@@ -30,6 +46,24 @@ class Pytchy:
         self._mark_center_color: str = ""
         self._symbol_provider: PSymbolProvider = HtmlSymbolProvider()
         self._symbol_user_selection: str = ""
+        self._max_width: int = 500
+        self._max_height: int = 500
+        self._band_height: int = 0
+        self._output_format: str = "table"
+        self._color_plot_image: bool = False
+        self._font_name: str = ""
+        self._chunk_rows: int = 0
+        self._page_size: str = ""
+        self._page_dimensions: Tuple[int, int] = (0, 0)
+        self._page_overlap: int = 0
+        self._workers: int = 3
+        self._processes: bool = False
+        self._batch: List[str] = []
+        self._jobs: int = 0
+        self._journal: str = ""
+        self._resume: bool = False
+        self._cache_dir: str = ""
+        self._cache_size: int = 512
 
     def prepare(self) -> None:
         if self._symbol_user_selection == "default":
@@ -43,32 +77,167 @@ class Pytchy:
         else:
             raise ValueError(f'Invalid symbol-set "{args.symbols}"')
 
+        if self._page_size != "":
+            try:
+                page_width, page_height = (
+                    int(size) for size in self._page_size.lower().split("x")
+                )
+            except ValueError:
+                raise ValueError(
+                    f'Invalid page size "{self._page_size}", required <columns>x<rows>'
+                )
+            self._page_dimensions = (page_width, page_height)
+
+        if self._color_plot_image and self._output_format != "table":
+            raise ValueError(
+                f'Color plot image is not supported for output format "{self._output_format}"'
+            )
+
+        if self._workers <= 0:
+            raise ValueError(f"Invalid number of workers {self._workers}, must be > 0")
+
+        if len(self._batch) > 0 and self._png_file != "":
+            raise ValueError("Use either --png or --batch, not both")
+        if self._jobs < 0:
+            raise ValueError(f"Invalid number of jobs {self._jobs}, must be >= 0")
+        if self._journal != "" and len(self._batch) == 0:
+            raise ValueError("Journal is supported for --batch only")
+        if self._resume and self._journal == "":
+            raise ValueError("Resume requires a journal, use --journal <file>")
+        if self._cache_size <= 0:
+            raise ValueError(f"Invalid cache size {self._cache_size} MB, must be > 0")
+
     def _execute_show_maximum_colors(self) -> None:
         print(
             f"Maximum permitted number of colors is {self._symbol_provider.max_number}."
         )
 
-    def _execute_generate_pattern_from_png(self) -> None:
-        png_path: Path = Path(self._png_file)
-        if not png_path.exists():
-            raise FileNotFoundError(self._png_file)
+    def _output_files(self, png_path: Path) -> Dict[str, Path]:
         png_parent_folder: Path = png_path.parent
 
         # TODO: redundant - see tki_gui HtmlFileSet, file names should be defined by one class/function
-        html_files: Dict[str, Path] = {
-            "color": png_parent_folder / (png_path.stem + "_color_plot.html"),
-            "stitch": png_parent_folder / (png_path.stem + "_stitch_pattern.html"),
-            "legend": png_parent_folder / (png_path.stem + "_legend.html"),
+        pattern_suffix: str = {"svg": ".svg", "png": ".png", "pdf": ".pdf"}.get(
+            self._output_format, ".html"
+        )
+        legend_suffix: str = pattern_suffix if self._is_raster_format() else ".html"
+        return {
+            "color": png_parent_folder / (png_path.stem + "_color_plot" + pattern_suffix),
+            "stitch": png_parent_folder
+            / (png_path.stem + "_stitch_pattern" + pattern_suffix),
+            "legend": png_parent_folder / (png_path.stem + "_legend" + legend_suffix),
         }
 
+    def _execute_generate_pattern_from_png(self) -> List[Path]:
+        """Write the output files of the PNG, returns the written files."""
+        png_path: Path = Path(self._png_file)
+        if not png_path.exists():
+            raise FileNotFoundError(self._png_file)
+        html_files: Dict[str, Path] = self._output_files(png_path)
+
         if not self._overwrite_existing_files:
             for _, path in html_files.items():
                 if path.exists():
                     raise FileExistsError(str(path))
 
+        cache: Optional[ArtifactCache] = None
+        digest: str = ""
+        if self._cache_dir != "":
+            cache = ArtifactCache(Path(self._cache_dir), self._cache_size * 2**20)
+            digest = file_hash(png_path)
+            restored: Optional[List[Path]] = self._restore_cached_files(
+                cache, digest, png_path
+            )
+            if restored is not None:
+                return restored
+
+        page_files: List[Path] = self._generate_pattern(
+            png_path, html_files, cache, digest
+        )
+        written: List[Path] = list(html_files.values()) + page_files
+        if cache is not None:
+            cache.store(self._output_files_key(digest, png_path), written)
+        return written
+
+    def _output_files_key(self, digest: str, png_path: Path) -> str:
+        # pages link each other by the file names, part of the key
+        return ArtifactCache.make_key(
+            digest, dict(self._options(), name=png_path.stem, version=version)
+        )
+
+    def _restore_cached_files(
+        self, cache: ArtifactCache, digest: str, png_path: Path
+    ) -> Optional[List[Path]]:
+        """Copied files of a cached entry, None if not cached."""
+        key: str = self._output_files_key(digest, png_path)
+        names: Optional[List[str]] = cache.file_names(key)
+        if names is None:
+            return None
+        if not self._overwrite_existing_files:
+            for name in names:
+                if (png_path.parent / name).exists():
+                    raise FileExistsError(str(png_path.parent / name))
+
+        print(f'Copying cached output files of "{str(png_path)}"')
+        return cache.restore(key, png_path.parent)
+
+    def _read_color_matrix(
+        self, png_reader: PngReader, cache: Optional[ArtifactCache], digest: str
+    ) -> ColorMatrix:
+        if cache is None:
+            return png_reader.read()
+
+        key: str = ArtifactCache.make_key(
+            digest,
+            {
+                "max_width": png_reader.width_max,
+                "max_height": png_reader.height_max,
+                "max_colors": png_reader.max_colors,
+                "version": version,
+            },
+        )
+        color_matrix: Optional[ColorMatrix] = cache.load_matrix(key)
+        if color_matrix is None:
+            # the cache keeps the palette indexes, runs are derived after loading
+            run_length_encoded: bool = png_reader.run_length_encoded
+            png_reader.run_length_encoded = False
+            color_matrix = png_reader.read()
+            png_reader.run_length_encoded = run_length_encoded
+            cache.store_matrix(key, color_matrix)
+        if png_reader.run_length_encoded:
+            return RleColorMatrix.from_color_matrix(color_matrix)
+        return color_matrix
+
+    def _generate_pattern(
+        self,
+        png_path: Path,
+        html_files: Dict[str, Path],
+        cache: Optional[ArtifactCache],
+        digest: str,
+    ) -> List[Path]:
+        """Write the output files, returns the files of pages if any."""
         png_reader: PngReader = PngReader()
         png_reader.file_name = self._png_file
-        color_matrix: ColorMatrix = png_reader.read()
+        png_reader.width_max = self._max_width
+        png_reader.height_max = self._max_height
+
+        if self._band_height > 0:
+            if self._output_format != "table":
+                raise ValueError(
+                    f'Band height is not supported for output format "{self._output_format}"'
+                )
+            if self._color_plot_image:
+                raise ValueError("Band height is not supported for the color plot image")
+            if self._page_size != "":
+                raise ValueError("Band height is not supported for pages")
+            self._write_banded(png_reader, html_files)
+            return []
+
+        png_reader.max_colors = self._symbol_provider.max_number
+        # tables are rendered run by run, other outputs need the palette index of each cell
+        png_reader.run_length_encoded = (
+            self._output_format == "table" and not self._color_plot_image
+        )
+        color_matrix: ColorMatrix = self._read_color_matrix(png_reader, cache, digest)
         symbol_matrix: SymbolMatrix = SymbolMatrix(color_matrix, self._symbol_provider)
 
         symbol_matrix_html: MatrixHtmlTable = MatrixHtmlTable(
@@ -83,42 +252,340 @@ class Pytchy:
                 symbol_matrix_html.mark_center_cell_color = self._mark_center_color
 
         color_matrix_html: MatrixHtmlTable = MatrixHtmlTable(color_matrix)
+        color_matrix_html.merge_runs = True
+        for matrix_html in (symbol_matrix_html, color_matrix_html):
+            matrix_html.chunk_rows = self._chunk_rows
 
         matrix_css: MatrixTableCSS = MatrixTableCSS()
+        color_matrix_css: MatrixTableCSS = MatrixTableCSS()
+        color_matrix_css.colors = color_matrix.distinct_colors
+        color_matrix_html.class_colors = color_matrix_css.colors
+        for css in (matrix_css, color_matrix_css):
+            css.chunked_layout = self._chunk_rows > 0
 
         legend_html: LegendHtmlTable = LegendHtmlTable(symbol_matrix.legend)
         legend_css: LegendCSS = LegendCSS()
 
-        with open(str(html_files["color"]), "w") as html_file:
-            print(f'Writing color pattern: "{str(html_files["color"])}"')
-            html_file.write(
-                HTML(
-                    color_matrix_html.make_html(), matrix_css.make_html_style_tag()
-                ).make_html()
+        page_files: List[Path] = []
+        stage: OutputStage = OutputStage(self._workers, self._processes)
+        if self._output_format == "canvas":
+            self._add_canvas_jobs(stage, color_matrix, symbol_matrix, html_files)
+        elif self._output_format == "svg":
+            self._add_svg_jobs(stage, color_matrix, symbol_matrix, html_files)
+        elif self._is_raster_format():
+            self._add_raster_jobs(stage, color_matrix, symbol_matrix, html_files)
+        else:
+            # page settings are validated before anything is announced
+            paged_writer: Optional[PagedPatternWriter] = (
+                self._make_paged_writer(symbol_matrix, html_files["stitch"])
+                if self._page_size != ""
+                else None
             )
-        with open(str(html_files["stitch"]), "w") as html_file:
-            print(f'Writing stitch pattern: "{str(html_files["stitch"])}"')
-            html_file.write(
-                HTML(
-                    symbol_matrix_html.make_html(), matrix_css.make_html_style_tag()
-                ).make_html()
+            # tables of the pattern and the legend are written by one job
+            fused_names: List[str] = []
+            tables: List[Tuple[Path, MatrixHtmlTable, str]] = []
+            print(f'Writing color pattern: "{str(html_files["color"])}"')
+            if self._color_plot_image:
+                stage.add(
+                    "color plot",
+                    partial(
+                        write_html_file,
+                        html_files["color"],
+                        MatrixHtmlImage(color_matrix),
+                        MatrixImageCSS().make_html_style_tag(),
+                    ),
+                )
+            else:
+                fused_names += ["color plot"]
+                tables += [
+                    (
+                        html_files["color"],
+                        color_matrix_html,
+                        color_matrix_css.make_html_style_tag(),
+                    )
+                ]
+            if paged_writer is not None:
+                page_files = self._add_pages_job(
+                    stage, paged_writer, html_files["stitch"]
+                )
+            else:
+                print(f'Writing stitch pattern: "{str(html_files["stitch"])}"')
+                fused_names += ["stitch pattern"]
+                tables += [
+                    (
+                        html_files["stitch"],
+                        symbol_matrix_html,
+                        matrix_css.make_html_style_tag(),
+                    )
+                ]
+            print(f'Writing legend: "{str(html_files["legend"])}"')
+            fused_names += ["legend"]
+            # one walk over the pattern for the tables and the stitch counts of the legend
+            stage.add(
+                ", ".join(fused_names),
+                partial(
+                    write_html_pattern,
+                    symbol_matrix,
+                    tables,
+                    (html_files["legend"], legend_html, legend_css.make_html_style_tag()),
+                ),
             )
-        with open(str(html_files["legend"]), "w") as html_file:
+        if self._output_format in ("canvas", "svg"):
+            legend_html.stitch_counts = symbol_matrix.stitch_counts()
             print(f'Writing legend: "{str(html_files["legend"])}"')
-            html_file.write(
-                HTML(
-                    legend_html.make_html(), legend_css.make_html_style_tag()
-                ).make_html()
+            stage.add(
+                "legend",
+                partial(
+                    write_html_file,
+                    html_files["legend"],
+                    legend_html,
+                    legend_css.make_html_style_tag(),
+                ),
             )
+        stage.run()
+        return page_files
+
+    def _add_canvas_jobs(
+        self,
+        stage: OutputStage,
+        color_matrix: ColorMatrix,
+        symbol_matrix: SymbolMatrix,
+        html_files: Dict[str, Path],
+    ) -> None:
+        color_viewer: MatrixCanvasViewer = MatrixCanvasViewer(color_matrix)
+        symbol_viewer: MatrixCanvasViewer = MatrixCanvasViewer(
+            color_matrix, symbol_matrix
+        )
+        symbol_viewer.show_background_color = False
+        if self._mark_center_color != "":
+            if self._mark_center_color.lower() == "none":
+                symbol_viewer.mark_center_cell = False
+            else:
+                symbol_viewer.mark_center_cell = True
+                symbol_viewer.mark_center_cell_color = self._mark_center_color
+
+        print(f'Writing color pattern viewer: "{str(html_files["color"])}"')
+        stage.add(
+            "color plot",
+            partial(
+                write_html_file,
+                html_files["color"],
+                color_viewer,
+                color_viewer.make_html_style_tag(),
+            ),
+        )
+        print(f'Writing stitch pattern viewer: "{str(html_files["stitch"])}"')
+        stage.add(
+            "stitch pattern",
+            partial(
+                write_html_file,
+                html_files["stitch"],
+                symbol_viewer,
+                symbol_viewer.make_html_style_tag(),
+            ),
+        )
+
+    def _add_svg_jobs(
+        self,
+        stage: OutputStage,
+        color_matrix: ColorMatrix,
+        symbol_matrix: SymbolMatrix,
+        html_files: Dict[str, Path],
+    ) -> None:
+        color_svg: MatrixSvg = MatrixSvg(color_matrix)
+        symbol_svg: MatrixSvg = MatrixSvg(color_matrix, symbol_matrix)
+        symbol_svg.show_background_color = False
+        if self._mark_center_color != "":
+            if self._mark_center_color.lower() == "none":
+                symbol_svg.mark_center_cell = False
+            else:
+                symbol_svg.mark_center_cell = True
+                symbol_svg.mark_center_cell_color = self._mark_center_color
+
+        print(f'Writing color pattern: "{str(html_files["color"])}"')
+        stage.add("color plot", partial(write_svg_file, html_files["color"], color_svg))
+        print(f'Writing stitch pattern: "{str(html_files["stitch"])}"')
+        stage.add(
+            "stitch pattern", partial(write_svg_file, html_files["stitch"], symbol_svg)
+        )
+
+    def _make_paged_writer(
+        self, symbol_matrix: SymbolMatrix, index_path: Path
+    ) -> PagedPatternWriter:
+        """Writer of the pages, raises if page settings are invalid or pages exist."""
+        paged_writer: PagedPatternWriter = PagedPatternWriter(symbol_matrix)
+        paged_writer.page_width, paged_writer.page_height = self._page_dimensions
+        paged_writer.overlap = self._page_overlap
+        if self._mark_center_color != "":
+            if self._mark_center_color.lower() == "none":
+                paged_writer.mark_center_cell = False
+            else:
+                paged_writer.mark_center_cell = True
+                paged_writer.mark_center_cell_color = self._mark_center_color
+
+        if not self._overwrite_existing_files:
+            for path in paged_writer.page_paths(index_path):
+                if path.exists():
+                    raise FileExistsError(str(path))
+        return paged_writer
+
+    def _add_pages_job(
+        self, stage: OutputStage, paged_writer: PagedPatternWriter, index_path: Path
+    ) -> List[Path]:
+        print(f'Writing stitch pattern pages, index: "{str(index_path)}"')
+        stage.add("stitch pattern pages", partial(paged_writer.write, index_path))
+        return paged_writer.page_paths(index_path)
+
+    def _is_raster_format(self) -> bool:
+        return self._output_format in ("png", "pdf")
+
+    def _add_raster_jobs(
+        self,
+        stage: OutputStage,
+        color_matrix: ColorMatrix,
+        symbol_matrix: SymbolMatrix,
+        files: Dict[str, Path],
+    ) -> None:
+        # a missing font is reported before anything is announced
+        font_name: str = find_font(self._font_name)
+        color_raster: MatrixRaster = MatrixRaster(color_matrix)
+        color_raster.font_name = font_name
+        symbol_raster: MatrixRaster = MatrixRaster(color_matrix, symbol_matrix)
+        symbol_raster.font_name = font_name
+        symbol_raster.show_background_color = False
+        if self._mark_center_color != "":
+            if self._mark_center_color.lower() == "none":
+                symbol_raster.mark_center_cell = False
+            else:
+                symbol_raster.mark_center_cell = True
+                symbol_raster.mark_center_cell_color = self._mark_center_color
+        legend_raster: LegendRaster = LegendRaster(symbol_matrix.legend)
+        legend_raster.stitch_counts = symbol_matrix.stitch_counts()
+        legend_raster.font_name = font_name
+
+        print(f'Writing color pattern: "{str(files["color"])}"')
+        print(f'Writing stitch pattern: "{str(files["stitch"])}"')
+        print(f'Writing legend: "{str(files["legend"])}"')
+        if self._output_format == "pdf":
+            stage.add("color plot", partial(color_raster.write_pdf, files["color"]))
+            stage.add("stitch pattern", partial(symbol_raster.write_pdf, files["stitch"]))
+            stage.add("legend", partial(legend_raster.write_pdf, files["legend"]))
+        else:
+            stage.add("color plot", partial(color_raster.write_png, files["color"]))
+            stage.add("stitch pattern", partial(symbol_raster.write_png, files["stitch"]))
+            stage.add("legend", partial(legend_raster.write_png, files["legend"]))
+
+    def _write_banded(self, png_reader: PngReader, html_files: Dict[str, Path]) -> None:
+        banded_writer: BandedPatternWriter = BandedPatternWriter(
+            png_reader, self._symbol_provider, self._band_height
+        )
+        banded_writer.merge_runs = True
+        banded_writer.chunk_rows = self._chunk_rows
+        if self._mark_center_color != "":
+            if self._mark_center_color.lower() == "none":
+                banded_writer.mark_center_cell = False
+            else:
+                banded_writer.mark_center_cell = True
+                banded_writer.mark_center_cell_color = self._mark_center_color
+
+        print(
+            f"Writing color pattern, stitch pattern and legend in bands of "
+            f"{self._band_height} rows"
+        )
+        banded_writer.write(html_files["color"], html_files["stitch"], html_files["legend"])
+
+    def _options(self) -> Dict[str, Any]:
+        """Options which change the output files, for the journal."""
+        return {
+            "symbols": self._symbol_user_selection,
+            "mark_center_color": self._mark_center_color,
+            "max_width": self._max_width,
+            "max_height": self._max_height,
+            "band_height": self._band_height,
+            "output_format": self._output_format,
+            "color_plot_image": self._color_plot_image,
+            "font_name": self._font_name,
+            "chunk_rows": self._chunk_rows,
+            "page_size": self._page_size,
+            "page_overlap": self._page_overlap,
+        }
+
+    def _execute_batch(self) -> None:
+        png_files: List[Path] = find_png_files(self._batch)
+        if len(png_files) == 0:
+            raise FileNotFoundError(f'No PNG files in {", ".join(self._batch)}')
+
+        journal: Optional[JobJournal] = None
+        hashes: Dict[Path, str] = {}
+        if self._journal != "":
+            journal = JobJournal(Path(self._journal))
+            hashes = {png_file: file_hash(png_file) for png_file in png_files}
+        if journal is not None and self._resume:
+            options: Dict[str, Any] = self._options()
+            remaining: List[Path] = [
+                png_file
+                for png_file in png_files
+                if not journal.is_completed(png_file, hashes[png_file], options)
+            ]
+            print(
+                f"Resuming, skipping {len(png_files) - len(remaining)} converted PNG files"
+            )
+            png_files = remaining
+
+        jobs: int = self._jobs if self._jobs > 0 else (os.cpu_count() or 1)
+        print(f"Converting {len(png_files)} PNG files with {jobs} jobs")
+        result: BatchResult = run_batch(
+            partial(_convert_png, self),
+            png_files,
+            jobs,
+            partial(self._record, journal, hashes) if journal is not None else None,
+        )
+        print(result.make_summary())
+
+    def _record(
+        self,
+        journal: JobJournal,
+        hashes: Dict[Path, str],
+        png_file: Path,
+        error: Optional[str],
+        outputs: List[Path],
+    ) -> None:
+        journal.append(
+            JournalEntry(
+                png_file=str(png_file.absolute()),
+                sha256=hashes[png_file],
+                options=self._options(),
+                status=JobJournal.DONE if error is None else JobJournal.FAILED,
+                outputs=[str(path.absolute()) for path in outputs],
+                error=error if error is not None else "",
+            )
+        )
 
     def execute(self) -> None:
         if self._show_maximum_colors:
             self._execute_show_maximum_colors()
 
+        elif len(self._batch) > 0:
+            self._execute_batch()
+
         elif self._png_file:
             self._execute_generate_pattern_from_png()
 
 
+def _convert_png(pytchy: Pytchy, png_file: Path) -> List[Path]:
+    """One file of a batch, with a symbol provider of its own and without messages."""
+    file_pytchy: Pytchy = copy(pytchy)
+    file_pytchy._png_file = str(png_file)
+    file_pytchy._batch = []
+    file_pytchy._journal = ""
+    file_pytchy._resume = False
+    # files are the unit of parallel work, one worker per file
+    file_pytchy._workers = 1
+    file_pytchy.prepare()
+    with redirect_stdout(StringIO()):
+        return file_pytchy._execute_generate_pattern_from_png()
+
+
 def _print_error_header():
     print()
     print("!An error occurred!")
@@ -199,6 +666,208 @@ if __name__ == "__main__":
             "color-matrix, symbol-matrix and symbol-to-color legend"
         ),
     )
+    parser.add_argument(
+        "--max-width",
+        action="store",
+        default=500,
+        type=int,
+        required=False,
+        metavar="<pixels>",
+        dest="max_width",
+        help="Maximum width of the PNG in pixels, larger images are rejected.",
+    )
+    parser.add_argument(
+        "--max-height",
+        action="store",
+        default=500,
+        type=int,
+        required=False,
+        metavar="<pixels>",
+        dest="max_height",
+        help="Maximum height of the PNG in pixels, larger images are rejected.",
+    )
+    parser.add_argument(
+        "-b",
+        "--band-height",
+        action="store",
+        default=0,
+        type=int,
+        required=False,
+        metavar="<rows>",
+        dest="band_height",
+        help=(
+            "Process the PNG in bands of <rows> rows to limit memory for very large"
+            " patterns, indexed PNG only. Default 0 processes the whole image at once."
+        ),
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        action="store",
+        default="table",
+        choices=["table", "canvas", "svg", "png", "pdf"],
+        type=str,
+        required=False,
+        metavar="<format>",
+        dest="output_format",
+        help=(
+            "Set the output format of color plot and stitch pattern. Options are:"
+            " table - HTML tables, canvas - viewer painting the visible cells only,"
+            " for patterns too large for tables, svg - scalable SVG files, png - images"
+            " for printing, pdf - multi-page documents for printing"
+        ),
+    )
+    parser.add_argument(
+        "--color-plot-image",
+        action="store_true",
+        required=False,
+        dest="color_plot_image",
+        help=(
+            "Write the color plot as embedded image of the PNG pixels instead of a"
+            " table, only for the table format."
+        ),
+    )
+    parser.add_argument(
+        "--font",
+        action="store",
+        default="",
+        type=str,
+        required=False,
+        metavar="<file>",
+        dest="font_name",
+        help=(
+            "Set the TrueType font file name or path of the symbols, only for the png"
+            " and pdf formats. By default the first of DejaVu Sans, Segoe UI Symbol,"
+            " Arial, Liberation Sans and FreeSans which is found."
+        ),
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        action="store",
+        default=0,
+        type=int,
+        required=False,
+        metavar="<rows>",
+        dest="chunk_rows",
+        help=(
+            "Split the tables into chunks of <rows> rows with fixed layout, browsers"
+            " lay out only the chunks on screen. Default 0 writes one table."
+        ),
+    )
+    parser.add_argument(
+        "--page-size",
+        action="store",
+        default="",
+        type=str,
+        required=False,
+        metavar="<columns>x<rows>",
+        dest="page_size",
+        help=(
+            "Split the stitch pattern into pages of <columns>x<rows> stitches, e.g."
+            " 70x100, one HTML file per page and an index page with thumbnails."
+        ),
+    )
+    parser.add_argument(
+        "--page-overlap",
+        action="store",
+        default=0,
+        type=int,
+        required=False,
+        metavar="<stitches>",
+        dest="page_overlap",
+        help="Rows and columns repeated on neighboring pages.",
+    )
+    parser.add_argument(
+        "--workers",
+        action="store",
+        default=3,
+        type=int,
+        required=False,
+        metavar="<n>",
+        dest="workers",
+        help=(
+            "Write color plot, stitch pattern and legend with <n> workers in parallel."
+            " Use 1 to write the files one after the other, tables in one pass."
+        ),
+    )
+    parser.add_argument(
+        "--processes",
+        action="store_true",
+        required=False,
+        dest="processes",
+        help="Use processes instead of threads for the workers.",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store",
+        nargs="+",
+        default=[],
+        type=str,
+        required=False,
+        metavar="<dir-or-glob>",
+        dest="batch",
+        help=(
+            "Convert all PNG files of directories or glob patterns, e.g. 'img/*.png'."
+            " Failed files are listed in a summary, the other files are converted."
+        ),
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        action="store",
+        default=0,
+        type=int,
+        required=False,
+        metavar="<n>",
+        dest="jobs",
+        help="Convert <n> PNG files of a batch in parallel. Default 0 uses all cores.",
+    )
+    parser.add_argument(
+        "--journal",
+        action="store",
+        default="",
+        type=str,
+        required=False,
+        metavar="<file>",
+        dest="journal",
+        help=(
+            "Append status, content hash and output files of each PNG file of a batch"
+            " to the journal <file> as the files complete."
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        required=False,
+        dest="resume",
+        help=(
+            "Skip PNG files of a batch which the journal lists as converted, with equal"
+            " content and options and existing output files."
+        ),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        action="store",
+        default="",
+        type=str,
+        required=False,
+        metavar="<dir>",
+        dest="cache_dir",
+        help=(
+            "Cache decoded PNG files and output files in <dir>, by content and options."
+            " Unchanged PNG files are copied from the cache instead of converted."
+        ),
+    )
+    parser.add_argument(
+        "--cache-size",
+        action="store",
+        default=512,
+        type=int,
+        required=False,
+        metavar="<MB>",
+        dest="cache_size",
+        help="Maximum size of the cache, least recently used entries are removed first.",
+    )
     # TODO: confusing: pytchy -m, pytchy -s letters -m: not well documented and bad concept - remove
     parser.add_argument(
         "-m",
@@ -219,6 +888,40 @@ if __name__ == "__main__":
         pytchy._mark_center_color = args.mark_center_color
     if "symbols" in args:
         pytchy._symbol_user_selection = args.symbols
+    if "max_width" in args:
+        pytchy._max_width = args.max_width
+    if "max_height" in args:
+        pytchy._max_height = args.max_height
+    if "band_height" in args:
+        pytchy._band_height = args.band_height
+    if "output_format" in args:
+        pytchy._output_format = args.output_format
+    if "color_plot_image" in args:
+        pytchy._color_plot_image = args.color_plot_image
+    if "font_name" in args:
+        pytchy._font_name = args.font_name
+    if "chunk_rows" in args:
+        pytchy._chunk_rows = args.chunk_rows
+    if "page_size" in args:
+        pytchy._page_size = args.page_size
+    if "page_overlap" in args:
+        pytchy._page_overlap = args.page_overlap
+    if "workers" in args:
+        pytchy._workers = args.workers
+    if "processes" in args:
+        pytchy._processes = args.processes
+    if "batch" in args:
+        pytchy._batch = args.batch
+    if "jobs" in args:
+        pytchy._jobs = args.jobs
+    if "journal" in args:
+        pytchy._journal = args.journal
+    if "resume" in args:
+        pytchy._resume = args.resume
+    if "cache_dir" in args:
+        pytchy._cache_dir = args.cache_dir
+    if "cache_size" in args:
+        pytchy._cache_size = args.cache_size
 
     try:
         pytchy.prepare()
@@ -238,5 +941,10 @@ if __name__ == "__main__":
         _print_error_header()
         print(err)
 
+    except OutputError as err:
+        _print_error_header()
+        print("Following output files could not be written")
+        print(err)
+
     else:
         print("Done!")
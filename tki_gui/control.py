@@ -20,6 +20,18 @@ def show_about_dialog() -> None:
     )
 
 
+def make_png_reader(
+    png_file_name: str, max_width: Optional[IntVar], max_height: Optional[IntVar]
+) -> PngReader:
+    png_reader: PngReader = PngReader()
+    png_reader.file_name = png_file_name
+    if max_width is not None:
+        png_reader.width_max = max_width.get()
+    if max_height is not None:
+        png_reader.height_max = max_height.get()
+    return png_reader
+
+
 class ClearVar:
     def __init__(self, variable: StringVar):
         self._variable: StringVar = variable
@@ -32,6 +44,12 @@ class LoadPngCtrl:
     def __init__(self, png_file_name: StringVar, image_canvas: Canvas) -> None:
         self._png_file_name: StringVar = png_file_name
         self._image_canvas: Canvas = image_canvas
+        self._max_width: Optional[IntVar] = None
+        self._max_height: Optional[IntVar] = None
+
+    def set_size_limits(self, max_width: IntVar, max_height: IntVar) -> None:
+        self._max_width = max_width
+        self._max_height = max_height
 
     def open_png(self) -> None:
         assert self._png_file_name is not None, "png file name undefined"
@@ -53,6 +71,9 @@ class LoadPngCtrl:
             return
 
         try:
+            # header only, reject oversized files before decoding the preview
+            make_png_reader(png_file_name, self._max_width, self._max_height).validate()
+
             png_image = ImageTk.PhotoImage(Image.open(png_file_name))
             self._image_canvas.create_image(
                 self._image_canvas.winfo_width() / 2,
@@ -115,15 +136,21 @@ class LoadColorMatrix:
     def __init__(self, png_file_name: StringVar, color_matrix: Variable) -> None:
         self._png_file_name: StringVar = png_file_name
         self._color_matrix: Variable = color_matrix
+        self._max_width: Optional[IntVar] = None
+        self._max_height: Optional[IntVar] = None
+
+    def set_size_limits(self, max_width: IntVar, max_height: IntVar) -> None:
+        self._max_width = max_width
+        self._max_height = max_height
 
     def load(self, *args) -> None:
         assert self._png_file_name is not None, "undefined png file name"
         assert self._color_matrix is not None, "undefined color matrix"
 
-        png_reader: PngReader = PngReader()
-        png_reader.file_name = self._png_file_name.get()
-
         try:
+            png_reader: PngReader = make_png_reader(
+                self._png_file_name.get(), self._max_width, self._max_height
+            )
             color_matrix: ColorMatrix = png_reader.read()
             self._color_matrix.value = color_matrix
 
@@ -239,11 +266,20 @@ class UpdateMessageAndStatus:
             f'Symbol set "{self.symbol_set_name.get()}" '
             f"supports max {symbol_set.max_number} colors."
         )
-        if symbol_set.max_number < color_matrix.color_count:
+        # bounded check, avoids counting all colors of photos
+        too_many_colors: bool = color_matrix.has_more_colors_than(
+            symbol_set.max_number
+        )
+        color_count_text: str = (
+            f"more than {symbol_set.max_number}"
+            if too_many_colors
+            else str(color_matrix.color_count)
+        )
+        if too_many_colors:
             evaluate_statement = (
                 f'! Symbol set "{self.symbol_set_name.get()}" '
                 f"supports {symbol_set.max_number} colors "
-                f"but PNG has {color_matrix.color_count}."
+                f"but PNG has {color_count_text}."
             )
             evaluate_statement += "\nSelect another symbol set or reduce PNG colors."
             final_statement = "> Unable to generate stitch pattern."
@@ -265,7 +301,7 @@ class UpdateMessageAndStatus:
                 "",
                 f"File: {png_file_path.name}",
                 f"Size: {color_matrix.width} x {color_matrix.height}",
-                f"Colors: {color_matrix.color_count}",
+                f"Colors: {color_count_text}",
                 "",
                 evaluate_statement,
                 "",
@@ -36,6 +36,8 @@ class PictureFrame:
         self._frame: Optional[ttk.Frame] = None
         self._image_canvas: Optional[Canvas] = None
         self._open_png_button: Optional[ttk.Button] = None
+        self._max_width_spinbox: Optional[ttk.Spinbox] = None
+        self._max_height_spinbox: Optional[ttk.Spinbox] = None
 
         self._build()
 
@@ -51,6 +53,21 @@ class PictureFrame:
         self._image_canvas = Canvas(self._frame, width=200, height=300)
         self._image_canvas.grid(column=0, row=0, sticky=(N, W, E, S), padx=5, pady=2)
 
+        size_frame: ttk.Frame = ttk.Frame(self._frame)
+        size_frame.grid(column=0, row=3, sticky=(W, S), padx=5, pady=2)
+        max_size_text: ttk.Label = ttk.Label(size_frame, text="Max Size")
+        max_size_text.grid(column=0, row=0, sticky=W, padx=2)
+        self._max_width_spinbox = ttk.Spinbox(
+            size_frame, from_=1, to=10000, increment=100, width=6
+        )
+        self._max_width_spinbox.grid(column=1, row=0, sticky=W, padx=2)
+        size_times_text: ttk.Label = ttk.Label(size_frame, text="x")
+        size_times_text.grid(column=2, row=0, sticky=W, padx=2)
+        self._max_height_spinbox = ttk.Spinbox(
+            size_frame, from_=1, to=10000, increment=100, width=6
+        )
+        self._max_height_spinbox.grid(column=3, row=0, sticky=W, padx=2)
+
         self._open_png_button = ttk.Button(self._frame, text="Open PNG")
         self._open_png_button.grid(column=0, row=2, sticky=(E, S), padx=5, pady=2)
 
@@ -73,6 +90,16 @@ class PictureFrame:
         assert self._open_png_button is not None
         return self._open_png_button
 
+    @property
+    def max_width_spinbox(self) -> ttk.Spinbox:
+        assert self._max_width_spinbox is not None
+        return self._max_width_spinbox
+
+    @property
+    def max_height_spinbox(self) -> ttk.Spinbox:
+        assert self._max_height_spinbox is not None
+        return self._max_height_spinbox
+
 
 class GeneratePatternFrame:
     def __init__(self, parent: ttk.Widget) -> None:
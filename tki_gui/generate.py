@@ -1,11 +1,14 @@
 """Generation of HTML files."""
 from dataclasses import dataclass
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, Optional, Callable, Tuple
+from functools import partial
 from pathlib import Path
 from tkinter import StringVar, BooleanVar, messagebox
-from in_out.html import HTML, PHtml, PCss
+from in_out.html import PHtml, PCss
 from in_out.html import MatrixHtmlTable, MatrixTableCSS
 from in_out.html import LegendHtmlTable, LegendCSS
+from in_out.output import OutputStage
+from in_out.fused import write_html_pattern
 from core.color import ColorMatrix
 from core.symbols import PSymbolProvider, SymbolMatrix
 from tki_gui.variables import Variable
@@ -72,6 +75,7 @@ class GeneratePatternFiles:
         self._mark_center_color: Optional[StringVar] = None
         self._done_callback: Optional[Callable[[Any], None]] = None
         self._status_text: Optional[StringVar] = None
+        self._workers: int = 3
 
     def set_png_file_name(self, file_name: StringVar) -> None:
         self._png_file_name = file_name
@@ -91,6 +95,11 @@ class GeneratePatternFiles:
     def set_status_text(self, text_var: StringVar) -> None:
         self._status_text = text_var
 
+    def set_workers(self, workers: int) -> None:
+        if workers <= 0:
+            raise ValueError(f"Invalid number of workers {workers}, must be > 0")
+        self._workers = workers
+
     @property
     def png_file_name(self) -> StringVar:
         assert self._png_file_name is not None, "undefined png_file_name"
@@ -118,16 +127,17 @@ class GeneratePatternFiles:
         assert self._status_text is not None, "undefined status_text"
         return self._status_text
 
-    def _write_html_file(self, html_output: HtmlOutput) -> None:
+    @staticmethod
+    def _html_file_entry(html_output: HtmlOutput) -> Tuple[Path, Any, str]:
+        """(path, html, header) of an output for write_html_pattern."""
+        assert html_output.file_path is not None
         assert html_output.html is not None
         assert html_output.css is not None
-
-        with open(str(html_output.file_path), "w") as html_file:
-            html_file.write(
-                HTML(
-                    html_output.html.make_html(), html_output.css.make_html_style_tag()
-                ).make_html()
-            )
+        return (
+            html_output.file_path,
+            html_output.html,
+            html_output.css.make_html_style_tag(),
+        )
 
     def generate(self, *args: Any) -> None:
 
@@ -136,8 +146,13 @@ class GeneratePatternFiles:
                 self.png_file_name.get()
             )
 
-            output_html_files.color_plot.html = MatrixHtmlTable(self.color_matrix)
-            output_html_files.color_plot.css = MatrixTableCSS()
+            color_plot_html: MatrixHtmlTable = MatrixHtmlTable(self.color_matrix)
+            color_plot_html.merge_runs = True
+            output_html_files.color_plot.html = color_plot_html
+            color_plot_css: MatrixTableCSS = MatrixTableCSS()
+            color_plot_css.colors = self.color_matrix.distinct_colors
+            color_plot_html.class_colors = color_plot_css.colors
+            output_html_files.color_plot.css = color_plot_css
 
             symbol_matrix: SymbolMatrix = SymbolMatrix(
                 self.color_matrix, self.symbol_provider
@@ -151,12 +166,26 @@ class GeneratePatternFiles:
             output_html_files.stitch_pattern.html = symbol_matrix_html
             output_html_files.stitch_pattern.css = MatrixTableCSS()
 
-            output_html_files.legend.html = LegendHtmlTable(symbol_matrix.legend)
+            legend_html: LegendHtmlTable = LegendHtmlTable(symbol_matrix.legend)
+            output_html_files.legend.html = legend_html
             output_html_files.legend.css = LegendCSS()
 
-            self._write_html_file(output_html_files.color_plot)
-            self._write_html_file(output_html_files.stitch_pattern)
-            self._write_html_file(output_html_files.legend)
+            # threads only, the HTML objects are shared with the GUI
+            stage: OutputStage = OutputStage(self._workers)
+            # one walk over the pattern for the tables and the stitch counts of the legend
+            stage.add(
+                "color plot, stitch pattern, legend",
+                partial(
+                    write_html_pattern,
+                    symbol_matrix,
+                    [
+                        self._html_file_entry(output_html_files.color_plot),
+                        self._html_file_entry(output_html_files.stitch_pattern),
+                    ],
+                    self._html_file_entry(output_html_files.legend),
+                ),
+            )
+            stage.run()
 
             if self._done_callback is not None:
                 self._done_callback()  # type: ignore